@@ -15,10 +15,18 @@
 # limitations under the License.
 #
 try:
-  # Appstruct is currently required to handle <DateTime> type
+  # If Appstruct is installed, its parsers handle any date strings the built in ones reject
   from AppStruct.Date import ISOToDate, ISOToDateTime, UTC
 except ImportError:
-  pass
+  ISOToDate = ISOToDateTime = None
+  from datetime import timezone
+  UTC = timezone.utc
+
+try:
+  # Optional: only needed for <List Packed="NumPy">
+  import numpy
+except ImportError:
+  numpy = None
 
 # Import types
 NoneType = type(None)
@@ -31,14 +39,35 @@ ListType = list
 TupleType = tuple
 DictType = dict
 from decimal import Decimal as DecimalType
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 from datetime import datetime as DateTimeType
 from datetime import date as DateType
+from array import array as ArrayType
 
 # Other code needed
 from base64 import b64encode, b64decode
+from codecs import getincrementaldecoder
+from io import RawIOBase, BufferedIOBase
+from itertools import chain, count, islice
+from struct import Struct as _BinaryStruct
 from xml.etree import cElementTree as ElementTree
+from xml.parsers import expat
+from glob import glob
 from decimal import Decimal
+from hashlib import sha1
+from time import perf_counter
+from keyword import iskeyword
+from weakref import WeakSet
+from json import JSONDecoder, JSONDecodeError, JSONEncoder, detect_encoding
+from json.encoder import encode_basestring_ascii as _JSONQuote
+from json.decoder import scanstring
+from json.scanner import make_scanner
+import threading
+import asyncio
+import operator
+import pickle
+import os
+import sys
 import re
 
 Debug = False
@@ -51,6 +80,79 @@ REGEX_NODE_NAME = re.compile('^[a-zA-Z_][0-9a-zA-Z_]*$')
 #TODO: Remove this
 REGEX_NODE_NAME = REGEX_SPEC_NAME
 
+# Packed arrays are written little endian
+_BigEndian = sys.byteorder == 'big'
+
+# Fixed width packing used by version 2 streams
+_PackFloat = _BinaryStruct('<d').pack
+_UnpackFloat = _BinaryStruct('<d').unpack_from
+
+# Guards the lazy creation and invalidation of every Spec's cached convertors
+_ConvertorLock = threading.RLock()
+
+# Counts calls to Spec.Invalidate() on any Spec, so that holders of convertors can tell when
+# theirs may have been discarded
+_Invalidations = 0
+
+# For <List Packed="...">: the array typecode, bulk coercion and NumPy dtype for each value type
+_PackedTypes = {
+  'Int'   : ('q', int, 'int64'),
+  'Float' : ('d', float, 'float64'),
+  'Bool'  : ('b', bool, 'bool'),
+  }
+
+# For JSON>>Native: a C implemented scanner for any one JSON value, and JSON whitespace
+_JSONScan = make_scanner(JSONDecoder())
+_JSONSpace = re.compile(r'[ \t\n\r]*').match
+_JSONColon = re.compile(r'[ \t\n\r]*:[ \t\n\r]*').match
+
+# After a member or element: either a comma (group 1), or whatever closes the container (group 2)
+_JSONNext = re.compile(r'[ \t\n\r]*(?:(,)[ \t\n\r]*|([^ \t\n\r]))').match
+
+# For Native>>JSON
+_Infinity = float('inf')
+
+# C implemented ISO-8601 parsers (YYYY-MM-DD, and YYYY-MM-DD[THH:MM[:SS[.ffffff]]][+HH:MM])
+_DateFromISO = DateType.fromisoformat
+_DateTimeFromISO = DateTimeType.fromisoformat
+
+###################################################################################################
+def _ISODate(sText):
+  """
+  Parses an ISO-8601 date string into a date.
+  """
+  try:
+    return _DateFromISO(sText)
+  except ValueError:
+    if ISOToDate is None:
+      raise ValueError("Invalid ISO-8601 date: %r" % sText)
+
+  return ISOToDate(sText)
+
+###################################################################################################
+def _ISODateTime(sText):
+  """
+  Parses an ISO-8601 date and time string into a datetime.  A trailing Z means UTC, and so does
+  the lack of any offset; an explicit offset is kept.
+  """
+  try:
+    RVAL = _DateTimeFromISO(sText)
+  except ValueError:
+    try:
+      # Older versions of fromisoformat do not understand Z
+      if sText[-1:] not in ('Z', 'z'):
+        raise ValueError
+      RVAL = _DateTimeFromISO(sText[:-1] + '+00:00')
+    except ValueError:
+      if ISOToDateTime is None:
+        raise ValueError("Invalid ISO-8601 date and time: %r" % sText)
+      return ISOToDateTime(sText)
+
+  if RVAL.tzinfo is None:
+    return RVAL.replace(tzinfo=UTC)
+
+  return RVAL
+
 ###################################################################################################
 class aadict(dict):
   __slots__ = ()
@@ -58,6 +160,135 @@ class aadict(dict):
   __setattr__ = dict.__setitem__
   __delattr__ = dict.__delitem__
 
+###################################################################################################
+class SlotsRecord(object):
+  """
+  Base class of the record classes generated by MakeSlotsRecord.  Values are stored in
+  __slots__ and read as attributes, or by name with [] like an aadict.
+  """
+
+  __slots__ = ()
+
+  # STATIC: The property names, in order.  Set on each generated class.
+  _fields = ()
+
+  # STATIC: The key of each generated class in _RecordClasses.  Set on each generated class.
+  _Key = None
+
+  def __getitem__(self, sName):
+    if sName not in self._fields:
+      raise KeyError(sName)
+    return getattr(self, sName)
+
+  def keys(self):
+    return self._fields
+
+  def _asdict(self):
+    return aadict((sName, getattr(self, sName)) for sName in self._fields)
+
+  def __eq__(self, other):
+    if not isinstance(other, SlotsRecord):
+      return NotImplemented
+    return self._fields == other._fields and all(getattr(self, sName) == getattr(other, sName) for sName in self._fields)
+
+  __hash__ = None
+
+  def __repr__(self):
+    return "%s(%s)" % (self.__class__.__name__, str.join(", ", ("%s=%r" % (sName, getattr(self, sName)) for sName in self._fields)))
+
+  def __reduce__(self):
+    return _RebuildRecord, (self._Key, tuple(getattr(self, sName) for sName in self._fields))
+
+###################################################################################################
+# Generated record classes, by (Kind, Name, Names): the same arguments to MakeSlotsRecord or
+# MakeTupleRecord always give the same class.  Generated classes cannot be found by name, so
+# records are pickled as their class's key and values, and rebuilt through this registry.
+_RecordClasses = {}
+
+def _RecordClass(Key, Make):
+  try:
+    return _RecordClasses[Key]
+  except KeyError:
+    pass
+
+  with _ConvertorLock:
+    try:
+      return _RecordClasses[Key]
+    except KeyError:
+      Class = _RecordClasses[Key] = Make(Key[1], Key[2])
+      Class._Key = Key
+      return Class
+
+def _RebuildRecord(Key, Values):
+  Kind, sName, Names = Key
+  return (MakeSlotsRecord if Kind == 'Slots' else MakeTupleRecord)(sName, Names)(*Values)
+
+###################################################################################################
+def _RecordTypeName(sName):
+  """
+  Node names may contain '.' or start with a digit; class names may not.
+  """
+  sName = re.sub('[^0-9a-zA-Z_]', '_', sName)
+  return sName if sName.isidentifier() else '_' + sName
+
+###################################################################################################
+def MakeSlotsRecord(sName, Names):
+  """
+  Returns the SlotsRecord subclass with one slot per property name, constructed positionally
+  or by keyword in the order of Names, creating it on first use.  Names must be valid, unique
+  identifiers, and may not be 'self' or the name of a SlotsRecord attribute.
+  """
+  return _RecordClass(('Slots', sName, tuple(Names)), _MakeSlotsRecord)
+
+def _MakeSlotsRecord(sName, Names):
+
+  # __init__ is generated so that construction is a single call, without a loop
+  Namespace = {}
+  exec("def __init__(self, %s):\n  %s\n" % (
+    str.join(", ", Names),
+    str.join("\n  ", ("self.%s = %s" % (n, n) for n in Names)) or "pass",
+    ), Namespace)
+
+  return type(_RecordTypeName(sName), (SlotsRecord,), {
+    '__slots__': Names,
+    '__init__': Namespace['__init__'],
+    '_fields': Names,
+    })
+
+###################################################################################################
+def MakeTupleRecord(sName, Names):
+  """
+  Returns the namedtuple subclass for the property names, which can also be indexed by name
+  with [] like an aadict, creating it on first use.
+  """
+  return _RecordClass(('Tuple', sName, tuple(Names)), _MakeTupleRecord)
+
+def _MakeTupleRecord(sName, Names):
+  Base = namedtuple(_RecordTypeName(sName), Names)
+  Index = {n: i for i, n in enumerate(Base._fields)}
+
+  def __getitem__(self, key):
+    if key.__class__ is str:
+      return tuple.__getitem__(self, Index[key])
+    return tuple.__getitem__(self, key)
+
+  def keys(self):
+    return self._fields
+
+  def __reduce__(self):
+    return _RebuildRecord, (self._Key, tuple(self))
+
+  return type(Base.__name__, (Base,), {
+    '__slots__': (),
+    '__getitem__': __getitem__,
+    'keys': keys,
+    '__reduce__': __reduce__,
+    '_Key': None,
+    })
+
+_SLOTS_RESERVED = frozenset(dir(SlotsRecord)) | {'self'}
+_TUPLE_RESERVED = frozenset(('keys',))
+
 ###################################################################################################
 class ParseError(Exception):
   pass
@@ -76,7 +307,17 @@ def Parse(sXML):
     oSpec = Spec(oElement)
     RVAL.append(oSpec)
 
-  return RVAL
+  return _Library(RVAL)
+
+#==================================================================================================
+def _Library(SpecList):
+  # <Ref> nodes are looked up among the Specs parsed together
+  Library = dict((oSpec.Name, oSpec) for oSpec in SpecList)
+
+  for oSpec in SpecList:
+    oSpec.Library = Library
+
+  return SpecList
 
 
 ###################################################################################################
@@ -89,32 +330,254 @@ def ParseOne(sXML):
   return oSpec
 
 ###################################################################################################
-def ParseFile(sPath):
+def ParseFile(sPath, Cache=False):
+  """
+  Parses an Extruct XML file.  If Cache is True, the built Specs are also pickled to
+  sPath + CACHE_SUFFIX, and later calls load them from there instead of parsing the XML, for as
+  long as the source file is unchanged.
+
+  The cache file is trusted as much as the source itself: unpickling one can run arbitrary code,
+  so it must not be writable by anyone who could not also edit the XML.
+  """
   try:
+    if Cache:
+      return _ParseFileCached(sPath)
+
     return Parse(open(sPath, 'r').read())
   except Exception as e:
     raise ParseError("%s encountered while parsing '%s': %s" % (e.__class__.__name__, sPath, e.args[0]))
 
 
 ###################################################################################################
-def ParseFileForNames(sPath):
+CACHE_SUFFIX = '.cache'
+
+# Bump this whenever the pickled shape of Spec or any node changes
+CACHE_VERSION = 2
+
+def _ParseFileCached(sPath):
+  """
+  The cache file holds two pickles: a small header identifying the source (by mtime, size and
+  sha1) and then the list of Specs, so a stale cache is detected without loading the Specs.
+  """
+  sCachePath = sPath + CACHE_SUFFIX
+  oStat = os.stat(sPath)
+  Header = None
 
   try:
-    oXML = ElementTree.parse(sPath).getroot()
+    with open(sCachePath, 'rb') as FILE:
+      Header = pickle.load(FILE)
 
-    if oXML.tag != 'Extruct':
-      raise ValueError("The root element of the XML must be <Extruct>, not: %s" % oXML.tag)
+      if Header['Version'] == CACHE_VERSION and Header['MTime'] == oStat.st_mtime_ns and Header['Size'] == oStat.st_size:
+        # Warm start: the XML is not even read
+        return _Library(pickle.load(FILE))
 
-    RVAL = []
-    for node in oXML:
-      RVAL.append(node.attrib['Name'])
+  except Exception:
+    Header = None
 
-    return RVAL
+  with open(sPath, 'rb') as FILE:
+    bXML = FILE.read()
+
+  sHash = sha1(bXML).hexdigest()
+
+  RVAL = None
+
+  # Touched, but not changed
+  if Header is not None and Header['Version'] == CACHE_VERSION and Header['Hash'] == sHash:
+    try:
+      with open(sCachePath, 'rb') as FILE:
+        pickle.load(FILE)
+        RVAL = _Library(pickle.load(FILE))
+    except Exception:
+      RVAL = None
+
+  if RVAL is None:
+    RVAL = Parse(bXML)
+
+  Header = {'Version': CACHE_VERSION, 'MTime': oStat.st_mtime_ns, 'Size': oStat.st_size, 'Hash': sHash}
+
+  # Write to a temporary file and rename, so a concurrent reader never sees half a cache.  A
+  # cache which cannot be written (eg. a read-only directory) is simply skipped.
+  sTempPath = "%s.%i.tmp" % (sCachePath, os.getpid())
+  try:
+    with open(sTempPath, 'wb') as FILE:
+      pickle.dump(Header, FILE, pickle.HIGHEST_PROTOCOL)
+      pickle.dump(RVAL, FILE, pickle.HIGHEST_PROTOCOL)
+    os.replace(sTempPath, sCachePath)
+  except OSError:
+    try:
+      os.remove(sTempPath)
+    except OSError:
+      pass
+
+  return RVAL
+
+
+###################################################################################################
+def ParseFileForNames(sPath):
+
+  try:
+    return [sName for sName, iStart, iEnd in _IndexFile(sPath)]
 
   except Exception as e:
     raise ParseError("%s encountered while parsing '%s': %s" % (e.__class__.__name__, sPath, e.args[0]))
 
 
+###################################################################################################
+def _IndexFile(sPath):
+  """
+  Scans an Extruct file without building any elements, and returns a list of (Name, Start, End)
+  for each top level Spec, where Start:End is the byte range of its element in the file.
+
+  This uses expat directly, rather than iterparse, because only expat reports byte offsets.  Each
+  Spec's range runs up to the next top level element (or </Extruct>), so it may carry trailing
+  whitespace or comments, which ElementTree ignores.
+  """
+  RVAL = []
+  Depth = 0
+
+  oParser = expat.ParserCreate()
+
+  def StartElement(sTag, Attrib):
+    nonlocal Depth
+    Depth += 1
+
+    if Depth == 2:
+      if RVAL:
+        RVAL[-1][2] = oParser.CurrentByteIndex
+      RVAL.append([Attrib['Name'], oParser.CurrentByteIndex, None])
+
+    elif Depth == 1 and sTag != 'Extruct':
+      raise ValueError("The root element of the XML must be <Extruct>, not: %s" % sTag)
+
+  def EndElement(sTag):
+    nonlocal Depth
+    Depth -= 1
+
+    if Depth == 0 and RVAL:
+      RVAL[-1][2] = oParser.CurrentByteIndex
+
+  oParser.StartElementHandler = StartElement
+  oParser.EndElementHandler = EndElement
+
+  with open(sPath, 'rb') as FILE:
+    oParser.ParseFile(FILE)
+
+  return [tuple(v) for v in RVAL]
+
+
+###################################################################################################
+class SpecLibrary(object):
+  """
+  A name-indexed collection of the Specs in one Extruct file, or in every file matching Pattern
+  in a directory.  Constructing it only indexes the files; each Spec is parsed and built the
+  first time its name is requested, and then kept.
+  """
+
+  #==============================================================================================
+  def __init__(self, sPath, Pattern='*.xml'):
+    # Name -> (Path, Encoding, Start, End)
+    self.Index = {}
+
+    # Name -> Spec, for each Spec built so far
+    self.Specs = {}
+
+    self._Lock = threading.Lock()
+
+    if os.path.isdir(sPath):
+      PathList = sorted(glob(os.path.join(sPath, Pattern)))
+    else:
+      PathList = [sPath]
+
+    for sFile in PathList:
+      try:
+        sEncoding = _FileEncoding(sFile)
+        IndexList = _IndexFile(sFile)
+      except Exception as e:
+        raise ParseError("%s encountered while parsing '%s': %s" % (e.__class__.__name__, sFile, e.args[0]))
+
+      for sName, iStart, iEnd in IndexList:
+        if sName in self.Index:
+          raise ParseError("Spec '%s' is defined in both '%s' and '%s'" % (sName, self.Index[sName][0], sFile))
+
+        self.Index[sName] = (sFile, sEncoding, iStart, iEnd)
+
+  #==============================================================================================
+  def __getitem__(self, sName):
+    try:
+      return self.Specs[sName]
+    except KeyError:
+      pass
+
+    with self._Lock:
+      # Another thread may have built it while we waited
+      if sName in self.Specs:
+        return self.Specs[sName]
+
+      sFile, sEncoding, iStart, iEnd = self.Index[sName]
+
+      try:
+        with open(sFile, 'rb') as FILE:
+          FILE.seek(iStart)
+          sXML = FILE.read(iEnd - iStart).decode(sEncoding)
+
+        oSpec = Spec(ElementTree.fromstring(sXML))
+
+      except SpecError:
+        raise
+
+      except Exception as e:
+        raise ParseError("%s encountered while parsing '%s': %s" % (e.__class__.__name__, sFile, e.args[0]))
+
+      # <Ref> nodes are looked up in this library, building their Specs as they are needed
+      oSpec.Library = self
+
+      self.Specs[sName] = oSpec
+      return oSpec
+
+  #==============================================================================================
+  def get(self, sName, Default=None):
+    try:
+      return self[sName]
+    except KeyError:
+      return Default
+
+  def __contains__(self, sName):
+    return sName in self.Index
+
+  def __iter__(self):
+    return iter(self.Index)
+
+  def __len__(self):
+    return len(self.Index)
+
+  def Names(self):
+    return list(self.Index)
+
+
+###################################################################################################
+def _FileEncoding(sPath):
+  """
+  Returns the encoding named by a file's XML declaration, or 'utf-8'.
+  """
+  RVAL = ['utf-8']
+
+  def XmlDecl(sVersion, sEncoding, iStandalone):
+    if sEncoding:
+      RVAL[0] = sEncoding
+
+  oParser = expat.ParserCreate()
+  oParser.XmlDeclHandler = XmlDecl
+
+  with open(sPath, 'rb') as FILE:
+    # The declaration, if any, is at the very start of the file
+    try:
+      oParser.Parse(FILE.read(256), False)
+    except expat.ExpatError:
+      pass
+
+  return RVAL[0]
+
+
 ###################################################################################################
 ###################################################################################################
 class _SpecError(Exception):
@@ -177,6 +640,7 @@ class BaseNode(object):
       - ListNode
       - DictNode
       - StructNode
+    - RefNode
   """
 
   # STATIC: This must be overridden on base classes.
@@ -284,6 +748,10 @@ class StringNode(ScalarNode):
   MaxLength = None
   Trim = True
 
+  # If Intern, equal converted values share one str object, from a pool of up to InternSize
+  Intern = False
+  InternSize = 10000
+
   #=============================================================================================
   def __init__(self, oSpec, oElement):
     ScalarNode.__init__(self, oSpec, oElement)
@@ -301,6 +769,20 @@ class StringNode(ScalarNode):
         self.Trim = True
       else:
         raise _SpecError("Trim attribute must be '1' or '0'")
+
+    if 'Intern' in oElement.attrib:
+      if oElement.attrib['Intern'] == '0':
+        self.Intern = False
+      elif oElement.attrib['Intern'] == '1':
+        self.Intern = True
+      else:
+        raise _SpecError("Intern attribute must be '1' or '0'")
+
+    try:
+      if 'InternSize' in oElement.attrib:
+        self.InternSize = int(oElement.attrib['InternSize'])
+    except Exception as e:
+      raise _SpecError(e.args[0], 'InternSize')
 	  
 
 
@@ -309,6 +791,7 @@ class StringNode(ScalarNode):
     ScalarNode.VarDump(self, Indent, NoEnd=True)
     print("MaxLength=%s" % self.MaxLength)
     print("Trim=%s" % self.Trim)
+    print("Intern=%s" % self.Intern)
 
 
 ###################################################################################################
@@ -325,6 +808,10 @@ class ListNode(VectorNode):
 
   Value = None
 
+  # None, or what a list of Int, Float or Bool is packed into: an 'array' (array.array) or a
+  # 'NumPy' array
+  Packed = None
+
   #==============================================================================================
   def __init__(self, oSpec, oElement):
     VectorNode.__init__(self, oSpec, oElement)
@@ -334,6 +821,21 @@ class ListNode(VectorNode):
 
     self.Value = oSpec.MakeNode(oElement[0])
 
+    if 'Packed' in oElement.attrib:
+      if oElement.attrib['Packed'] == '0':
+        self.Packed = None
+      elif oElement.attrib['Packed'] == '1':
+        self.Packed = 'array'
+      elif oElement.attrib['Packed'] == 'NumPy':
+        if numpy is None:
+          raise _SpecError("Packed attribute 'NumPy' requires NumPy, which is not installed")
+        self.Packed = 'NumPy'
+      else:
+        raise _SpecError("Packed attribute must be '1', '0' or 'NumPy'")
+
+      if self.Packed and self.Value.Type not in _PackedTypes:
+        raise _SpecError("Packed lists must contain <Int>, <Float> or <Bool>")
+
   #=============================================================================================
   def VarDump(self, Indent=0):
     VectorNode.VarDump(self, Indent)
@@ -373,6 +875,13 @@ class StructNode(VectorNode):
 
   Prop = None
 
+  # What each converted record is: an 'aadict', or an instance of a generated 'Slots' or 'Tuple'
+  # record class (see MakeSlotsRecord, MakeTupleRecord)
+  Record = 'aadict'
+
+  # The generated record class, built on first use
+  _RecordClass = None
+
 
   #==============================================================================================
   def __init__(self, oSpec, oElement):
@@ -383,6 +892,48 @@ class StructNode(VectorNode):
     for element in oElement:
       self.Prop.append(oSpec.MakeNode(element))
 
+    if 'Record' in oElement.attrib:
+      if oElement.attrib['Record'] not in ('aadict', 'Slots', 'Tuple'):
+        raise _SpecError("Record attribute must be 'aadict', 'Slots' or 'Tuple'")
+      self.Record = oElement.attrib['Record']
+
+    if self.Record != 'aadict':
+      Names = [o.Name for o in self.Prop]
+
+      # Names which would clash with the generated __init__ or the record class's own attributes
+      Reserved = _SLOTS_RESERVED if self.Record == 'Slots' else _TUPLE_RESERVED
+
+      for sName in Names:
+        if not sName.isidentifier() or iskeyword(sName) or sName in Reserved or (self.Record == 'Tuple' and sName.startswith('_')):
+          raise _SpecError("Property name '%s' cannot be used in a %s record" % (sName, self.Record))
+
+      if len(set(Names)) != len(Names):
+        raise _SpecError("Property names must be unique in a %s record" % self.Record)
+
+  #=============================================================================================
+  @property
+  def RecordClass(self):
+    """
+    The generated record class for Record='Slots' or Record='Tuple', shared by every record.
+    """
+    if self._RecordClass is None:
+      Names = [o.Name for o in self.Prop]
+
+      if self.Record == 'Slots':
+        self._RecordClass = MakeSlotsRecord(self.Name, Names)
+      elif self.Record == 'Tuple':
+        self._RecordClass = MakeTupleRecord(self.Name, Names)
+      else:
+        raise ValueError("Struct '%s' does not use a record class" % self.Name)
+
+    return self._RecordClass
+
+  def __getstate__(self):
+    # Generated classes cannot be pickled; they are looked up again on demand
+    state = dict(self.__dict__)
+    state.pop('_RecordClass', None)
+    return state
+
   #=============================================================================================
   def VarDump(self, Indent=0):
     VectorNode.VarDump(self, Indent)
@@ -391,6 +942,117 @@ class StructNode(VectorNode):
       o.VarDump(Indent+1)
 
 ###################################################################################################
+class RefNode(BaseNode):
+  """
+  <Ref Name="..." Spec="OtherSpecName" />: a node converted as the root node of another Spec, in
+  the same Parse result or SpecLibrary (see Spec.Library).  The other Spec is looked up on first
+  use, so it may come later in the file.  Its nodes are shared by every Ref to it, not copied,
+  and compilers build its functions once however many Refs there are.
+
+  Conversion errors name the Ref, in place of the other Spec's root node.  A Ref may not lead
+  back to its own Spec.
+  """
+  Type = 'Ref'
+
+  SpecName = None
+
+  # The Spec this node belongs to, through whose Library SpecName is looked up
+  Owner = None
+
+  _Target = None
+  _Resolving = False
+
+  #==============================================================================================
+  def __init__(self, oSpec, oElement):
+    BaseNode.__init__(self, oSpec, oElement)
+
+    if len(oElement) != 0:
+      raise _SpecError("<Ref> element must not have child elements.")
+
+    try:
+      self.SpecName = oElement.attrib['Spec']
+    except KeyError:
+      raise _SpecError("Attribute 'Spec' is missing.")
+
+    if not REGEX_SPEC_NAME.match(self.SpecName):
+      raise _SpecError("Attribute 'Spec' is not valid: %s" % self.SpecName, 'Spec')
+
+    self.Owner = oSpec
+
+  #=============================================================================================
+  @property
+  def Target(self):
+    """
+    The root node of the Spec named by SpecName.  Raises SpecError if there is no such Spec, or
+    if it leads back here.
+    """
+    if self._Target is not None:
+      return self._Target
+
+    with _ConvertorLock:
+      if self._Target is not None:
+        return self._Target
+
+      if self._Resolving:
+        raise self.Error("<Ref> leads back to itself through Spec '%s'" % self.SpecName)
+
+      Library = self.Owner.Library
+      try:
+        if Library is None:
+          raise KeyError(self.SpecName)
+        oTargetSpec = Library[self.SpecName]
+      except KeyError:
+        raise self.Error("Spec '%s' was not found" % self.SpecName)
+
+      oTarget = oTargetSpec.ROOT
+
+      # Resolve the Refs beneath it now, so that a cycle is found here, not while compiling
+      self._Resolving = True
+      try:
+        Nodes = [oTarget]
+        while Nodes:
+          oNode = Nodes.pop()
+          if oNode.Type == 'Ref':
+            oNode.Target
+          elif oNode.Type == 'Struct':
+            Nodes.extend(oNode.Prop)
+          elif oNode.Type == 'List':
+            Nodes.append(oNode.Value)
+          elif oNode.Type == 'Dict':
+            Nodes.append(oNode.Value)
+      finally:
+        self._Resolving = False
+
+      # The owner's convertors are built from the target's nodes, so they go when the target's do
+      if oTargetSpec._Referrers is None:
+        oTargetSpec._Referrers = WeakSet()
+      oTargetSpec._Referrers.add(self.Owner)
+
+      self._Target = oTarget
+      return oTarget
+
+  def Error(self, sMessage):
+    e = _SpecError(sMessage, 'Spec')
+    e.Stack.insert(0, "Ref:%s" % self.Name)
+    return SpecError(e)
+
+  def __getstate__(self):
+    # The Library is not pickled with a Spec, so the target is resolved (if it can be) first
+    try:
+      self.Target
+    except SpecError:
+      pass
+
+    state = dict(self.__dict__)
+    state.pop('_Resolving', None)
+    return state
+
+  #=============================================================================================
+  def VarDump(self, Indent=0):
+    BaseNode.VarDump(self, Indent, NoEnd=True)
+    print("Spec=%s" % self.SpecName)
+
+###################################################################################################
 
 
 class Spec(object):
@@ -410,6 +1072,7 @@ class Spec(object):
     'List'    : ListNode,
     'Dict'    : DictNode,
     'Struct'  : StructNode,
+    'Ref'     : RefNode,
   }
 
 
@@ -418,8 +1081,23 @@ class Spec(object):
     return self.ROOT.Name;
   def Name_set(self, value):
     self.ROOT.Name = value
+    self.Invalidate()
   Name = property(Name_get, Name_set)
 
+  # Long-lived conversion functions, keyed by ConversionType, created on first use
+  _Convertors = None
+
+  # The Specs which <Ref> nodes are looked up in: a mapping of name to Spec (set by Parse, and by
+  # SpecLibrary), or None
+  Library = None
+
+  # Profiling: sample one conversion in every _ProfileEvery (0 is off) into _Stats
+  _ProfileEvery = 0
+  _Stats = None
+
+  # The Specs with <Ref> nodes resolved to this one, which Invalidate() also invalidates
+  _Referrers = None
+
   #==============================================================================================
   def __init__(self, oElement, Checksum=None):
     """
@@ -432,6 +1110,9 @@ class Spec(object):
       raise TypeError("Invalid type '%s' passed to constructor." % type(XML))
 
 
+    #------------------------------------------------------------------------------------------
+    self._Convertors = {}
+
     #------------------------------------------------------------------------------------------
     try:
       self.ROOT = self.MakeNode(oElement)
@@ -443,38 +1124,400 @@ class Spec(object):
       raise SpecError(e)
 
   #==============================================================================================
-  def Convert(self, DATA, ConversionType="Native>>Native"):
-    if ConversionType == 'Native>>Native':
-      return NativeToNative_Convertor(self).Convert(DATA)
-    else:
-      raise ValueError("Invalid value for ConversionType: %s" % str(ConversionType))
-
+  def __getstate__(self):
+    # Compiled convertors are closures, which cannot be pickled; they are rebuilt on demand.  So
+    # is the Library, once every Ref is resolved (see RefNode).
+    state = dict(self.__dict__)
+    del state['_Convertors']
+    state.pop('Library', None)
+    state.pop('_Referrers', None)
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self._Convertors = {}
 
   #==============================================================================================
-  def MakeNode(self, oElement):
-    """
-    Rather like the super constructor of all nodes.
+  def Convert(self, DATA, ConversionType="Native>>Native", Copy=True):
     """
+    Converts DATA according to this Spec.
 
-    try:
-      try:
-        return self.TagMap[oElement.tag](self, oElement)
-      except KeyError:
-        raise _SpecError('Encountered invalid tag: <%s>.' % oElement.tag)
+    ConversionType is 'Native>>Native', or 'JSON>>Native' to convert JSON text (str or bytes)
+    directly, with the same result as Native>>Native on json.loads(DATA), or 'Native>>JSON' to
+    convert DATA straight to compact JSON text (see also DumpJSON).
 
-    except _SpecError as e:
-      e.InsertStack(oElement)
-      raise
+    JSON>>Native trades time for memory: it builds no intermediate tree, so its peak memory is
+    several times lower than json.loads followed by Convert, but it is about three times slower,
+    since the text's structure is parsed in Python.  Members which are not Struct properties are
+    still read in full (by the json module's C scanner) before they are dropped.
 
-    except Exception as e:
-      if Debug: raise
-      raise _SpecError(e.args[0])
+    If Copy is False, any value (scalar or vector) which needs no coercion is returned as the
+    very same object that was passed in, and new containers are only allocated along paths where
+    something actually changed.  Errors are the same either way.
+    """
+    try:
+      oFunc = self._Convertors[ConversionType, Copy]
+    except KeyError:
+      oFunc = self.GetConvertor(ConversionType, Copy)
 
+    return oFunc(DATA)
 
   #==============================================================================================
-  def VarDump(self):
-    print()
-    print('`%s` Data Specification' % self.Name)
+  def Validate(self, DATA):
+    """
+    Checks DATA against this Spec, returning DATA itself if it is already exactly what Convert
+    would produce.  Same as Convert(DATA, Copy=False).
+    """
+    try:
+      oFunc = self._Convertors['Native>>Native', False]
+    except KeyError:
+      oFunc = self.GetConvertor('Native>>Native', False)
+
+    return oFunc(DATA)
+
+  #==============================================================================================
+  def ConvertMany(self, ITERABLE, ConversionType="Native>>Native", ReturnErrors=False, Copy=True):
+    """
+    Converts each record of ITERABLE and returns a list of the results, in order.  The convertor
+    is looked up once for the whole batch.
+
+    By default, the first ConversionError aborts the batch.  If ReturnErrors is True, a failed
+    record's ConversionError is placed in the returned list at that record's position instead.
+    """
+    try:
+      oFunc = self._Convertors[ConversionType, Copy]
+    except KeyError:
+      oFunc = self.GetConvertor(ConversionType, Copy)
+
+    if not ReturnErrors:
+      return list(map(oFunc, ITERABLE))
+
+    RVAL = []
+    append = RVAL.append
+
+    for DATA in ITERABLE:
+      try:
+        append(oFunc(DATA))
+      except ConversionError as e:
+        append(e)
+
+    return RVAL
+
+  #==============================================================================================
+  def ConvertParallel(self, DATA, Workers=None, ChunkSize=None):
+    """
+    Converts a large List or Dict across a pool of Workers processes (default: one per CPU),
+    returning the same value, and raising the same ConversionError, as Convert(DATA) would.
+
+    The top level elements are split into chunks of ChunkSize (default: enough for about four
+    chunks per worker), converted in the workers and merged back in order.  The Spec is sent
+    to each worker once, when the pool starts.
+
+    Anything other than a list or tuple for a <List>, or a dict for a <Dict>, and any Packed
+    list, is simply passed to Convert.  Slots and Tuple records come back from the workers as
+    instances of the same generated classes (see _RecordClasses).
+    """
+    oNode = self.ROOT
+
+    if not (oNode.Type == 'List' and not oNode.Packed and isinstance(DATA, (ListType, TupleType)) or oNode.Type == 'Dict' and isinstance(DATA, DictType)):
+      return self.Convert(DATA)
+
+    Workers = Workers or os.cpu_count() or 1
+    ChunkSize = ChunkSize or -(-len(DATA) // (Workers * 4)) or 1
+
+    if Workers == 1 or len(DATA) <= ChunkSize:
+      return self.Convert(DATA)
+
+    if oNode.Type == 'List':
+      Task = _ParallelList
+      ITEMS = DATA
+    else:
+      Task = _ParallelDict
+      ITEMS = list(DATA.items())
+
+    Chunks = [ITEMS[i:i+ChunkSize] for i in range(0, len(ITEMS), ChunkSize)]
+    Starts = range(0, len(ITEMS), ChunkSize)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=Workers, initializer=_ParallelInit, initargs=(pickle.dumps(self),)) as oPool:
+      RVAL = [] if oNode.Type == 'List' else dict()
+      extend = RVAL.extend if oNode.Type == 'List' else RVAL.update
+
+      for bOk, Result in oPool.map(Task, Starts, Chunks):
+        if not bOk:
+          # The worker sends back the parts of its _ConversionError: (Message, Stack, Value)
+          sError, Stack, Value = Result
+          e = _ConversionError(oNode, Value, sError)
+          e.Stack = Stack
+          raise ConversionError(e)
+
+        extend(Result)
+
+    return RVAL
+
+  #==============================================================================================
+  async def ConvertAsync(self, DATA, YieldEvery=1000, OffloadSize=None, Executor=None):
+    """
+    Coroutine version of Convert(DATA), for use inside an asyncio event loop.  Gives the same
+    result, or raises the same ConversionError.
+
+    When the root is a List or Dict, control is given back to the loop after every YieldEvery
+    top level elements.  If OffloadSize is set, a List or Dict with at least that many elements
+    is instead converted in one go by Executor (default: the loop's default executor), so the
+    loop is not held at all.
+
+    While profiling is on (see Profile), sampled calls record every node below the root.  The
+    root of a List or Dict converted with yields is not recorded, since its time would include
+    whatever else the loop ran meanwhile.
+    """
+    oNode = self.ROOT
+
+    try:
+      oFunc = self._Convertors['Native>>Native', True]
+    except KeyError:
+      oFunc = self.GetConvertor()
+
+    if not (oNode.Type == 'List' and not oNode.Packed and isinstance(DATA, (ListType, TupleType)) or oNode.Type == 'Dict' and isinstance(DATA, DictType)):
+      return oFunc(DATA)
+
+    if OffloadSize is not None and len(DATA) >= OffloadSize:
+      return await asyncio.get_running_loop().run_in_executor(Executor, oFunc, DATA)
+
+    if len(DATA) <= YieldEvery:
+      return oFunc(DATA)
+
+    # The compiled functions for the root's children, cached alongside the convertors, with
+    # profiled copies of them (sampled as by GetConvertor) while profiling is on
+    try:
+      Plain, Profiled, Every, Counter = self._Convertors['Elements']
+    except KeyError:
+      with _ConvertorLock:
+        Children = (oNode.Value,) if oNode.Type == 'List' else (oNode.Key, oNode.Value)
+        Plain = tuple(NativeToNative_Compiler(self).Node(oChild) for oChild in Children)
+        Profiled = None
+        Every = self._ProfileEvery
+
+        if Every:
+          oCompiler = NativeToNative_Compiler(self, True, self._Stats)
+          oCompiler.Path.append(oNode.Name)
+          Profiled = tuple(oCompiler.Node(oChild) for oChild in Children)
+
+        Counter = count()
+        self._Convertors['Elements'] = (Plain, Profiled, Every, Counter)
+
+    Elements = Plain if Profiled is None or next(Counter) % Every else Profiled
+
+    try:
+      if oNode.Type == 'List':
+        return await _ConvertListAsync(oNode, Elements[0], DATA, YieldEvery)
+      else:
+        return await _ConvertDictAsync(oNode, Elements[0], Elements[1], DATA, YieldEvery)
+
+    except _ConversionError as e:
+      if Debug: raise
+      raise ConversionError(e)
+
+  #==============================================================================================
+  def ConvertIncremental(self, DATA, Previous=None):
+    """
+    Converts DATA, reusing the converted List, Dict and Struct subtrees of Previous (an
+    IncrementalResult returned by an earlier call) wherever their input is the very same object
+    as before.  Returns an IncrementalResult, whose Value is what Convert(DATA) would return.
+
+    Inputs must therefore be treated as immutable between calls: make edits by replacing the
+    changed containers, and each container above them, with new ones.  The cost of a call is
+    then in proportion to those new containers, not to the whole of DATA.  A container changed
+    in place would be taken as unchanged.
+    """
+    try:
+      oFunc = self._Convertors['Incremental']
+    except KeyError:
+      with _ConvertorLock:
+        oFunc = self._Convertors['Incremental'] = Incremental_Compiler(self).Compile()
+
+    # Only results of this very convertor can be reused, not of one from before Invalidate()
+    Old = Previous.Entry if Previous is not None and Previous.Convertor is oFunc else None
+
+    try:
+      return IncrementalResult(oFunc(DATA, Old), oFunc)
+    except _ConversionError as e:
+      if Debug: raise
+      raise ConversionError(e)
+
+  #==============================================================================================
+  def DumpJSON(self, DATA, FILE, ChunkTokens=8192):
+    """
+    Converts DATA to JSON text, as Convert(DATA, 'Native>>JSON') does, writing it to a file-like
+    object while DATA is walked.  At most about ChunkTokens fragments of text are buffered
+    between writes.  Binary files (io.RawIOBase, io.BufferedIOBase) are written ASCII bytes.
+
+    On a ConversionError, whatever was written before it stays written.
+    """
+    try:
+      oEncode = self._Convertors['DumpJSON']
+    except KeyError:
+      with _ConvertorLock:
+        oEncode = self._Convertors['DumpJSON'] = NativeToJSON_Compiler(self).Encoder(self.ROOT)
+
+    if isinstance(FILE, (RawIOBase, BufferedIOBase)):
+      write = lambda sText: FILE.write(sText.encode())
+    else:
+      write = FILE.write
+
+    Buffer = _JSONBuffer(ChunkTokens, write)
+
+    try:
+      oEncode(DATA, Buffer)
+    except _ConversionError as e:
+      if Debug: raise
+      raise ConversionError(e)
+
+    Buffer.Flush()
+
+  #==============================================================================================
+  def Serialize(self, DATA):
+    """
+    Converts DATA, and encodes the result compactly as bytes: with no type tags or property
+    names, since Spec.Unserialize reads it with the same Spec.  Object nodes are encoded as
+    version 2 Serialize values.  See SpecEncoder_Compiler for the format.
+    """
+    try:
+      oFunc = self._Convertors['Serialize']
+    except KeyError:
+      with _ConvertorLock:
+        oFunc = self._Convertors['Serialize'] = SpecEncoder_Compiler(self).Compile()
+
+    return oFunc(self.Validate(DATA))
+
+  #==============================================================================================
+  def Unserialize(self, STREAM):
+    """
+    Decodes bytes written by Serialize with a Spec of the same shape (checked by a fingerprint
+    in the stream).  The values are not converted again.
+    """
+    try:
+      oFunc = self._Convertors['Unserialize']
+    except KeyError:
+      with _ConvertorLock:
+        oFunc = self._Convertors['Unserialize'] = SpecDecoder_Compiler(self).Compile()
+
+    return oFunc(STREAM)
+
+  #==============================================================================================
+  def GetConvertor(self, ConversionType="Native>>Native", Copy=True):
+    """
+    Returns the long-lived conversion function this Spec owns for ConversionType, compiling it
+    on first use.  The function holds no per-call state, so it may be shared across threads.
+    """
+    with _ConvertorLock:
+      try:
+        return self._Convertors[ConversionType, Copy]
+      except KeyError:
+        pass
+
+      oFunc = self.Compile(ConversionType, Copy)
+
+      if self._ProfileEvery:
+        oFunc = _SampledConvertor(oFunc, self.Compile(ConversionType, Copy, self._Stats), self._ProfileEvery)
+
+      self._Convertors[ConversionType, Copy] = oFunc
+      return oFunc
+
+  #==============================================================================================
+  def Profile(self, Every=1):
+    """
+    Turns on per-node profiling for one in every Every conversions (1 profiles all of them), or
+    turns it off with Every=0.  Unsampled conversions, and all conversions while profiling is off,
+    run the plain compiled convertor with no instrumentation at all.
+    """
+    with _ConvertorLock:
+      self._ProfileEvery = Every
+
+      if Every and self._Stats is None:
+        self._Stats = ConversionStats()
+
+      self.Invalidate()
+
+  #==============================================================================================
+  def Stats(self):
+    """
+    Returns what profiling has recorded so far, as a dict of node path (eg. '/Record/Tags/Tag')
+    to aadict(Calls, Time, Errors, Size).  Time is in seconds and includes child nodes; Size is
+    the total number of elements seen by List and Dict nodes.
+    """
+    if self._Stats is None:
+      return {}
+
+    return self._Stats.Report()
+
+  #==============================================================================================
+  def ResetStats(self):
+    """
+    Sets every recorded profiling figure back to zero.
+    """
+    if self._Stats is not None:
+      self._Stats.Reset()
+
+  #==============================================================================================
+  def Invalidate(self):
+    """
+    Discards every cached convertor, and those of every Spec which <Ref>s this one.  Call this
+    after changing any node of the Spec.
+    """
+    global _Invalidations
+
+    with _ConvertorLock:
+      self._Convertors = {}
+      _Invalidations += 1
+
+      if self._Referrers is not None:
+        for oSpec in list(self._Referrers):
+          oSpec.Invalidate()
+
+  #==============================================================================================
+  def Compile(self, ConversionType="Native>>Native", Copy=True, Stats=None):
+    """
+    Walks the node tree once and returns a callable which performs exactly the same conversion
+    as Convert(DATA, ConversionType, Copy), without any per-value dispatch.
+
+    If Stats (a ConversionStats) is given, every node's function records its calls into it.
+    """
+    if ConversionType == 'Native>>Native':
+      return NativeToNative_Compiler(self, Copy, Stats).Compile()
+    elif ConversionType == 'JSON>>Native':
+      return JSONToNative_Compiler(self, Copy, Stats).Compile()
+    elif ConversionType == 'Native>>JSON':
+      return NativeToJSON_Compiler(self, Copy, Stats).Compile()
+    else:
+      raise ValueError("Invalid value for ConversionType: %s" % str(ConversionType))
+
+
+  #==============================================================================================
+  def MakeNode(self, oElement):
+    """
+    Rather like the super constructor of all nodes.
+    """
+
+    try:
+      try:
+        return self.TagMap[oElement.tag](self, oElement)
+      except KeyError:
+        raise _SpecError('Encountered invalid tag: <%s>.' % oElement.tag)
+
+    except _SpecError as e:
+      e.InsertStack(oElement)
+      raise
+
+    except Exception as e:
+      if Debug: raise
+      raise _SpecError(e.args[0])
+
+
+  #==============================================================================================
+  def VarDump(self):
+    print()
+    print('`%s` Data Specification' % self.Name)
     print()
     self.ROOT.VarDump(2)
 
@@ -509,6 +1552,14 @@ class _ConversionError(Exception):
       if len(Key) > 20: Key = Key[:20] + "..."
       self.Stack.insert(0, "%s[%s]" % (oNode.Name, Key))
 
+  def RenameStack(self, sFrom, sTo):
+    """
+    Call this to rename the node sFrom at the beginning of the stack to sTo, keeping any [Key].
+    """
+
+    if self.Stack[0].startswith(sFrom):
+      self.Stack[0] = sTo + self.Stack[0][len(sFrom):]
+
 
 ###################################################################################################
 class ConversionError(Exception):
@@ -533,6 +1584,133 @@ class ConversionError(Exception):
 
     Exception.__init__(self, "%s (/%s)" % (oError.args[0], str.join("/", self.Stack)))
 
+###################################################################################################
+# Spec.ConvertParallel runs these in each worker process.  The Spec arrives once, pickled, when
+# the worker starts; each task is then one chunk of the top level List or Dict.
+
+_ParallelState = None
+
+def _ParallelInit(sSpec):
+  global _ParallelState
+  eSpec = pickle.loads(sSpec)
+  oCompiler = NativeToNative_Compiler(eSpec)
+
+  if eSpec.ROOT.Type == 'List':
+    _ParallelState = (eSpec.ROOT, oCompiler.Node(eSpec.ROOT.Value))
+  else:
+    _ParallelState = (eSpec.ROOT, oCompiler.Node(eSpec.ROOT.Key), oCompiler.Node(eSpec.ROOT.Value))
+
+def _ParallelError(e):
+  # The node and value may not pickle, so only the parts ConversionError needs are sent back
+  try:
+    Value = pickle.loads(pickle.dumps(e.Value))
+  except Exception:
+    Value = repr(e.Value)
+
+  return (False, (e.args[0], e.Stack, Value))
+
+def _ParallelList(Start, CHUNK):
+  oNode, oValueFunc = _ParallelState
+
+  # Same numbering as NativeToNative_Compiler._List, which counts from 1
+  i = Start
+  try:
+    RVAL = []
+    append = RVAL.append
+
+    for value in CHUNK:
+      i += 1
+      append(oValueFunc(value))
+
+    return (True, RVAL)
+
+  except _ConversionError as e:
+    e.InsertStack(oNode, i)
+    return _ParallelError(e)
+
+def _ParallelDict(Start, CHUNK):
+  oNode, oKeyFunc, oValueFunc = _ParallelState
+
+  try:
+    RVAL = []
+    append = RVAL.append
+
+    for key, value in CHUNK:
+      key = oKeyFunc(key)
+      append((key, oValueFunc(value)))
+
+    return (True, RVAL)
+
+  except _ConversionError as e:
+    e.InsertStack(oNode, key)
+    return _ParallelError(e)
+
+###################################################################################################
+# Spec.ConvertAsync walks the top level of a large List or Dict with these, which mirror
+# NativeToNative_Compiler._List and _Dict but await the loop every YieldEvery elements.
+
+async def _ConvertListAsync(oNode, oValueFunc, DATA, YieldEvery):
+  i = 0
+  try:
+    RVAL = []
+    append = RVAL.append
+
+    for value in DATA:
+      i += 1
+      append(oValueFunc(value))
+
+      if i % YieldEvery == 0:
+        await asyncio.sleep(0)
+
+    return RVAL
+
+  except _ConversionError as e:
+    e.InsertStack(oNode, i)
+    raise
+
+  except Exception as e:
+    if Debug: raise
+    raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+
+async def _ConvertDictAsync(oNode, oKeyFunc, oValueFunc, DATA, YieldEvery):
+  try:
+    RVAL = dict()
+
+    # The keys are taken up front, as DATA may change while the loop runs something else
+    for i, key in enumerate(list(DATA), 1):
+      value = DATA[key]
+
+      key = oKeyFunc(key)
+      RVAL[key] = oValueFunc(value)
+
+      if i % YieldEvery == 0:
+        await asyncio.sleep(0)
+
+    return RVAL
+
+  except _ConversionError as e:
+    e.InsertStack(oNode, key)
+    raise
+
+  except Exception as e:
+    if Debug: raise
+    raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+
+###################################################################################################
+def _Intern(Pool, Size, DATA):
+  """
+  Returns the pooled str equal to DATA, adding DATA to the pool if there is one and the pool
+  holds fewer than Size values.  A full pool is not evicted from; later values pass through.
+  """
+  value = Pool.get(DATA)
+  if value is not None:
+    return value
+
+  if len(Pool) < Size:
+    Pool[DATA] = DATA
+
+  return DATA
+
 ###################################################################################################
 class NativeToNative_Convertor(object):
 
@@ -546,6 +1724,9 @@ class NativeToNative_Convertor(object):
 
     self.Spec = eSpec
 
+    # The pool of values for each StringNode with Intern set
+    self.Pools = {}
+
   #==============================================================================================
   def Convert(self, DATA):
     # Depending on the type node, get the initial function to call
@@ -606,7 +1787,7 @@ class NativeToNative_Convertor(object):
       elif isinstance(DATA, DateTimeType):
         return DateType(DATA.year, DATA.month, DATA.day)
       elif isinstance(DATA, str):
-        return ISOToDate(DATA)
+        return _ISODate(DATA)
       else:
         raise TypeError('Cannot covert type ' + str(type(DATA)) + ' to DateType.')
     except Exception as e:
@@ -620,7 +1801,7 @@ class NativeToNative_Convertor(object):
       elif isinstance(DATA, DateType):
         return DateTimeType(DATA.year, DATA.month, DATA.day, 0, 0, 0, tzinfo=UTC)
       elif isinstance(DATA, str):
-        return ISOToDateTime(DATA)
+        return _ISODateTime(DATA)
       else:
         raise TypeError('Cannot covert type ' + str(type(DATA)) + ' to DateTimeType.')
     except Exception as e:
@@ -639,6 +1820,9 @@ class NativeToNative_Convertor(object):
     if oNode.MaxLength and len(DATA) > oNode.MaxLength:
       raise _ConversionError(oNode, DATA, "String length exceeded maximum of %s bytes." % oNode.MaxLength)
 
+    if oNode.Intern:
+      return _Intern(self.Pools.setdefault(oNode, {}), oNode.InternSize, DATA)
+
     return DATA
 
   #==============================================================================================
@@ -657,12 +1841,19 @@ class NativeToNative_Convertor(object):
       oValueNode = oNode.Value
       oValueFunc = getattr(self, "_"+oValueNode.Type)
 
-      RVAL = []
+      RVAL = ArrayType(_PackedTypes[oValueNode.Type][0]) if oNode.Packed else []
 
       i = 0
       for value in DATA:
         i += 1
-        RVAL.append(oValueFunc(oValueNode, value))
+        value = oValueFunc(oValueNode, value)
+        try:
+          RVAL.append(value)
+        except OverflowError as e:
+          raise _ConversionError(oValueNode, value, e.args[0])
+
+      if oNode.Packed == 'NumPy':
+        return numpy.frombuffer(RVAL, dtype=_PackedTypes[oValueNode.Type][2])
 
       return RVAL
 
@@ -704,6 +1895,16 @@ class NativeToNative_Convertor(object):
       if Debug: raise
       raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
 
+  #==============================================================================================
+  def _Ref(self, oNode, DATA):
+    oTarget = oNode.Target
+
+    try:
+      return getattr(self, "_"+oTarget.Type)(oTarget, DATA)
+    except _ConversionError as e:
+      e.RenameStack(oTarget.Name, oNode.Name)
+      raise
+
   #==============================================================================================
   def _Struct(self, oNode, DATA):
     try:
@@ -727,6 +1928,8 @@ class NativeToNative_Convertor(object):
         else:
           RVAL[oPropNode.Name] = oFunc(oPropNode, value)
 
+      if oNode.Record != 'aadict':
+        return oNode.RecordClass(**RVAL)
 
       return RVAL
 
@@ -739,21 +1942,1932 @@ class NativeToNative_Convertor(object):
       raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
 
 ###################################################################################################
+def _PublicConvertor(oFunc):
+  """
+  Wraps a compiled node function (which raises _ConversionError) as a public convertor (which
+  raises ConversionError).
+  """
+  def Convert(DATA):
+    try:
+      return oFunc(DATA)
+    except _ConversionError as e:
+      if Debug: raise
+      raise ConversionError(e)
 
+  # The inner function, which raises _ConversionError, for callers that translate errors once
+  # around several conversions
+  Convert.Node = oFunc
 
+  return Convert
 
-class Serialize(object):
+###################################################################################################
+def _SampledConvertor(oPlain, oProfiled, Every):
   """
-  Stream Format a simple token stream.
+  Returns a public convertor which runs oProfiled for one call in every Every, and oPlain for
+  the rest.
+  """
+  Counter = count()
+  PlainNode = oPlain.Node
+  ProfiledNode = oProfiled.Node
 
-  Stream:
-    start-token | (scalar or vectors ...) | end-token
+  def Node(DATA):
+    if next(Counter) % Every:
+      return PlainNode(DATA)
+    return ProfiledNode(DATA)
 
-  Scalar:
-    name | type | value
+  return _PublicConvertor(Node)
 
-  Scalar (None):
-    name | type
+###################################################################################################
+def _Renamed(oFunc, oNode):
+  """
+  Wraps the compiled function of a Ref's target, so that its errors name the Ref oNode instead of
+  the target's root node.  Both names are read when the error is raised.
+  """
+  def Convert(*args):
+    try:
+      return oFunc(*args)
+    except _ConversionError as e:
+      e.RenameStack(oNode.Target.Name, oNode.Name)
+      raise
+
+  return Convert
+
+###################################################################################################
+class ConversionStats(object):
+  """
+  Per-node profiling figures, collected by instrumented compiled convertors (see Spec.Profile).
+  Updates are not locked, so figures from concurrent conversions are approximate.
+  """
+
+  #==============================================================================================
+  def __init__(self):
+    # Path -> [Calls, Time, Errors, Size]
+    self.Nodes = {}
+
+  #==============================================================================================
+  def Instrument(self, oFunc, sPath, bSized):
+    """
+    Returns oFunc wrapped so that each call is recorded against sPath.  If bSized, the number
+    of elements of each input is recorded too.
+    """
+    Entry = self.Nodes.setdefault(sPath, [0, 0.0, 0, 0])
+
+    def Convert(DATA):
+      t = perf_counter()
+      try:
+        return oFunc(DATA)
+      except _ConversionError:
+        Entry[2] += 1
+        raise
+      finally:
+        Entry[1] += perf_counter() - t
+        Entry[0] += 1
+        if bSized:
+          try:
+            Entry[3] += len(DATA)
+          except TypeError:
+            pass
+
+    return Convert
+
+  #==============================================================================================
+  def Report(self):
+    return dict(
+      (sPath, aadict(Calls=Entry[0], Time=Entry[1], Errors=Entry[2], Size=Entry[3]))
+      for sPath, Entry in self.Nodes.items()
+      )
+
+  #==============================================================================================
+  def Reset(self):
+    # Zeroed in place, since the instrumented functions hold on to their entries
+    for Entry in self.Nodes.values():
+      Entry[:] = [0, 0.0, 0, 0]
+
+###################################################################################################
+class NativeToNative_Compiler(object):
+  """
+  Walks the node tree of a Spec once, and builds a tree of nested closures which perform the
+  same conversion as NativeToNative_Convertor.  Each node's function is looked up exactly once,
+  at compile time, instead of once per value.
+
+  Every _<Type> method takes a node and returns a function of one argument (DATA) which raises
+  _ConversionError exactly as the corresponding NativeToNative_Convertor method would.
+
+  With Copy=False, the functions return their input unchanged whenever it is already exactly
+  what they would produce, and vectors copy themselves only once an element actually differs.
+  """
+
+  Spec = None
+  Copy = True
+  Stats = None
+
+  #==============================================================================================
+  def __init__(self, eSpec, Copy=True, Stats=None):
+    # We are dealing directly with a spec
+    if not isinstance(eSpec, Spec):
+      raise TypeError("Parameter 1 must be an instance of %s." % Spec)
+
+    self.Spec = eSpec
+    self.Copy = Copy
+    self.Stats = Stats
+
+    # The names of the nodes above the one being compiled
+    self.Path = []
+
+    # What has been built for each Ref target, by Shared()
+    self.Refs = {}
+
+  #==============================================================================================
+  def Compile(self):
+    """
+    Returns the public conversion function, which raises ConversionError.
+    """
+    return _PublicConvertor(self.Node(self.Spec.ROOT))
+
+  #==============================================================================================
+  def Node(self, oNode):
+    """
+    Returns the compiled function for any node.
+    """
+    if self.Stats is None:
+      return getattr(self, "_"+oNode.Type)(oNode)
+
+    self.Path.append(oNode.Name)
+    try:
+      oFunc = getattr(self, "_"+oNode.Type)(oNode)
+      return self.Stats.Instrument(oFunc, '/' + str.join('/', self.Path), oNode.Type in ('List', 'Dict'))
+    finally:
+      self.Path.pop()
+
+  #==============================================================================================
+  def Shared(self, Build, oTarget):
+    """
+    Returns Build(oTarget), for a Ref's target, building it only once however many Refs point to
+    it.  When profiling, each Ref is built separately, to be recorded under its own path.
+    """
+    if self.Stats is not None:
+      return Build(oTarget)
+
+    Key = (Build.__name__, oTarget)
+    try:
+      return self.Refs[Key]
+    except KeyError:
+      RVAL = self.Refs[Key] = Build(oTarget)
+      return RVAL
+
+  #==============================================================================================
+  def _Ref(self, oNode):
+    return _Renamed(self.Shared(self.Node, oNode.Target), oNode)
+
+  #==============================================================================================
+  def _Object(self, oNode):
+    def Convert(DATA):
+      return DATA
+    return Convert
+
+  #==============================================================================================
+  def _None(self, oNode):
+    def Convert(DATA):
+      return None
+    return Convert
+
+  #==============================================================================================
+  def _Bool(self, oNode):
+    def Convert(DATA):
+      try:
+        return bool(DATA)
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+    return Convert
+
+  #==============================================================================================
+  def _Int(self, oNode):
+    def Convert(DATA):
+      try:
+        return int(DATA)
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+    return Convert
+
+  #==============================================================================================
+  def _Float(self, oNode):
+    def Convert(DATA):
+      try:
+        return float(DATA)
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+    return Convert
+
+  #==============================================================================================
+  def _Decimal(self, oNode):
+    Copy = self.Copy
+
+    def Convert(DATA):
+      try:
+        # Decimals are immutable, so there is no need to build a new one
+        if not Copy and type(DATA) is DecimalType:
+          return DATA
+
+        # Cannot convert float to Decimal. First convert the float to a string.
+        if isinstance(DATA, float):
+          return Decimal(str(DATA))
+        else:
+          return Decimal(DATA)
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+    return Convert
+
+  #==============================================================================================
+  def _Date(self, oNode):
+    def Convert(DATA):
+      try:
+        if type(DATA) == DateType:
+          return DATA
+        elif isinstance(DATA, DateTimeType):
+          return DateType(DATA.year, DATA.month, DATA.day)
+        elif isinstance(DATA, str):
+          return _ISODate(DATA)
+        else:
+          raise TypeError('Cannot covert type ' + str(type(DATA)) + ' to DateType.')
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+    return Convert
+
+  #==============================================================================================
+  def _DateTime(self, oNode):
+    def Convert(DATA):
+      try:
+        if type(DATA) == DateTimeType:
+          return DATA
+        elif isinstance(DATA, DateType):
+          return DateTimeType(DATA.year, DATA.month, DATA.day, 0, 0, 0, tzinfo=UTC)
+        elif isinstance(DATA, str):
+          return _ISODateTime(DATA)
+        else:
+          raise TypeError('Cannot covert type ' + str(type(DATA)) + ' to DateTimeType.')
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+    return Convert
+
+  #==============================================================================================
+  def _String(self, oNode):
+    Trim = oNode.Trim
+    MaxLength = oNode.MaxLength
+
+    # Each compiled convertor has its own pool, which is dropped with it
+    Pool = {} if oNode.Intern else None
+    InternSize = oNode.InternSize
+
+    def Convert(DATA):
+      try:
+        DATA = str(DATA)
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+
+      if Trim:
+        DATA = DATA.strip()
+
+      if MaxLength and len(DATA) > MaxLength:
+        raise _ConversionError(oNode, DATA, "String length exceeded maximum of %s bytes." % MaxLength)
+
+      if Pool is not None:
+        value = Pool.get(DATA)
+        if value is not None:
+          return value
+        if len(Pool) < InternSize:
+          Pool[DATA] = DATA
+
+      return DATA
+    return Convert
+
+  #==============================================================================================
+  def _Bytes(self, oNode):
+    def Convert(DATA):
+      try:
+        DATA = bytes(DATA)
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+
+      return DATA
+    return Convert
+
+  #==============================================================================================
+  def _List(self, oNode):
+    oValueFunc = self.Node(oNode.Value)
+
+    if oNode.Packed:
+      return self._ListPacked(oNode, oValueFunc)
+
+    if not self.Copy:
+      return self._ListNoCopy(oNode, oValueFunc)
+
+    def Convert(DATA):
+      i = 0
+      try:
+        RVAL = []
+        append = RVAL.append
+
+        for value in DATA:
+          i += 1
+          append(oValueFunc(value))
+
+        return RVAL
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, i)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+  #==============================================================================================
+  def _Dict(self, oNode):
+    oKeyFunc = self.Node(oNode.Key)
+    oValueFunc = self.Node(oNode.Value)
+
+    if not self.Copy:
+      return self._DictNoCopy(oNode, oKeyFunc, oValueFunc)
+
+    def Convert(DATA):
+      try:
+        RVAL = dict()
+
+        for key in DATA:
+          value = DATA[key]
+
+          # New key, value
+          key = oKeyFunc(key)
+          RVAL[key] = oValueFunc(value)
+
+        return RVAL
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, key)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+  #==============================================================================================
+  def _Struct(self, oNode):
+    # Everything about each property is resolved once, here, rather than once per record
+    Props = tuple(
+      (oPropNode.Name, oPropNode.Default, oPropNode.Nullable, self.Node(oPropNode))
+      for oPropNode in oNode.Prop
+      )
+
+    if oNode.Record != 'aadict':
+      return self._StructRecord(oNode, Props)
+
+    if not self.Copy:
+      return self._StructNoCopy(oNode, Props)
+
+    def Convert(DATA):
+      try:
+        RVAL = aadict()
+
+        for sName, eDefault, bNullable, oFunc in Props:
+          try:
+            value = DATA[sName]
+          except KeyError:
+            value = eDefault
+
+          if value == None:
+            if not bNullable:
+              raise KeyError("[%s] must be set, Nullable or Defaulted" % sName)
+            else:
+              RVAL[sName] = None
+          else:
+            RVAL[sName] = oFunc(value)
+
+        return RVAL
+
+      except _ConversionError as e:
+        e.InsertStack(oNode)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+
+  #==============================================================================================
+  def _ListNoCopy(self, oNode, oValueFunc):
+    def Convert(DATA):
+      i = 0
+      try:
+        # Anything other than a list must be rebuilt as one anyway
+        if type(DATA) is not list:
+          RVAL = []
+          append = RVAL.append
+
+          for value in DATA:
+            i += 1
+            append(oValueFunc(value))
+
+          return RVAL
+
+        RVAL = None
+
+        for value in DATA:
+          i += 1
+          v = oValueFunc(value)
+
+          if RVAL is None:
+            if v is value:
+              continue
+            # The first difference: copy the (identical) elements before it
+            RVAL = DATA[:i-1]
+
+          RVAL.append(v)
+
+        return DATA if RVAL is None else RVAL
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, i)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+  #==============================================================================================
+  def _ListPacked(self, oNode, oValueFunc):
+    oValueNode = oNode.Value
+    sCode, fBulk, sDType = _PackedTypes[oValueNode.Type]
+    bNumPy = oNode.Packed == 'NumPy'
+    Copy = self.Copy
+
+    def Convert(DATA):
+      # An already packed value passes straight through when not copying
+      if not Copy:
+        if bNumPy and type(DATA) is numpy.ndarray and DATA.dtype == sDType and DATA.ndim == 1:
+          return DATA
+        if not bNumPy and type(DATA) is ArrayType and DATA.typecode == sCode:
+          return DATA
+
+      i = 0
+      try:
+        # Iterators can only be walked once, and the slow path below may need a second look
+        if not isinstance(DATA, (ListType, TupleType, ArrayType)):
+          DATA = list(DATA)
+
+        try:
+          # Every element coerced and packed in one C level pass
+          RVAL = ArrayType(sCode, map(fBulk, DATA))
+
+        except Exception:
+          # Something failed: convert one at a time, to report the same error as Convert
+          RVAL = ArrayType(sCode)
+          append = RVAL.append
+
+          for value in DATA:
+            i += 1
+            value = oValueFunc(value)
+            try:
+              append(value)
+            except OverflowError as e:
+              raise _ConversionError(oValueNode, value, e.args[0])
+
+        if bNumPy:
+          return numpy.frombuffer(RVAL, dtype=sDType)
+
+        return RVAL
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, i)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+  #==============================================================================================
+  def _DictNoCopy(self, oNode, oKeyFunc, oValueFunc):
+    def Convert(DATA):
+      try:
+        RVAL = None if type(DATA) is dict else dict()
+        i = 0
+
+        for key in DATA:
+          value = DATA[key]
+          original = key
+
+          # New key, value
+          key = oKeyFunc(key)
+          v = oValueFunc(value)
+
+          if RVAL is None:
+            if key is original and v is value:
+              i += 1
+              continue
+            # The first difference: copy the (identical) items before it
+            RVAL = dict(islice(DATA.items(), i))
+
+          RVAL[key] = v
+
+        return DATA if RVAL is None else RVAL
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, key)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+  #==============================================================================================
+  def _StructNoCopy(self, oNode, Props):
+    Names = tuple(sName for sName, eDefault, bNullable, oFunc in Props)
+    nProps = len(Props)
+
+    def Convert(DATA):
+      try:
+        # Only an aadict holding exactly the properties can be returned as is
+        RVAL = None if type(DATA) is aadict and len(DATA) == nProps else aadict()
+        i = 0
+
+        for sName, eDefault, bNullable, oFunc in Props:
+          try:
+            value = DATA[sName]
+            bPresent = True
+          except KeyError:
+            value = eDefault
+            bPresent = False
+
+          if value == None:
+            if not bNullable:
+              raise KeyError("[%s] must be set, Nullable or Defaulted" % sName)
+            v = None
+          else:
+            v = oFunc(value)
+
+          if RVAL is None:
+            if bPresent and v is value:
+              i += 1
+              continue
+            # The first difference: copy the (identical) properties before it
+            RVAL = aadict()
+            for sPrev in Names[:i]:
+              RVAL[sPrev] = DATA[sPrev]
+
+          RVAL[sName] = v
+
+        return DATA if RVAL is None else RVAL
+
+      except _ConversionError as e:
+        e.InsertStack(oNode)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+
+  #==============================================================================================
+  def _StructRecord(self, oNode, Props):
+    """
+    Builds Record='Slots' and Record='Tuple' structs.  With Copy=False, a record of the right
+    class is returned as is when all of its values are unchanged.
+    """
+    Make = oNode.RecordClass
+    Names = tuple(sName for sName, eDefault, bNullable, oFunc in Props)
+    Copy = self.Copy
+
+    def Convert(DATA):
+      try:
+        Values = None if not Copy and type(DATA) is Make else []
+        i = 0
+
+        for sName, eDefault, bNullable, oFunc in Props:
+          try:
+            value = DATA[sName]
+          except KeyError:
+            value = eDefault
+
+          if value == None:
+            if not bNullable:
+              raise KeyError("[%s] must be set, Nullable or Defaulted" % sName)
+            v = None
+          else:
+            v = oFunc(value)
+
+          if Values is None:
+            if v is value:
+              i += 1
+              continue
+            # The first difference: copy the (identical) values before it
+            Values = [DATA[sPrev] for sPrev in Names[:i]]
+
+          Values.append(v)
+
+        return DATA if Values is None else Make(*Values)
+
+      except _ConversionError as e:
+        e.InsertStack(oNode)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+###################################################################################################
+class IncrementalResult(object):
+  """
+  The result of Spec.ConvertIncremental.  Value is the converted value; the rest is what a later
+  ConvertIncremental needs in order to reuse parts of it.
+  """
+
+  __slots__ = ('Value', 'Entry', 'Convertor')
+
+  def __init__(self, Entry, Convertor):
+    self.Value = Entry[1]
+    self.Entry = Entry
+    self.Convertor = Convertor
+
+###################################################################################################
+class Incremental_Compiler(NativeToNative_Compiler):
+  """
+  Compiles the convertor used by Spec.ConvertIncremental.  List, Dict and Struct nodes are
+  compiled to functions of (DATA, Old) which return an entry: (Input, Output, Children), where
+  Children holds the entries of the node's List, Dict or Struct children (a list in element
+  order, or a dict by key or property name).  Old is the entry for the same place in the previous result,
+  or None.  If Old's Input is DATA itself, Old is returned as it is, and that whole subtree is
+  neither walked nor converted again.
+
+  Any other node is converted with the same function as NativeToNative_Compiler's.
+  """
+
+  #==============================================================================================
+  def Compile(self):
+    bVector, oFunc = self.Entry(self.Spec.ROOT)
+
+    if bVector:
+      return oFunc
+
+    def Convert(DATA, Old):
+      return (DATA, oFunc(DATA), None)
+    return Convert
+
+  #==============================================================================================
+  def Entry(self, oNode):
+    """
+    Returns (True, the entry function) for nodes with reusable subtrees, and (False, the plain
+    compiled function) for the rest.
+    """
+    if oNode.Type == 'Struct' or oNode.Type == 'Dict' or oNode.Type == 'List' and not oNode.Packed:
+      return True, getattr(self, "_Incremental"+oNode.Type)(oNode)
+
+    if oNode.Type == 'Ref':
+      bVector, oFunc = self.Shared(self.Entry, oNode.Target)
+      return bVector, _Renamed(oFunc, oNode)
+
+    return False, self.Node(oNode)
+
+  #==============================================================================================
+  def _IncrementalList(self, oNode):
+    bVector, oValueFunc = self.Entry(oNode.Value)
+
+    def Convert(DATA, Old):
+      if Old is not None and Old[0] is DATA:
+        return Old
+
+      OldChildren = Old[2] if Old is not None else None
+
+      i = 0
+      try:
+        RVAL = []
+        append = RVAL.append
+
+        if not bVector:
+          for value in DATA:
+            i += 1
+            append(oValueFunc(value))
+
+          return (DATA, RVAL, None)
+
+        # Elements are matched by identity, so inserting or removing elements keeps the rest.  An
+        # element that is new is matched by position instead, so that what it shares with the
+        # element it replaced can still be reused.
+        OldMap = {id(Entry[0]): Entry for Entry in OldChildren} if OldChildren else None
+        nOld = len(OldChildren) if OldChildren else 0
+        Children = []
+
+        for value in DATA:
+          Entry = OldMap.get(id(value)) if OldMap else None
+          if Entry is None and i < nOld:
+            Entry = OldChildren[i]
+          i += 1
+          Entry = oValueFunc(value, Entry)
+          Children.append(Entry)
+          append(Entry[1])
+
+        return (DATA, RVAL, Children)
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, i)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+  #==============================================================================================
+  def _IncrementalDict(self, oNode):
+    oKeyFunc = self.Node(oNode.Key)
+    bVector, oValueFunc = self.Entry(oNode.Value)
+
+    def Convert(DATA, Old):
+      if Old is not None and Old[0] is DATA:
+        return Old
+
+      OldChildren = Old[2] if Old is not None else None
+
+      try:
+        RVAL = dict()
+        Children = {} if bVector else None
+
+        for key in DATA:
+          value = DATA[key]
+          sKey = key
+
+          # New key, value
+          key = oKeyFunc(key)
+
+          if bVector:
+            Entry = Children[sKey] = oValueFunc(value, OldChildren.get(sKey) if OldChildren else None)
+            RVAL[key] = Entry[1]
+          else:
+            RVAL[key] = oValueFunc(value)
+
+        return (DATA, RVAL, Children)
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, key)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+  #==============================================================================================
+  def _IncrementalStruct(self, oNode):
+    Props = tuple(
+      (oPropNode.Name, oPropNode.Default, oPropNode.Nullable) + self.Entry(oPropNode)
+      for oPropNode in oNode.Prop
+      )
+    Make = oNode.RecordClass if oNode.Record != 'aadict' else None
+
+    def Convert(DATA, Old):
+      if Old is not None and Old[0] is DATA:
+        return Old
+
+      OldChildren = Old[2] if Old is not None else None
+
+      try:
+        RVAL = aadict()
+        Children = {}
+
+        for sName, eDefault, bNullable, bVector, oFunc in Props:
+          try:
+            value = DATA[sName]
+          except KeyError:
+            value = eDefault
+
+          if value == None:
+            if not bNullable:
+              raise KeyError("[%s] must be set, Nullable or Defaulted" % sName)
+            else:
+              RVAL[sName] = None
+          elif bVector:
+            Entry = Children[sName] = oFunc(value, OldChildren.get(sName) if OldChildren else None)
+            RVAL[sName] = Entry[1]
+          else:
+            RVAL[sName] = oFunc(value)
+
+        if Make is not None:
+          RVAL = Make(*RVAL.values())
+
+        return (DATA, RVAL, Children)
+
+      except _ConversionError as e:
+        e.InsertStack(oNode)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Convert
+
+###################################################################################################
+def _JSONExpected(s, pos, sWhat):
+  """
+  The error for a missing delimiter at pos (after any whitespace).
+  """
+  return JSONDecodeError("Expecting " + sWhat, s, _JSONSpace(s, pos).end())
+
+###################################################################################################
+class JSONToNative_Compiler(NativeToNative_Compiler):
+  """
+  Compiles the JSON>>Native convertor, which takes JSON text (str, bytes or bytearray) and
+  returns what Native>>Native would return for the decoded JSON, in a single pass: without
+  building the decoded JSON first.  Errors are the same too, with the same stacks.  Object
+  members which are not properties of a Struct are not kept: each is read by the json module's
+  C scanner and dropped at once (which is quicker than skipping it in Python, character by
+  character).
+
+  List, Dict and Struct nodes (other than Packed lists) are compiled to decoders: functions of
+  (s, pos), where pos is the position of a value in the text s, which return (value, position
+  after the value).  Any other node's value is read with the json module's C scanner, and then
+  converted with the same function as NativeToNative_Compiler's.
+  """
+
+  #==============================================================================================
+  def Compile(self):
+    oRoot = self.Spec.ROOT
+    oDecode = self.Decoder(oRoot)
+
+    def Convert(TEXT):
+      if not isinstance(TEXT, str):
+        if not isinstance(TEXT, (bytes, bytearray)):
+          raise _ConversionError(oRoot, TEXT, "TypeError: JSON text must be str, bytes or bytearray, not %s" % TEXT.__class__.__name__)
+        try:
+          TEXT = TEXT.decode(detect_encoding(TEXT), 'surrogatepass')
+        except UnicodeDecodeError as e:
+          raise _ConversionError(oRoot, TEXT[e.start:e.start+20], "%s: %s" % (e.__class__.__name__, e))
+
+      value, pos = oDecode(TEXT, _JSONSpace(TEXT, 0).end())
+
+      pos = _JSONSpace(TEXT, pos).end()
+      if pos != len(TEXT):
+        raise _ConversionError(oRoot, TEXT[pos:pos+20], "JSONDecodeError: %s" % JSONDecodeError("Extra data", TEXT, pos).args[0])
+
+      return value
+
+    return _PublicConvertor(Convert)
+
+  #==============================================================================================
+  def Decoder(self, oNode):
+    """
+    Returns the decoder for a List, Dict or Struct node, or None for any other node.
+    """
+    if oNode.Type == 'Struct' or oNode.Type == 'Dict' or oNode.Type == 'List' and not oNode.Packed:
+      self.Path.append(oNode.Name)
+      try:
+        return getattr(self, "_JSON"+oNode.Type)(oNode)
+      finally:
+        self.Path.pop()
+
+    if oNode.Type == 'Ref':
+      oDecode = self.Shared(self.Decoder, oNode.Target)
+      if oDecode is not None:
+        return _Renamed(oDecode, oNode)
+
+    if oNode is self.Spec.ROOT:
+      return self._JSONValue(oNode)
+
+    # Scalars are read in line by the vector containing them
+    return None
+
+  #==============================================================================================
+  def _JSONValue(self, oNode):
+    oFunc = self.Node(oNode)
+
+    def Decode(s, pos):
+      try:
+        value, pos = _JSONScan(s, pos)
+      except StopIteration:
+        raise _ConversionError(oNode, s[pos:pos+20], "JSONDecodeError: %s" % JSONDecodeError("Expecting value", s, pos).args[0])
+
+      return oFunc(value), pos
+    return Decode
+
+  #==============================================================================================
+  def _JSONList(self, oNode):
+    oValueDecode = self.Decoder(oNode.Value)
+    oValueFunc = self.Node(oNode.Value) if oValueDecode is None else None
+
+    def Decode(s, pos):
+      Start = pos
+      i = 0
+      try:
+        if s[pos:pos+1] != '[':
+          raise JSONDecodeError("Expecting array", s, pos)
+
+        RVAL = []
+        append = RVAL.append
+
+        pos = _JSONSpace(s, pos+1).end()
+        if s[pos:pos+1] == ']':
+          return RVAL, pos+1
+
+        while True:
+          i += 1
+          if oValueDecode is None:
+            value, pos = _JSONScan(s, pos)
+            append(oValueFunc(value))
+          else:
+            value, pos = oValueDecode(s, pos)
+            append(value)
+
+          m = _JSONNext(s, pos)
+          if m is None:
+            raise _JSONExpected(s, pos, "',' delimiter")
+          pos = m.end()
+          if m.lastindex == 2:
+            if m.group(2) != ']':
+              raise JSONDecodeError("Expecting ',' delimiter", s, pos-1)
+            return RVAL, pos
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, i)
+        raise
+
+      except StopIteration:
+        e = _ConversionError(oNode.Value, s[pos:pos+20], "JSONDecodeError: %s" % JSONDecodeError("Expecting value", s, pos).args[0])
+        e.InsertStack(oNode, i)
+        raise e
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, s[Start:pos], "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Decode
+
+  #==============================================================================================
+  def _JSONDict(self, oNode):
+    oKeyFunc = self.Node(oNode.Key)
+    oValueDecode = self.Decoder(oNode.Value)
+    oValueFunc = self.Node(oNode.Value) if oValueDecode is None else None
+
+    def Decode(s, pos):
+      Start = pos
+      key = None
+      try:
+        if s[pos:pos+1] != '{':
+          raise JSONDecodeError("Expecting object", s, pos)
+
+        RVAL = dict()
+
+        pos = _JSONSpace(s, pos+1).end()
+        if s[pos:pos+1] == '}':
+          return RVAL, pos+1
+
+        while True:
+          if s[pos:pos+1] != '"':
+            raise JSONDecodeError("Expecting property name enclosed in double quotes", s, pos)
+          key, pos = scanstring(s, pos+1)
+
+          m = _JSONColon(s, pos)
+          if m is None:
+            raise _JSONExpected(s, pos, "':' delimiter")
+          pos = m.end()
+
+          # New key, value
+          key = oKeyFunc(key)
+          if oValueDecode is None:
+            value, pos = _JSONScan(s, pos)
+            RVAL[key] = oValueFunc(value)
+          else:
+            RVAL[key], pos = oValueDecode(s, pos)
+
+          m = _JSONNext(s, pos)
+          if m is None:
+            raise _JSONExpected(s, pos, "',' delimiter")
+          pos = m.end()
+          if m.lastindex == 2:
+            if m.group(2) != '}':
+              raise JSONDecodeError("Expecting ',' delimiter", s, pos-1)
+            return RVAL, pos
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, key)
+        raise
+
+      except StopIteration:
+        e = _ConversionError(oNode.Value, s[pos:pos+20], "JSONDecodeError: %s" % JSONDecodeError("Expecting value", s, pos).args[0])
+        e.InsertStack(oNode, key)
+        raise e
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, s[Start:pos], "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Decode
+
+  #==============================================================================================
+  def _JSONStruct(self, oNode):
+    # Members are scanned as they come: scalars are kept as read, and vectors are decoded.  The
+    # properties are then converted and filled in Prop order, with the same Default and Nullable
+    # rules as Native>>Native.  A vector's conversion error is held until its turn in Prop order,
+    # so that the error reported is the one Native>>Native would report.
+    Decoders = tuple(self.Decoder(oPropNode) for oPropNode in oNode.Prop)
+    Props = tuple(
+      (oPropNode.Name, oPropNode.Default, oPropNode.Nullable, self.Node(oPropNode), oDecode is not None)
+      for oPropNode, oDecode in zip(oNode.Prop, Decoders)
+      )
+    Members = dict(
+      (oPropNode.Name, (oDecode, oPropNode))
+      for oPropNode, oDecode in zip(oNode.Prop, Decoders)
+      )
+    Make = oNode.RecordClass if oNode.Record != 'aadict' else None
+
+    def Decode(s, pos):
+      Start = pos
+      try:
+        if s[pos:pos+1] != '{':
+          raise JSONDecodeError("Expecting object", s, pos)
+
+        Values = {}
+
+        pos = _JSONSpace(s, pos+1).end()
+        if s[pos:pos+1] == '}':
+          pos += 1
+        else:
+          while True:
+            if s[pos:pos+1] != '"':
+              raise JSONDecodeError("Expecting property name enclosed in double quotes", s, pos)
+            sName, pos = scanstring(s, pos+1)
+
+            m = _JSONColon(s, pos)
+            if m is None:
+              raise _JSONExpected(s, pos, "':' delimiter")
+            pos = m.end()
+
+            try:
+              oDecode, oPropNode = Members[sName]
+            except KeyError:
+              pos = _JSONScan(s, pos)[1]
+            else:
+              if oDecode is None:
+                try:
+                  Values[sName], pos = _JSONScan(s, pos)
+                except StopIteration:
+                  raise _ConversionError(oPropNode, s[pos:pos+20], "JSONDecodeError: %s" % JSONDecodeError("Expecting value", s, pos).args[0])
+              elif s.startswith('null', pos):
+                Values[sName] = None
+                pos += 4
+              else:
+                try:
+                  Values[sName], pos = oDecode(s, pos)
+                except _ConversionError as e:
+                  # Held until its turn; the rest of the value is scanned again to find its end
+                  # (a JSON syntax error in it is reported at once, as by json.loads)
+                  if e.args[0].startswith('JSONDecodeError'):
+                    raise
+                  Values[sName] = e
+                  pos = _JSONScan(s, pos)[1]
+
+            m = _JSONNext(s, pos)
+            if m is None:
+              raise _JSONExpected(s, pos, "',' delimiter")
+            pos = m.end()
+            if m.lastindex == 2:
+              if m.group(2) != '}':
+                raise JSONDecodeError("Expecting ',' delimiter", s, pos-1)
+              break
+
+        RVAL = aadict()
+
+        for sName, eDefault, bNullable, oFunc, bDecoded in Props:
+          try:
+            value = Values[sName]
+          except KeyError:
+            value = eDefault
+            if value != None:
+              value = oFunc(value)
+          else:
+            if bDecoded:
+              if value.__class__ is _ConversionError:
+                raise value
+            elif value is not None:
+              value = oFunc(value)
+
+          if value == None:
+            if not bNullable:
+              raise KeyError("[%s] must be set, Nullable or Defaulted" % sName)
+            else:
+              RVAL[sName] = None
+          else:
+            RVAL[sName] = value
+
+        if Make is not None:
+          RVAL = Make(*RVAL.values())
+
+        return RVAL, pos
+
+      except _ConversionError as e:
+        e.InsertStack(oNode)
+        raise
+
+      except StopIteration:
+        raise _ConversionError(oNode, s[pos:pos+20], "JSONDecodeError: %s" % JSONDecodeError("Expecting value", s, pos).args[0])
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, s[Start:pos], "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Decode
+
+###################################################################################################
+def _JSONDefault(DATA):
+  """
+  How Native>>JSON writes values which the json module cannot: Decimals as strings (exactly),
+  Dates and DateTimes as ISO-8601 strings, Bytes as base64 strings, Packed arrays as arrays,
+  and Slots records as objects.
+  """
+  if isinstance(DATA, DecimalType):
+    return str(DATA)
+  elif isinstance(DATA, (DateType, DateTimeType)):
+    return DATA.isoformat()
+  elif isinstance(DATA, (bytes, bytearray)):
+    return b64encode(DATA).decode()
+  elif isinstance(DATA, ArrayType) or numpy is not None and isinstance(DATA, numpy.ndarray):
+    return DATA.tolist()
+  elif isinstance(DATA, SlotsRecord):
+    return DATA._asdict()
+  raise TypeError("Object of type %s is not JSON serializable" % DATA.__class__.__name__)
+
+_JSONDumps = JSONEncoder(separators=(',', ':'), default=_JSONDefault).encode
+
+#==================================================================================================
+def _JSONFloatText(DATA):
+  # As the json module writes floats
+  if DATA != DATA:
+    return 'NaN'
+  elif DATA == _Infinity:
+    return 'Infinity'
+  elif DATA == -_Infinity:
+    return '-Infinity'
+  return float.__repr__(DATA)
+
+#==================================================================================================
+def _JSONKey(DATA):
+  # As the json module writes object keys
+  if isinstance(DATA, str):
+    return _JSONQuote(DATA)
+  elif DATA is True:
+    return '"true"'
+  elif DATA is False:
+    return '"false"'
+  elif DATA is None:
+    return '"null"'
+  elif isinstance(DATA, int):
+    return '"%s"' % int.__repr__(DATA)
+  elif isinstance(DATA, float):
+    return '"%s"' % _JSONFloatText(DATA)
+  return _JSONQuote(_JSONDefault(DATA))
+
+###################################################################################################
+class _JSONBuffer(list):
+  """
+  The list of text fragments Native>>JSON encoders append to.  List and Dict encoders call
+  Flush once it holds more than Limit fragments.
+  """
+
+  __slots__ = ('Limit', 'Write')
+
+  def __init__(self, Limit=sys.maxsize, Write=None):
+    self.Limit = Limit
+    self.Write = Write
+
+  def Flush(self):
+    self.Write(str.join('', self))
+    del self[:]
+
+###################################################################################################
+class NativeToJSON_Compiler(NativeToNative_Compiler):
+  """
+  Compiles the Native>>JSON convertor, which converts DATA exactly as Native>>Native does, but
+  writes the result as compact JSON text instead of building it.  The text is what
+  json.dumps(Convert(DATA), separators=(',', ':'), default=_JSONDefault) would return, except
+  that every Struct is written as an object, whatever its Record.
+
+  Every node is compiled to an encoder: a function of (DATA, Buffer), which appends DATA's JSON
+  text to Buffer (a _JSONBuffer), and raises _ConversionError exactly as Native>>Native would.
+  Each Struct property's '"Name":' text is built once, here.
+
+  Int, Float and String encoders convert their values themselves, as the NativeToNative_Compiler
+  functions do, rather than calling those functions (unless profiling, which instruments them).
+  """
+
+  #==============================================================================================
+  def Compile(self):
+    oEncode = self.Encoder(self.Spec.ROOT)
+
+    def Convert(DATA):
+      Buffer = _JSONBuffer()
+      oEncode(DATA, Buffer)
+      return str.join('', Buffer)
+
+    return _PublicConvertor(Convert)
+
+  #==============================================================================================
+  def Encoder(self, oNode):
+    """
+    Returns the encoder for any node.
+    """
+    # Other nodes are named in the profiling path by Node()
+    if not (oNode.Type == 'Struct' or oNode.Type == 'Dict' or oNode.Type == 'List' and not oNode.Packed):
+      return getattr(self, "_JSON"+oNode.Type)(oNode)
+
+    self.Path.append(oNode.Name)
+    try:
+      return getattr(self, "_JSON"+oNode.Type)(oNode)
+    finally:
+      self.Path.pop()
+
+  #==============================================================================================
+  def _JSONRef(self, oNode):
+    return _Renamed(self.Shared(self.Encoder, oNode.Target), oNode)
+
+  #==============================================================================================
+  def _JSONObject(self, oNode):
+    def Encode(DATA, Buffer):
+      try:
+        Buffer.append(_JSONDumps(DATA))
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Encode
+
+  #==============================================================================================
+  def _JSONNone(self, oNode):
+    def Encode(DATA, Buffer):
+      Buffer.append('null')
+    return Encode
+
+  #==============================================================================================
+  def _JSONBool(self, oNode):
+    oFunc = self.Node(oNode)
+    def Encode(DATA, Buffer):
+      Buffer.append('true' if oFunc(DATA) else 'false')
+    return Encode
+
+  #==============================================================================================
+  def _JSONInt(self, oNode):
+    if self.Stats is not None:
+      oFunc = self.Node(oNode)
+      def Encode(DATA, Buffer):
+        Buffer.append(int.__repr__(oFunc(DATA)))
+      return Encode
+
+    def Encode(DATA, Buffer):
+      try:
+        Buffer.append(int.__repr__(int(DATA)))
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+    return Encode
+
+  #==============================================================================================
+  def _JSONFloat(self, oNode):
+    if self.Stats is not None:
+      oFunc = self.Node(oNode)
+      def Encode(DATA, Buffer):
+        Buffer.append(_JSONFloatText(oFunc(DATA)))
+      return Encode
+
+    def Encode(DATA, Buffer):
+      try:
+        Buffer.append(_JSONFloatText(float(DATA)))
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+    return Encode
+
+  #==============================================================================================
+  def _JSONDecimal(self, oNode):
+    oFunc = self.Node(oNode)
+    def Encode(DATA, Buffer):
+      Buffer.append('"%s"' % oFunc(DATA))
+    return Encode
+
+  #==============================================================================================
+  def _JSONDate(self, oNode):
+    oFunc = self.Node(oNode)
+    def Encode(DATA, Buffer):
+      Buffer.append('"%s"' % oFunc(DATA).isoformat())
+    return Encode
+
+  # A DateTime is written the same way
+  _JSONDateTime = _JSONDate
+
+  #==============================================================================================
+  def _JSONString(self, oNode):
+    if self.Stats is not None:
+      oFunc = self.Node(oNode)
+      def Encode(DATA, Buffer):
+        Buffer.append(_JSONQuote(oFunc(DATA)))
+      return Encode
+
+    Trim = oNode.Trim
+    MaxLength = oNode.MaxLength
+
+    def Encode(DATA, Buffer):
+      try:
+        DATA = str(DATA)
+      except Exception as e:
+        raise _ConversionError(oNode, DATA, e.args[0])
+
+      if Trim:
+        DATA = DATA.strip()
+
+      if MaxLength and len(DATA) > MaxLength:
+        raise _ConversionError(oNode, DATA, "String length exceeded maximum of %s bytes." % MaxLength)
+
+      Buffer.append(_JSONQuote(DATA))
+    return Encode
+
+  #==============================================================================================
+  def _JSONBytes(self, oNode):
+    oFunc = self.Node(oNode)
+    def Encode(DATA, Buffer):
+      Buffer.append('"%s"' % b64encode(oFunc(DATA)).decode())
+    return Encode
+
+  #==============================================================================================
+  def _JSONList(self, oNode):
+    if oNode.Packed:
+      # Converted in bulk, as an array, then written as one
+      oFunc = self.Node(oNode)
+      def Encode(DATA, Buffer):
+        Buffer.append(_JSONDumps(oFunc(DATA)))
+      return Encode
+
+    oValueEncode = self.Encoder(oNode.Value)
+
+    def Encode(DATA, Buffer):
+      i = 0
+      try:
+        append = Buffer.append
+        append('[')
+
+        for value in DATA:
+          i += 1
+          oValueEncode(value, Buffer)
+          if len(Buffer) > Buffer.Limit:
+            Buffer.Flush()
+          append(',')
+
+        # The last comma, if any, closes the array instead
+        if i:
+          Buffer[-1] = ']'
+        else:
+          append(']')
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, i)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Encode
+
+  #==============================================================================================
+  def _JSONDict(self, oNode):
+    oKeyFunc = self.Node(oNode.Key)
+    oValueEncode = self.Encoder(oNode.Value)
+    KeyText = _JSONQuote if oNode.Key.Type == 'String' else _JSONKey
+
+    # Several keys may convert to the same key, which a dict keeps once (first place, last value).
+    # The keys are converted before anything is written, and in that case the whole dict is
+    # converted by Native>>Native, then written.
+    oConvert = NativeToNative_Compiler._Dict(self, oNode)
+
+    def Encode(DATA, Buffer):
+      # Up to the first key that cannot be converted, which is converted again in turn below
+      Keys = []
+      try:
+        for key in DATA:
+          Keys.append(oKeyFunc(key))
+      except _ConversionError:
+        pass
+      except Exception:
+        # Whatever it is, it is raised again in turn below
+        Keys = []
+
+      if len(set(Keys)) != len(Keys):
+        Converted = oConvert(DATA)
+        Keys = list(Converted)
+        DATA = Converted
+
+      nKeys = len(Keys)
+
+      try:
+        append = Buffer.append
+        append('{')
+        bEmpty = True
+
+        for i, key in enumerate(DATA):
+          value = DATA[key]
+
+          # New key, value
+          key = Keys[i] if i < nKeys else oKeyFunc(key)
+          append(KeyText(key))
+          append(':')
+          oValueEncode(value, Buffer)
+          if len(Buffer) > Buffer.Limit:
+            Buffer.Flush()
+          append(',')
+          bEmpty = False
+
+        # The last comma, if any, closes the object instead
+        if bEmpty:
+          append('}')
+        else:
+          Buffer[-1] = '}'
+
+      except _ConversionError as e:
+        e.InsertStack(oNode, key)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Encode
+
+  #==============================================================================================
+  def _JSONStruct(self, oNode):
+    # Each property's name is written with the delimiter before it: '{"Name":', then ',"Name":'
+    Props = tuple(
+      (oPropNode.Name, oPropNode.Default, oPropNode.Nullable, self.Encoder(oPropNode), ('{' if i == 0 else ',') + _JSONQuote(oPropNode.Name) + ':')
+      for i, oPropNode in enumerate(oNode.Prop)
+      )
+    sEnd = '}' if Props else '{}'
+
+    def Encode(DATA, Buffer):
+      try:
+        append = Buffer.append
+
+        for sName, eDefault, bNullable, oEncode, sLabel in Props:
+          try:
+            value = DATA[sName]
+          except KeyError:
+            value = eDefault
+
+          append(sLabel)
+
+          if value == None:
+            if not bNullable:
+              raise KeyError("[%s] must be set, Nullable or Defaulted" % sName)
+            else:
+              append('null')
+          else:
+            oEncode(value, Buffer)
+
+        append(sEnd)
+
+      except _ConversionError as e:
+        e.InsertStack(oNode)
+        raise
+
+      except Exception as e:
+        if Debug: raise
+        raise _ConversionError(oNode, DATA, "%s: %s" % (e.__class__.__name__, e.args[0]))
+    return Encode
+
+###################################################################################################
+def _SpecShape(oNode):
+  """
+  Describes everything about a node which affects its compact encoding (see Spec.Serialize), so
+  that streams can be checked against the Spec reading them.
+  """
+  if oNode.Type == 'Struct':
+    return 'Struct(%s)' % str.join(',', (
+      '%s%s:%s' % (o.Name, '?' if o.Nullable else '', _SpecShape(o)) for o in oNode.Prop))
+  if oNode.Type == 'List':
+    return 'List%s(%s)' % ('[%s]' % _PackedTypes[oNode.Value.Type][0] if oNode.Packed else '', _SpecShape(oNode.Value))
+  if oNode.Type == 'Dict':
+    return 'Dict(%s,%s)' % (_SpecShape(oNode.Key), _SpecShape(oNode.Value))
+  if oNode.Type == 'Ref':
+    return _SpecShape(oNode.Target)
+  return oNode.Type
+
+###################################################################################################
+class SpecEncoder_Compiler(object):
+  """
+  Compiles the compact, Spec driven encoder used by Spec.Serialize.  The stream is:
+
+    [[S | 4 byte fingerprint of the Spec | root value | ]]
+
+  Values carry no type tags and Structs no property names; each node writes just its value:
+
+    None                : nothing
+    Bool                : 0x00|0x01
+    Int                 : varint (zigzag)
+    Float               : 8 bytes (IEEE 754, little endian)
+    Decimal, String     : varint-length ascii or utf-8
+    Bytes               : varint-length bytes
+    Date                : varint (proleptic Gregorian ordinal)
+    DateTime            : varint-length ISO-8601 ascii
+    Object              : a tagged version 2 value (see Serialize)
+    List                : varint-count values
+    List Packed         : varint-count, then the raw little endian array items
+    Dict                : varint-count key, value pairs
+    Struct              : presence bitmap, then each present property, in Prop order
+
+  The presence bitmap has one bit per Nullable property (least significant bit of the first
+  byte first), set when its value is not None; it is left out when there are none.
+  """
+
+  Spec = None
+
+  STREAM_START = b'[[S|'
+  STREAM_END = b'|]]'
+
+  #==============================================================================================
+  def __init__(self, eSpec):
+    self.Spec = eSpec
+
+  #==============================================================================================
+  def Fingerprint(self):
+    return sha1(_SpecShape(self.Spec.ROOT).encode()).digest()[:4]
+
+  #==============================================================================================
+  def Compile(self):
+    """
+    Returns a function which encodes DATA, which must already be converted by the Spec.
+    """
+    oFunc = self.Node(self.Spec.ROOT)
+    Start = self.STREAM_START + self.Fingerprint()
+    End = self.STREAM_END
+
+    def Serialize(DATA):
+      Buffer = bytearray(Start)
+      oFunc(DATA, Buffer)
+      Buffer += End
+      return bytes(Buffer)
+
+    return Serialize
+
+  #==============================================================================================
+  def Node(self, oNode):
+    """
+    Returns the function which appends a node's value to a bytearray.
+    """
+    return getattr(self, "_"+oNode.Type)(oNode)
+
+  #==============================================================================================
+  def _Ref(self, oNode):
+    return self.Node(oNode.Target)
+
+  #==============================================================================================
+  def _Object(self, oNode):
+    return _SerializeV2
+
+  def _None(self, oNode):
+    def Encode(DATA, Buffer):
+      pass
+    return Encode
+
+  def _Bool(self, oNode):
+    def Encode(DATA, Buffer):
+      Buffer += b'\x01' if DATA else b'\x00'
+    return Encode
+
+  def _Int(self, oNode):
+    def Encode(DATA, Buffer):
+      Buffer += _PackVarint(DATA << 1 if DATA >= 0 else ((-DATA) << 1) - 1)
+    return Encode
+
+  def _Float(self, oNode):
+    def Encode(DATA, Buffer):
+      Buffer += _PackFloat(DATA)
+    return Encode
+
+  def _Decimal(self, oNode):
+    def Encode(DATA, Buffer):
+      DATA = str(DATA).encode()
+      Buffer += _PackVarint(len(DATA))
+      Buffer += DATA
+    return Encode
+
+  def _Date(self, oNode):
+    def Encode(DATA, Buffer):
+      Buffer += _PackVarint(DATA.toordinal())
+    return Encode
+
+  def _DateTime(self, oNode):
+    def Encode(DATA, Buffer):
+      DATA = DATA.isoformat().encode()
+      Buffer += _PackVarint(len(DATA))
+      Buffer += DATA
+    return Encode
+
+  def _String(self, oNode):
+    def Encode(DATA, Buffer):
+      DATA = DATA.encode()
+      Buffer += _PackVarint(len(DATA))
+      Buffer += DATA
+    return Encode
+
+  def _Bytes(self, oNode):
+    def Encode(DATA, Buffer):
+      Buffer += _PackVarint(len(DATA))
+      Buffer += DATA
+    return Encode
+
+  #==============================================================================================
+  def _List(self, oNode):
+    if oNode.Packed:
+      sCode = _PackedTypes[oNode.Value.Type][0]
+
+      def Encode(DATA, Buffer):
+        if type(DATA) is not ArrayType or DATA.typecode != sCode:
+          DATA = ArrayType(sCode, DATA)
+        if _BigEndian:
+          DATA = ArrayType(sCode, DATA)
+          DATA.byteswap()
+        Buffer += _PackVarint(len(DATA))
+        Buffer += DATA
+      return Encode
+
+    oValueFunc = self.Node(oNode.Value)
+
+    def Encode(DATA, Buffer):
+      Buffer += _PackVarint(len(DATA))
+      for value in DATA:
+        oValueFunc(value, Buffer)
+    return Encode
+
+  #==============================================================================================
+  def _Dict(self, oNode):
+    oKeyFunc = self.Node(oNode.Key)
+    oValueFunc = self.Node(oNode.Value)
+
+    def Encode(DATA, Buffer):
+      Buffer += _PackVarint(len(DATA))
+      for key, value in DATA.items():
+        oKeyFunc(key, Buffer)
+        oValueFunc(value, Buffer)
+    return Encode
+
+  #==============================================================================================
+  def _Struct(self, oNode):
+    Props = tuple((o.Name, o.Nullable, self.Node(o)) for o in oNode.Prop)
+    Nullables = tuple(o.Name for o in oNode.Prop if o.Nullable)
+    nBytes = (len(Nullables) + 7) // 8
+
+    def Encode(DATA, Buffer):
+      if nBytes:
+        Bits = 0
+        Bit = 1
+        for sName in Nullables:
+          if DATA[sName] is not None:
+            Bits |= Bit
+          Bit <<= 1
+        Buffer += Bits.to_bytes(nBytes, 'little')
+
+      for sName, bNullable, oFunc in Props:
+        value = DATA[sName]
+        if value is None and bNullable:
+          continue
+        oFunc(value, Buffer)
+    return Encode
+
+###################################################################################################
+class SpecDecoder_Compiler(object):
+  """
+  Compiles the decoder used by Spec.Unserialize, for streams written by SpecEncoder_Compiler.
+  """
+
+  Spec = None
+
+  #==============================================================================================
+  def __init__(self, eSpec):
+    self.Spec = eSpec
+
+  #==============================================================================================
+  def Compile(self):
+    """
+    Returns a function which decodes a bytes-like STREAM.
+    """
+    oFunc = self.Node(self.Spec.ROOT)
+    Start = SpecEncoder_Compiler.STREAM_START
+    Fingerprint = SpecEncoder_Compiler(self.Spec).Fingerprint()
+    End = SpecEncoder_Compiler.STREAM_END
+
+    def Unserialize(STREAM):
+      View = memoryview(STREAM)
+      if View.format != 'B':
+        View = View.cast('B')
+
+      if View[:len(Start)] != Start:
+        raise ValueError("Unknown stream start token")
+
+      if View[len(Start):len(Start)+4] != Fingerprint:
+        raise ValueError("Stream was not written with this Spec")
+
+      try:
+        RVAL, pos = oFunc(View, len(Start) + 4)
+      except IndexError:
+        raise ValueError("Unexpected end of stream")
+
+      if View[pos:] != End:
+        raise ValueError("Unknown stream end token")
+
+      return RVAL
+
+    return Unserialize
+
+  #==============================================================================================
+  def Node(self, oNode):
+    """
+    Returns the function which reads a node's value from View at pos, returning the value and
+    the position after it.
+    """
+    return getattr(self, "_"+oNode.Type)(oNode)
+
+  #==============================================================================================
+  def _Ref(self, oNode):
+    return self.Node(oNode.Target)
+
+  #==============================================================================================
+  def _Object(self, oNode):
+    def Decode(View, pos):
+      oReader = _UnserializeV2(View, False)
+      oReader.Pos = pos
+      return oReader.Value(), oReader.Pos
+    return Decode
+
+  def _None(self, oNode):
+    def Decode(View, pos):
+      return None, pos
+    return Decode
+
+  def _Bool(self, oNode):
+    def Decode(View, pos):
+      return View[pos] != 0, pos + 1
+    return Decode
+
+  def _Int(self, oNode):
+    def Decode(View, pos):
+      z = View[pos]
+      if z < 0x80:
+        pos += 1
+      else:
+        z, pos = _ReadVarint(View, pos)
+      return (z >> 1) if not z & 1 else -((z + 1) >> 1), pos
+    return Decode
+
+  def _Float(self, oNode):
+    def Decode(View, pos):
+      if pos + 8 > len(View):
+        raise IndexError()
+      return _UnpackFloat(View, pos)[0], pos + 8
+    return Decode
+
+  def _Decimal(self, oNode):
+    def Decode(View, pos):
+      n, pos = _ReadVarint(View, pos)
+      if pos + n > len(View):
+        raise IndexError()
+      return DecimalType(str(View[pos:pos+n], 'ascii')), pos + n
+    return Decode
+
+  def _Date(self, oNode):
+    def Decode(View, pos):
+      n, pos = _ReadVarint(View, pos)
+      return DateType.fromordinal(n), pos
+    return Decode
+
+  def _DateTime(self, oNode):
+    def Decode(View, pos):
+      n, pos = _ReadVarint(View, pos)
+      if pos + n > len(View):
+        raise IndexError()
+      return _DateTimeFromISO(str(View[pos:pos+n], 'ascii')), pos + n
+    return Decode
+
+  def _String(self, oNode):
+    Pool = {} if oNode.Intern else None
+    InternSize = oNode.InternSize
+
+    def Decode(View, pos):
+      n = View[pos]
+      if n < 0x80:
+        pos += 1
+      else:
+        n, pos = _ReadVarint(View, pos)
+      if pos + n > len(View):
+        raise IndexError()
+      if Pool is not None:
+        return _Intern(Pool, InternSize, str(View[pos:pos+n], 'utf-8')), pos + n
+      return str(View[pos:pos+n], 'utf-8'), pos + n
+    return Decode
+
+  def _Bytes(self, oNode):
+    def Decode(View, pos):
+      n, pos = _ReadVarint(View, pos)
+      if pos + n > len(View):
+        raise IndexError()
+      return View[pos:pos+n].tobytes(), pos + n
+    return Decode
+
+  #==============================================================================================
+  def _List(self, oNode):
+    if oNode.Packed:
+      sCode, fBulk, sDType = _PackedTypes[oNode.Value.Type]
+      nSize = ArrayType(sCode).itemsize
+      bNumPy = oNode.Packed == 'NumPy'
+
+      def Decode(View, pos):
+        n, pos = _ReadVarint(View, pos)
+        n *= nSize
+        if pos + n > len(View):
+          raise IndexError()
+        RVAL = ArrayType(sCode)
+        RVAL.frombytes(View[pos:pos+n])
+        if _BigEndian:
+          RVAL.byteswap()
+        if bNumPy:
+          RVAL = numpy.frombuffer(RVAL, dtype=sDType)
+        return RVAL, pos + n
+      return Decode
+
+    oValueFunc = self.Node(oNode.Value)
+
+    def Decode(View, pos):
+      n, pos = _ReadVarint(View, pos)
+      RVAL = []
+      append = RVAL.append
+      for i in range(n):
+        value, pos = oValueFunc(View, pos)
+        append(value)
+      return RVAL, pos
+    return Decode
+
+  #==============================================================================================
+  def _Dict(self, oNode):
+    oKeyFunc = self.Node(oNode.Key)
+    oValueFunc = self.Node(oNode.Value)
+
+    def Decode(View, pos):
+      n, pos = _ReadVarint(View, pos)
+      RVAL = {}
+      for i in range(n):
+        key, pos = oKeyFunc(View, pos)
+        RVAL[key], pos = oValueFunc(View, pos)
+      return RVAL, pos
+    return Decode
+
+  #==============================================================================================
+  def _Struct(self, oNode):
+    Props = tuple((o.Name, o.Nullable, self.Node(o)) for o in oNode.Prop)
+    Names = tuple(o.Name for o in oNode.Prop)
+    nBytes = (sum(1 for o in oNode.Prop if o.Nullable) + 7) // 8
+    Make = oNode.RecordClass if oNode.Record != 'aadict' else None
+
+    def Decode(View, pos):
+      Bits = 0
+      if nBytes:
+        if pos + nBytes > len(View):
+          raise IndexError()
+        Bits = int.from_bytes(View[pos:pos+nBytes], 'little')
+        pos += nBytes
+
+      Values = []
+      append = Values.append
+      Bit = 1
+
+      for sName, bNullable, oFunc in Props:
+        if bNullable:
+          bPresent = Bits & Bit
+          Bit <<= 1
+          if not bPresent:
+            append(None)
+            continue
+
+        value, pos = oFunc(View, pos)
+        append(value)
+
+      if Make is not None:
+        return Make(*Values), pos
+
+      return aadict(zip(Names, Values)), pos
+    return Decode
+
+###################################################################################################
+class Serialize(object):
+  """
+  Stream Format a simple token stream.
+
+  Stream:
+    start-token | (scalar or vectors ...) | end-token
+
+  Scalar:
+    name | type | value
+
+  Scalar (None):
+    name | type
 
   List:
     name | type | [ | [type | value [| ...]] | ]
@@ -775,6 +3889,23 @@ class Serialize(object):
   T : Tuple
   M : Dict/Map
 
+  Version 2 (Serialize(DATA, Version=2)) is a binary stream, returned as bytes.  It uses the
+  same type tags, each one byte, framed by the same start and end tokens:
+
+    [[2 | (tag value ...) | ]]
+
+    N                           : None
+    B 0x00|0x01                 : Bool
+    I varint                    : Int (zigzag encoded, any size)
+    F 8 bytes                   : Float (IEEE 754, little endian)
+    D varint-length ascii       : Decimal
+    S varint-length utf-8       : String
+    Y varint-length bytes       : Bytes
+    L|T varint-count values     : List/Tuple
+    M varint-count key, value   : Dict/Map
+
+  Both versions are written and read by loops over an explicit stack of open containers, so
+  there is no limit on nesting depth other than memory.
   """
 
   VERSION = 1
@@ -782,244 +3913,911 @@ class Serialize(object):
   STREAM_START = '[[%i' % VERSION
   STREAM_END = ']]'
 
+  STREAM_START_V2 = b'[[2|'
+  STREAM_END_V2 = b'|]]'
 
-  def __new__(cls, DATA):
-    self = object.__new__(cls)
-    TokenList = []
-    self.add = TokenList.append
 
-    self.add(self.STREAM_START)
-    self.Value(DATA)
-    self.add(self.STREAM_END)
+  def __new__(cls, DATA, Version=VERSION):
+    if Version == 2:
+      Buffer = bytearray(cls.STREAM_START_V2)
+      _SerializeV2(DATA, Buffer)
+      Buffer += cls.STREAM_END_V2
+      return bytes(Buffer)
+
+    elif Version != 1:
+      raise ValueError("Invalid value for Version: %s" % str(Version))
+
+    TokenList = [cls.STREAM_START]
+    _SerializeV1(DATA, TokenList)
+    TokenList.append(cls.STREAM_END)
 
     return str.join("|", TokenList)
 
-  def Value(self, DATA):
-    try:
-      self.Map[type(DATA)](self, DATA)
-    except KeyError:
-      raise TypeError("No type conversion defined for Type %s (value=%s)" % (type(DATA), str(DATA)))
+  @classmethod
+  def Dump(cls, DATA, FILE, ChunkTokens=8192, Version=VERSION, ChunkBytes=65536):
+    """
+    Writes the stream for DATA to a file-like object while the tree is walked, rather than
+    building it as one string.  At most ChunkTokens tokens are buffered between writes.  Binary
+    files (io.RawIOBase, io.BufferedIOBase, eg. socket.makefile('wb')) are written UTF-8 bytes.
+
+    Version 2 streams require a binary file, and are written ChunkBytes at a time.
+    """
+    if Version == 2:
+      Buffer = bytearray(cls.STREAM_START_V2)
 
-  # For all of the following functions, assume that the name has already been appended
+      def Flush():
+        FILE.write(bytes(Buffer))
+        del Buffer[:]
 
-  def _NoneType(self, DATA):
-    self.add('N')
+      _SerializeV2(DATA, Buffer, Flush, ChunkBytes)
+      Buffer += cls.STREAM_END_V2
+      FILE.write(bytes(Buffer))
+      return
 
-  def _BooleanType(self, DATA):
-    self.add('B')
-    self.add('1' if DATA else '0')
+    elif Version != 1:
+      raise ValueError("Invalid value for Version: %s" % str(Version))
 
-  def _IntType(self, DATA):
-    self.add('I')
-    self.add(str(DATA))
+    if isinstance(FILE, (RawIOBase, BufferedIOBase)):
+      write = lambda sText: FILE.write(sText.encode())
+    else:
+      write = FILE.write
+
+    TokenList = [cls.STREAM_START]
+
+    def Flush():
+      TokenList.append('')
+      write(str.join("|", TokenList))
+      del TokenList[:]
+
+    _SerializeV1(DATA, TokenList, Flush, ChunkTokens)
+    TokenList.append(cls.STREAM_END)
+
+    # The end token is always buffered, so this final write never needs a trailing separator
+    write(str.join("|", TokenList))
+
+
+###################################################################################################
+# Marks the end of a container's iterator
+_End = object()
+
+def _DictItems(DATA):
+  """
+  Returns an iterator over the keys and values of a dict, alternately, having checked the type
+  of every key.
+  """
+  for k in DATA:
+    if not isinstance(k, (StringType, IntType)):
+      raise TypeError("Dictionary keys must be String or Int, not: %s" % type(k))
+
+  return _Flatten(DATA.items())
+
+_Flatten = chain.from_iterable
+
+###################################################################################################
+def _SerializeV1(DATA, TokenList, Flush=None, Chunk=0):
+  """
+  Appends the version 1 tokens for DATA to TokenList.  Open containers are kept on an explicit
+  stack of iterators rather than by recursion, so any depth of nesting can be written.
 
-  def _FloatType(self, DATA):
-    self.add('F')
-    self.add(str(DATA))
+  If Flush is given, it is called whenever Chunk or more tokens are buffered.
+  """
+  add = TokenList.append
+  Stack = []
+
+  while True:
+    t = type(DATA)
+
+    if t is StringType:
+      add('S')
+      add(b64encode(DATA.encode()).decode())
+    elif t is IntType:
+      add('I')
+      add(str(DATA))
+    elif t is FloatType:
+      add('F')
+      add(str(DATA))
+    elif t is DictType:
+      add('M')
+      add('{')
+      Stack.append((_DictItems(DATA), '}'))
+    elif t is ListType:
+      add('L')
+      add('[')
+      Stack.append((iter(DATA), ']'))
+    elif t is TupleType:
+      add('T')
+      add('(')
+      Stack.append((iter(DATA), ')'))
+    elif t is NoneType:
+      add('N')
+    elif t is BooleanType:
+      add('B')
+      add('1' if DATA else '0')
+    elif t is DecimalType:
+      add('D')
+      add(str(DATA))
+    elif t is BytesType:
+      add('Y')
+      add(b64encode(DATA).decode())
+    else:
+      raise TypeError("No type conversion defined for Type %s (value=%s)" % (t, str(DATA)))
+
+    if Flush is not None and len(TokenList) >= Chunk:
+      Flush()
+
+    # On to the next value, closing every container which has run out
+    while Stack:
+      DATA = next(Stack[-1][0], _End)
+      if DATA is not _End:
+        break
+      add(Stack.pop()[1])
+    else:
+      return
+
+###################################################################################################
+def _PackVarint(n):
+  """
+  Returns the LEB128 encoding of a non-negative int of any size.
+  """
+  if n < 0x80:
+    return _VARINT1[n]
+  if n < 0x4000:
+    return bytes(((n & 0x7F) | 0x80, n >> 7))
+  if n < 0x200000:
+    return bytes(((n & 0x7F) | 0x80, ((n >> 7) & 0x7F) | 0x80, n >> 14))
+
+  RVAL = bytearray()
+  while n >= 0x80:
+    RVAL.append((n & 0x7F) | 0x80)
+    n >>= 7
+  RVAL.append(n)
+
+  return bytes(RVAL)
 
-  def _DecimalType(self, DATA):
-    self.add('D')
-    self.add(str(DATA))
+# Single byte varints, prebuilt
+_VARINT1 = tuple(bytes((n,)) for n in range(0x80))
 
-  def _StringType(self, DATA):
-    self.add('S')
-    self.add(DATA.encode())
+###################################################################################################
+def _SerializeV2(DATA, Buffer, Flush=None, Chunk=0):
+  """
+  Appends the version 2 (binary) encoding of DATA to a bytearray, walking containers with an
+  explicit stack as _SerializeV1 does.  See Serialize for the format.
+
+  If Flush is given, it is called whenever Chunk or more bytes are buffered.
+  """
+  Stack = []
+
+  while True:
+    t = type(DATA)
+
+    if t is StringType:
+      DATA = DATA.encode()
+      Buffer += b'S' + _PackVarint(len(DATA))
+      Buffer += DATA
+    elif t is IntType:
+      # Zigzag, so that small negative numbers are short too
+      Buffer += b'I' + _PackVarint(DATA << 1 if DATA >= 0 else ((-DATA) << 1) - 1)
+    elif t is FloatType:
+      Buffer += b'F' + _PackFloat(DATA)
+    elif t is DictType:
+      Buffer += b'M' + _PackVarint(len(DATA))
+      Stack.append(_DictItems(DATA))
+    elif t is ListType:
+      Buffer += b'L' + _PackVarint(len(DATA))
+      Stack.append(iter(DATA))
+    elif t is TupleType:
+      Buffer += b'T' + _PackVarint(len(DATA))
+      Stack.append(iter(DATA))
+    elif t is NoneType:
+      Buffer += b'N'
+    elif t is BooleanType:
+      Buffer += b'B\x01' if DATA else b'B\x00'
+    elif t is DecimalType:
+      DATA = str(DATA).encode()
+      Buffer += b'D' + _PackVarint(len(DATA))
+      Buffer += DATA
+    elif t is BytesType:
+      Buffer += b'Y' + _PackVarint(len(DATA))
+      Buffer += DATA
+    else:
+      raise TypeError("No type conversion defined for Type %s (value=%s)" % (t, str(DATA)))
 
-  def _BytesType(self, DATA):
-    self.add('S')
-    self.add(b64encode(DATA))
+    if Flush is not None and len(Buffer) >= Chunk:
+      Flush()
 
-  def _ListType(self, DATA):
-    self.add('L')
-    self.add('[')
+    # On to the next value, dropping every container which has run out
+    while Stack:
+      DATA = next(Stack[-1], _End)
+      if DATA is not _End:
+        break
+      Stack.pop()
+    else:
+      return
 
-    for v in DATA:
-      self.Value(v)
+###################################################################################################
+def _ReadChunks(FILE, ChunkSize):
+  """
+  Yields successive reads of ChunkSize from a file-like object, until it is exhausted.
+  """
+  read = FILE.read
 
-    self.add(']')
+  while True:
+    chunk = read(ChunkSize)
+    if not chunk:
+      return
+    yield chunk
 
-  def _TupleType(self, DATA):
-    self.add('T')
-    self.add('(')
+###################################################################################################
+def _IterTokens(CHUNKS):
+  """
+  Yields the '|' separated tokens of a stream delivered as an iterable of str or bytes chunks.
+  Only the current chunk and the pieces of one partial token are held at any time.
+  """
+  decode = None
+  TailList = []
 
-    for v in DATA:
-      self.Value(v)
+  for chunk in CHUNKS:
+    if not isinstance(chunk, str):
+      if decode is None:
+        decode = getincrementaldecoder('utf-8')().decode
+      chunk = decode(chunk)
 
-    self.add(')')
+    if '|' not in chunk:
+      TailList.append(chunk)
+      continue
 
-  def _DictType(self, DATA):
-    self.add('M')
-    self.add('{')
-    for k in DATA:
-      if not isinstance(k, (StringType, IntType)):
-        raise TypeError("Dictionary keys must be String or Int, not: %s" % type(k))
+    TokenList = chunk.split('|')
 
-      self.Value(k)
-      self.Value(DATA[k])
+    if TailList:
+      TailList.append(TokenList[0])
+      TokenList[0] = str.join('', TailList)
 
-    self.add('}')
+    TailList = [TokenList.pop()]
 
-  Map = {
-    NoneType  : _NoneType,
-    BooleanType : _BooleanType,
-    IntType   : _IntType,
-    FloatType : _FloatType,
-    DecimalType : _DecimalType,
-    StringType  : _StringType,
-    BytesType : _BytesType,
-    TupleType : _TupleType,
-    ListType  : _ListType,
-    DictType  : _DictType,
-    }
+    yield from TokenList
 
+  yield str.join('', TailList)
 
 ###################################################################################################
 class Unserialize(object):
+  """
+  Reads the stream format written by Serialize.  Unserialize(STREAM) decodes a complete string;
+  Load() and IterLoad() decode incrementally, so that only a small buffer of the stream is held in
+  memory at any time.
+  """
 
   VERSION = 1
 
-  STREAM_START = "[[%{0}".format(VERSION)
+  STREAM_START = "[[{0}".format(VERSION)
   STREAM_END = ']]'
 
+  STREAM_START_V2 = Serialize.STREAM_START_V2
+  STREAM_END_V2 = Serialize.STREAM_END_V2
+
+
+  def __new__(cls, STREAM, ZeroCopy=False):
+    """
+    STREAM may be a str, or any bytes-like object holding a version 1 or version 2 stream.
+
+    Version 2 streams are decoded directly from a memoryview of STREAM.  If ZeroCopy is True,
+    Bytes values are returned as read-only memoryview slices of STREAM rather than copies.
+    """
+    if not isinstance(STREAM, str):
+      View = memoryview(STREAM)
+
+      if View[:len(cls.STREAM_START_V2)] == cls.STREAM_START_V2:
+        return _UnserializeV2(View, ZeroCopy).Read()
+
+      STREAM = str(View, 'utf-8')
 
-  def __new__(cls, STREAM):
     self = object.__new__(cls)
-    TokenList = STREAM.split('|')
+    self.next = iter(STREAM.split('|')).__next__
+    return self.Read()
 
-    if TokenList.pop().rstrip() != self.STREAM_END:
-      raise ValueError("Unknown stream end token")
+  @classmethod
+  def Load(cls, FILE, ChunkSize=65536, ZeroCopy=False):
+    """
+    Decodes a stream read from a file-like object (text or binary), ChunkSize at a time.
+    """
+    return cls.IterLoad(_ReadChunks(FILE, ChunkSize), ZeroCopy)
+
+  @classmethod
+  def IterLoad(cls, CHUNKS, ZeroCopy=False):
+    """
+    Decodes a stream delivered as an iterable of str or bytes chunks, as they arrive.  Chunk
+    boundaries may fall anywhere, including inside a token or a UTF-8 sequence.
 
-    self.next = iter(TokenList).__next__
+    Version 2 streams are length-prefixed rather than tokenized, so their chunks are gathered
+    into one buffer before decoding.
+    """
+    CHUNKS = iter(CHUNKS)
 
-    if self.next().lstrip() != self.STREAM_START:
-      raise ValueError("Unknown stream start token")
+    # Read just enough to tell a version 2 stream from a version 1 stream
+    HeadList = []
+    for chunk in CHUNKS:
+      HeadList.append(chunk)
+      if isinstance(chunk, str) or sum(map(len, HeadList)) >= len(cls.STREAM_START_V2):
+        break
 
-    # Call the Value Function with the first datatype encountered
-    return self.Value(next(self))
+    if HeadList and not isinstance(HeadList[0], str):
+      Head = bytes().join(HeadList)
+      if Head.startswith(cls.STREAM_START_V2):
+        # Grown in place, so that the stream is never held twice
+        Buffer = bytearray(Head)
+        for chunk in CHUNKS:
+          Buffer += chunk
+        return cls(Buffer, ZeroCopy)
+      HeadList = [Head]
 
+    self = object.__new__(cls)
+    self.next = _IterTokens(chain(HeadList, CHUNKS)).__next__
+    return self.Read()
 
-  def Value(self, DATATYPE):
+  def Read(self):
     try:
-      return self.Map[DATATYPE](self)
-    except KeyError:
-      raise TypeError("No type conversion defined for Type %s (value=%s)" % (type(DATA), str(DATA)))
+      if self.next().lstrip() != self.STREAM_START:
+        raise ValueError("Unknown stream start token")
 
-  # For all of the following functions, they need to read thier value; their type has already been read
+      RVAL = _UnserializeV1(self.next)
 
-  def _NoneType(self):
-    return None
+      if self.next().rstrip() != self.STREAM_END:
+        raise ValueError("Unknown stream end token")
+
+    except StopIteration:
+      raise ValueError("Unexpected end of stream")
+
+    try:
+      self.next()
+    except StopIteration:
+      return RVAL
 
-  def _BooleanType(self):
-    return False if next(self) == '0' else True
+    raise ValueError("Unexpected data after stream end token")
 
-  def _IntType(self):
-    return IntType(next(self))
 
-  def _FloatType(self):
-    return FloatType(next(self))
+###################################################################################################
+# Marks a dict which is waiting for its next key
+_NoKey = object()
 
-  def _DecimalType(self):
-    return DecimalType(next(self))
+def _UnserializeV1(next):
+  """
+  Reads one value from a function returning successive version 1 tokens.  Open containers are
+  kept on an explicit stack rather than by recursion, so any depth of nesting can be read.
+  """
+  Stack = []
 
-  def _StringType(self):
-    return self.next().decode()
+  # The innermost open container: [Container, EndToken, Key]
+  Top = None
 
-  def _BytesType(self):
-    return b64decode(self.next())
+  while True:
+    t = next()
 
-  def _ListType(self):
-    if next(self) != '[':
-      raise ValueError("Invalid list start token.")
+    if Top is not None and t == Top[1] and Top[2] is _NoKey:
+      Stack.pop()
+      value = TupleType(Top[0]) if t == ')' else Top[0]
+      Top = Stack[-1] if Stack else None
 
-    RVAL = []
+    else:
+      if Top is not None and Top[1] == '}' and Top[2] is _NoKey and t not in ('I', 'S'):
+        raise ValueError("Dictionary keys must be String or Int, not: %s" % t)
+
+      if t == 'S':
+        value = b64decode(next()).decode()
+      elif t == 'I':
+        value = IntType(next())
+      elif t == 'F':
+        value = FloatType(next())
+      elif t == 'M' or t == 'A':
+        if next() != '{':
+          raise ValueError("Invalid dict start token.")
+        Top = [{} if t == 'M' else OrderedDict(), '}', _NoKey]
+        Stack.append(Top)
+        continue
+      elif t == 'L':
+        if next() != '[':
+          raise ValueError("Invalid list start token.")
+        Top = [[], ']', _NoKey]
+        Stack.append(Top)
+        continue
+      elif t == 'T':
+        if next() != '(':
+          raise ValueError("Invalid tuple start token.")
+        Top = [[], ')', _NoKey]
+        Stack.append(Top)
+        continue
+      elif t == 'N':
+        value = None
+      elif t == 'B':
+        value = False if next() == '0' else True
+      elif t == 'D':
+        value = DecimalType(next())
+      elif t == 'Y':
+        value = b64decode(next())
+      else:
+        raise TypeError("No type conversion defined for Type token '%s'" % t)
 
-    while True:
-      t = next(self)
-      if t == ']':
-        break
+    if Top is None:
+      return value
 
-      RVAL.append(self.Value(t))
+    if Top[1] != '}':
+      Top[0].append(value)
+    elif Top[2] is _NoKey:
+      Top[2] = value
+    else:
+      Top[0][Top[2]] = value
+      Top[2] = _NoKey
 
-    return RVAL
+###################################################################################################
+class _UnserializeV2(object):
+  """
+  The reader of version 2 (binary) streams.  See Serialize for the format.
+  """
 
+  STREAM_START_V2 = Serialize.STREAM_START_V2
+  STREAM_END_V2 = Serialize.STREAM_END_V2
 
-  def _TupleType(self):
-    if next(self) != '(':
-      raise ValueError("Invalid tuple start token.")
+  def __init__(self, View, ZeroCopy):
+    self.View = View.cast('B') if View.format != 'B' else View
+    self.Pos = 0
+    self.ZeroCopy = ZeroCopy
 
-    RVAL = []
+  def Read(self):
+    View = self.View
+    self.Pos = len(self.STREAM_START_V2)
 
-    while True:
-      t = next(self)
-      if t == ')':
-        break
+    try:
+      RVAL = self.Value()
+    except IndexError:
+      raise ValueError("Unexpected end of stream")
 
-      RVAL.append(self.Value(t))
+    if View[self.Pos:] != self.STREAM_END_V2:
+      raise ValueError("Unknown stream end token")
 
-    return TupleType(RVAL)
+    return RVAL
 
-  def _DictType(self):
-    if next(self) != '{':
-      raise ValueError("Invalid dict start token.")
+  def Value(self):
+    """
+    Reads the value at self.Pos, and moves self.Pos past it.  Open containers are kept on an
+    explicit stack rather than by recursion, so any depth of nesting can be read.
+    """
+    View = self.View
+    End = len(View)
+    pos = self.Pos
+    Stack = []
 
-    RVAL = {}
+    # The innermost open container: [Container, Remaining, Tag, Key]
+    Top = None
 
     while True:
-      kt = next(self)
-      if kt == '}':
-        break
+      tag = View[pos]
 
-      if kt not in ('I', 'S'):
-        raise ValueError("Dictionary keys must be String or Int, not: %s" % kt)
+      if Top is not None and Top[2] == 0x4D and Top[3] is _NoKey and tag not in (0x49, 0x53):
+        raise ValueError("Dictionary keys must be String or Int, not: %s" % chr(tag))
 
-      # The key should be string or int
-      key = self.Value(kt)
+      pos += 1
+
+      if tag == 0x53:
+        # S
+        n = View[pos]
+        if n < 0x80:
+          pos += 1
+        else:
+          n, pos = _ReadVarint(View, pos)
+        if pos + n > End:
+          raise IndexError()
+        value = str(View[pos:pos+n], 'utf-8')
+        pos += n
+
+      elif tag == 0x49:
+        # I
+        z = View[pos]
+        if z < 0x80:
+          pos += 1
+        else:
+          z, pos = _ReadVarint(View, pos)
+        value = (z >> 1) if not z & 1 else -((z + 1) >> 1)
+
+      elif tag == 0x46:
+        # F
+        if pos + 8 > End:
+          raise IndexError()
+        value = _UnpackFloat(View, pos)[0]
+        pos += 8
+
+      elif tag == 0x4C or tag == 0x54 or tag == 0x4D:
+        # L, T, M
+        n, pos = _ReadVarint(View, pos)
+        if n:
+          Top = [{}, n * 2, tag, _NoKey] if tag == 0x4D else [[], n, tag, _NoKey]
+          Stack.append(Top)
+          continue
+        value = {} if tag == 0x4D else [] if tag == 0x4C else ()
+
+      elif tag == 0x4E:
+        # N
+        value = None
+
+      elif tag == 0x42:
+        # B
+        value = View[pos] != 0
+        pos += 1
+
+      elif tag == 0x44 or tag == 0x59:
+        # D, Y
+        n, pos = _ReadVarint(View, pos)
+        if pos + n > End:
+          raise IndexError()
+        if tag == 0x44:
+          value = DecimalType(str(View[pos:pos+n], 'ascii'))
+        elif self.ZeroCopy:
+          value = View[pos:pos+n].toreadonly()
+        else:
+          value = View[pos:pos+n].tobytes()
+        pos += n
 
-      # Get the value type -> pass it to Value() -> Assign to dict
-      RVAL[key] = self.Value(next(self))
+      else:
+        raise TypeError("No type conversion defined for Type token '%s'" % chr(tag))
+
+      # Place the value in its container, closing each container which is now full
+      while Top is not None:
+        if Top[2] != 0x4D:
+          Top[0].append(value)
+        elif Top[3] is _NoKey:
+          Top[3] = value
+        else:
+          Top[0][Top[3]] = value
+          Top[3] = _NoKey
 
-    return RVAL
+        Top[1] -= 1
+        if Top[1]:
+          break
 
-  def _ArrayType(self):
-    if next(self) != '{':
-      raise ValueError("Invalid dict start token.")
+        Stack.pop()
+        value = TupleType(Top[0]) if Top[2] == 0x54 else Top[0]
+        Top = Stack[-1] if Stack else None
 
-    RVAL = OrderedDict()
+      else:
+        self.Pos = pos
+        return value
 
-    while True:
-      kt = next(self)
-      if kt == '}':
-        break
+###################################################################################################
+def _ReadVarint(View, pos):
+  """
+  Reads the LEB128 varint at View[pos], returning it and the position after it.
+  """
+  b = View[pos]
+  pos += 1
+  RVAL = b & 0x7F
+  shift = 7
 
-      if kt not in ('I', 'S'):
-        raise ValueError("Dictionary keys must be String or Int, not: %s" % kt)
+  while b & 0x80:
+    b = View[pos]
+    pos += 1
+    RVAL |= (b & 0x7F) << shift
+    shift += 7
 
-      # The key should be string or int
-      key = self.Value(kt)
+  return RVAL, pos
 
-      # Get the value type -> pass it to Value() -> Assign to dict
-      RVAL[key] = self.Value(next(self))
+###################################################################################################
+def _SkipV2(View, pos):
+  """
+  Returns the position after the version 2 value at View[pos], without decoding it.
+  """
+  Remaining = 1
+
+  while Remaining:
+    Remaining -= 1
+    tag = View[pos]
+    pos += 1
+
+    if tag == 0x49:
+      n, pos = _ReadVarint(View, pos)
+    elif tag == 0x53 or tag == 0x44 or tag == 0x59:
+      n, pos = _ReadVarint(View, pos)
+      pos += n
+    elif tag == 0x46:
+      pos += 8
+    elif tag == 0x42:
+      pos += 1
+    elif tag == 0x4C or tag == 0x54:
+      n, pos = _ReadVarint(View, pos)
+      Remaining += n
+    elif tag == 0x4D:
+      n, pos = _ReadVarint(View, pos)
+      Remaining += n * 2
+    elif tag != 0x4E:
+      raise TypeError("No type conversion defined for Type token '%s'" % chr(tag))
+
+  return pos
 
-    return RVAL
+###################################################################################################
+# The bracket tokens of a version 1 stream.  No other token can contain these characters, so a
+# container can be skipped by counting brackets alone.
+_BRACKETS_V1 = re.compile(br'\|([\[\](){}])(?=\|)')
+
+def _SkipV1(Buffer, pos):
+  """
+  Returns the position of the token after the version 1 value starting at Buffer[pos].
+  """
+  end = Buffer.find(b'|', pos)
+  if end < 0:
+    raise IndexError()
+
+  t = Buffer[pos:end]
+
+  if t == b'N':
+    return end + 1
+
+  if t not in (b'L', b'T', b'M', b'A'):
+    end = Buffer.find(b'|', end + 1)
+    if end < 0:
+      raise IndexError()
+    return end + 1
+
+  Depth = 0
+
+  for oMatch in _BRACKETS_V1.finditer(Buffer, end):
+    Depth += 1 if oMatch.group(1) in (b'[', b'(', b'{') else -1
+    if Depth == 0:
+      return oMatch.end() + 1
+
+  raise IndexError()
+
+###################################################################################################
+INDEX_SUFFIX = '.index'
+
+# Bump this whenever the pickled shape of an index changes
+INDEX_VERSION = 1
+
+class StreamFile(object):
+  """
+  Random access to the top level List (or Tuple) or Dict of a large file written by Serialize,
+  of either version.  The file is memory mapped, and only an index of where each top level
+  element starts is built, so reading element i, or the value for key k, decodes just that
+  element.
+
+  The index is built with one pass over the file which skips over, rather than decodes, each
+  element.  If Index is True it is saved to sPath + INDEX_SUFFIX and reused for as long as the
+  file is unchanged.  As with ParseFile's cache, an index file is unpickled, so it must be no
+  more writable than the stream itself.
+
+  StreamFile behaves like a read-only list or dict; close() it, or use it in a with block, when
+  done.  With ZeroCopy=True, Bytes values of version 2 streams are memoryviews of the mapping,
+  which must be released before closing.
+  """
+
+  # 'List' or 'Dict'
+  Kind = None
+
+  # Stream version, 1 or 2
+  Version = None
+
+  #==============================================================================================
+  def __init__(self, sPath, Index=True, ZeroCopy=False):
+    import mmap
+
+    self.ZeroCopy = ZeroCopy
+
+    with open(sPath, 'rb') as FILE:
+      self.Map = mmap.mmap(FILE.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+      self.View = memoryview(self.Map)
+
+      if self.Map[:len(Serialize.STREAM_START_V2)] == Serialize.STREAM_START_V2:
+        self.Version = 2
+      elif self.Map[:len(Serialize.STREAM_START)+1] == (Serialize.STREAM_START + '|').encode():
+        self.Version = 1
+      else:
+        raise ValueError("Unknown stream start token")
+
+      if Index:
+        self.Kind, self.Offsets, self.Keys = self._LoadIndex(sPath)
+      else:
+        self.Kind, self.Offsets, self.Keys = self._BuildIndex()
+
+    except Exception:
+      self.close()
+      raise
+
+    if self.Kind == 'Dict':
+      self.KeyMap = {key: i for i, key in enumerate(self.Keys)}
+
+  #==============================================================================================
+  def _LoadIndex(self, sPath):
+    sIndexPath = sPath + INDEX_SUFFIX
+    oStat = os.stat(sPath)
+    Header = {'Version': INDEX_VERSION, 'MTime': oStat.st_mtime_ns, 'Size': oStat.st_size}
+
+    try:
+      with open(sIndexPath, 'rb') as FILE:
+        if pickle.load(FILE) == Header:
+          Kind, bOffsets, Keys = pickle.load(FILE)
+          Offsets = ArrayType('q')
+          Offsets.frombytes(bOffsets)
+          return Kind, Offsets, Keys
+    except Exception:
+      pass
+
+    Kind, Offsets, Keys = self._BuildIndex()
+
+    # Written like ParseFile's cache: atomically, and skipped if it cannot be written
+    sTempPath = "%s.%i.tmp" % (sIndexPath, os.getpid())
+    try:
+      with open(sTempPath, 'wb') as FILE:
+        pickle.dump(Header, FILE, pickle.HIGHEST_PROTOCOL)
+        pickle.dump((Kind, Offsets.tobytes(), Keys), FILE, pickle.HIGHEST_PROTOCOL)
+      os.replace(sTempPath, sIndexPath)
+    except OSError:
+      try:
+        os.remove(sTempPath)
+      except OSError:
+        pass
+
+    return Kind, Offsets, Keys
+
+  #==============================================================================================
+  def _BuildIndex(self):
+    """
+    Returns the Kind of the top level value, the offsets at which each of its elements start
+    (plus the offset just after the last one) and, for a Dict, its keys in order.
+    """
+    Offsets = ArrayType('q')
+    Keys = []
+
+    try:
+      if self.Version == 2:
+        View = self.View
+        pos = len(Serialize.STREAM_START_V2)
+        tag = View[pos]
+
+        if tag == 0x4C or tag == 0x54:
+          Kind = 'List'
+        elif tag == 0x4D:
+          Kind = 'Dict'
+          oReader = _UnserializeV2(View, False)
+        else:
+          raise ValueError("The top level value must be a List, Tuple or Dict")
+
+        n, pos = _ReadVarint(View, pos + 1)
+
+        for i in range(n):
+          Offsets.append(pos)
+          if Kind == 'Dict':
+            oReader.Pos = pos
+            Keys.append(oReader.Value())
+            pos = oReader.Pos
+          pos = _SkipV2(View, pos)
+
+        Offsets.append(pos)
+
+      else:
+        Map = self.Map
+        find = Map.find
+        pos = len(Serialize.STREAM_START) + 1
+        t = Map[pos:pos+2]
+
+        if t in (b'L|', b'T|'):
+          Kind = 'List'
+        elif t in (b'M|', b'A|'):
+          Kind = 'Dict'
+        else:
+          raise ValueError("The top level value must be a List, Tuple or Dict")
+
+        sEnd = {b'L|': b']', b'T|': b')'}.get(t, b'}')
+
+        # Past the type and open bracket tokens
+        pos += 4
+
+        while True:
+          Offsets.append(pos)
+          end = find(b'|', pos)
+          if end < 0:
+            raise IndexError()
+
+          t = Map[pos:end]
+          if t == sEnd:
+            break
+
+          if Kind == 'Dict':
+            pos = find(b'|', end + 1) + 1
+            if pos == 0:
+              raise IndexError()
+            key = Map[end+1:pos-1]
+            Keys.append(b64decode(key).decode() if t == b'S' else IntType(key))
+
+          pos = _SkipV1(Map, pos)
 
-  Map = {
-    'N' : _NoneType,
-    'B' : _BooleanType,
-    'I' : _IntType,
-    'F' : _FloatType,
-    'D' : _DecimalType,
-    'S' : _StringType,
-    'Y' : _BytesType,
-    'T' : _TupleType,
-    'L' : _ListType,
-    'M' : _DictType,
-    'A' : _ArrayType,
-    }
+    except IndexError:
+      raise ValueError("Unexpected end of stream")
+
+    return Kind, Offsets, Keys
+
+  #==============================================================================================
+  def _Read(self, i):
+    """
+    Decodes the value of element i.
+    """
+    pos = self.Offsets[i]
+
+    if self.Version == 2:
+      oReader = _UnserializeV2(self.View, self.ZeroCopy)
+      oReader.Pos = pos if self.Kind == 'List' else _SkipV2(self.View, pos)
+      return oReader.Value()
+
+    # The element's tokens run up to the separator before the next element's
+    TokenList = str(self.Map[pos:self.Offsets[i+1]-1], 'utf-8').split('|')
+    return _UnserializeV1(iter(TokenList[2:] if self.Kind == 'Dict' else TokenList).__next__)
+
+  #==============================================================================================
+  def __len__(self):
+    return len(self.Offsets) - 1
+
+  def __getitem__(self, key):
+    if self.Kind == 'Dict':
+      return self._Read(self.KeyMap[key])
+
+    if isinstance(key, slice):
+      return [self._Read(i) for i in range(*key.indices(len(self)))]
+
+    n = len(self)
+    if key < 0:
+      key += n
+    if not 0 <= key < n:
+      raise IndexError("StreamFile index out of range")
+
+    return self._Read(key)
+
+  def __iter__(self):
+    if self.Kind == 'Dict':
+      return iter(self.Keys)
+    return map(self._Read, range(len(self)))
+
+  def __contains__(self, key):
+    if self.Kind == 'Dict':
+      return key in self.KeyMap
+    return any(value == key for value in self)
+
+  def get(self, key, Default=None):
+    try:
+      return self[key]
+    except (KeyError, IndexError):
+      return Default
+
+  def keys(self):
+    return list(self.Keys)
+
+  def items(self):
+    return ((key, self._Read(i)) for i, key in enumerate(self.Keys))
+
+  #==============================================================================================
+  def close(self):
+    if getattr(self, 'View', None) is not None:
+      self.View.release()
+      self.View = None
+    self.Map.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
 
 
 ###################################################################################################
 # Decorators
 
+# Applies a convertor to its argument, in C where available
+_Call = getattr(operator, 'call', lambda oFunc, DATA: oFunc(DATA))
+
+def _Convertor(oSpec):
+  # A Spec's Native>>Native convertor, looked up when called so that Profile(), Invalidate() and
+  # renaming take effect in wrapped functions too.  The cache is read without the lock.
+  try:
+    return oSpec._Convertors['Native>>Native', True]
+  except KeyError:
+    return oSpec.GetConvertor()
+
+
 def WrapFunction(XML):
   def Extruct_FunctionDecorator(fun):
     specs = Parse(XML)
@@ -1032,8 +4830,9 @@ def WrapFunction(XML):
     if OUT.Name == 'O':
       OUT.Name = "{0}.{1}.O".format(fun.__module__, fun.__name__)
 
-    wrapper = lambda arg: OUT.Convert(fun(IN.Convert(arg)))
+    wrapper = lambda arg: _Convertor(OUT)(fun(_Convertor(IN)(arg)))
     wrapper.__name__ = "Extruct.WrapFunction around {0}.{1}".format(fun.__module__, fun.__name__)
+    wrapper.Specs = (IN, OUT)
     return wrapper
 
   return Extruct_FunctionDecorator
@@ -1051,8 +4850,9 @@ def WrapMethod(XML):
     if OUT.Name == 'O':
       OUT.Name = "{0}.{1}.O".format(fun.__module__, fun.__name__)
 
-    wrapper = lambda arg: OUT.Convert(fun(IN.Convert(arg)))
+    wrapper = lambda arg: _Convertor(OUT)(fun(_Convertor(IN)(arg)))
     wrapper.__name__ = "Extruct.WrapMethod around {0}.{1}.{1}".format(fun.__module__, fun.__class__, fun.__name__)
+    wrapper.Specs = (IN, OUT)
     return wrapper
 
   return Extruct_MethodDecorator
@@ -1068,10 +4868,50 @@ def Wrap(XML):
     for spec in specs:
       spec.Name = "{0}.{1}.{2}".format(fun.__module__, fun.__name__, spec.Name)
 
-    def wrapper(*args):
-      return specs[-1].Convert(fun(*(spec.Convert(arg) for spec,arg in zip(specs[:-1],args))))
+    # Everything the call path needs is bound by Bind(): a fixed tuple of compiled argument
+    # convertors in parameter order, the same convertors by parameter name, and the return's.
+    # They are bound again whenever any Spec has been invalidated since (by Profile(), renaming
+    # and so on).  The inner (.Node) functions are used, so errors are translated once per call,
+    # not per argument.
+    Names = fun.__code__.co_varnames[:fun.__code__.co_argcount]
+    nArgs = len(specs) - 1
+    Bound = None
+
+    def Bind():
+      nonlocal Bound, InFuncs, ByName, OutFunc
+      Bound = _Invalidations
+      InFuncs = tuple(_Convertor(spec).Node for spec in specs[:-1])
+      ByName = dict(zip(Names, InFuncs))
+      OutFunc = _Convertor(specs[-1])
+
+    InFuncs = ByName = OutFunc = None
+    Bind()
+
+    # Arguments which are not passed are left to the function's own defaults, unconverted.
+    def wrapper(*args, **kwargs):
+      if len(args) > nArgs:
+        raise TypeError("{0}() takes {1} positional arguments but {2} were given".format(fun.__name__, nArgs, len(args)))
+
+      if Bound != _Invalidations:
+        Bind()
+
+      try:
+        if kwargs:
+          for sName in kwargs:
+            if sName in ByName:
+              kwargs[sName] = ByName[sName](kwargs[sName])
+
+        args = tuple(map(_Call, InFuncs, args))
+
+      except _ConversionError as e:
+        if Debug: raise
+        raise ConversionError(e)
+
+      return OutFunc(fun(*args, **kwargs))
     
     wrapper.__name__ = "Extruct.Wrap around {0}.{1}".format(fun.__module__, fun.__name__)
+    # The argument Specs and the return's, for profiling and the like
+    wrapper.Specs = tuple(specs)
     return wrapper
 
   return Extruct_Decorator
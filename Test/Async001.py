@@ -0,0 +1,95 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import asyncio
+from time import perf_counter
+
+###############################################################################
+oList = Extruct.ParseOne('''
+  <List Name="Messages">
+    <Struct Name="Message">
+      <Int Name="Id" />
+      <String Name="Status" />
+      <Float Name="Amount" />
+    </Struct>
+  </List>
+  ''')
+
+oDict = Extruct.ParseOne('''
+  <Dict Name="Totals">
+    <String Name="Key" />
+    <Decimal Name="Value" />
+  </Dict>
+  ''')
+
+def Record(i):
+  return {'Id': str(i), 'Status': ' OK ', 'Amount': i * 1.5}
+
+Batch = [Record(i) for i in range(200000)]
+Totals = {'k%i' % i: i / 4 for i in range(10000)}
+
+###############################################################################
+async def Ticker(Gaps):
+  # Records the longest time the loop was unavailable to other tasks
+  t = perf_counter()
+  while True:
+    await asyncio.sleep(0)
+    now = perf_counter()
+    Gaps.append(now - t)
+    t = now
+
+async def Measure(Label, Coroutine):
+  Gaps = []
+  oTicker = asyncio.ensure_future(Ticker(Gaps))
+  await asyncio.sleep(0)
+  t = perf_counter()
+  await Coroutine
+  tTotal = perf_counter() - t
+  await asyncio.sleep(0)
+  oTicker.cancel()
+  print("  %-30s total %.3fs, longest stall %.1fms" % (Label, tTotal, max(Gaps) * 1000))
+
+async def Main():
+  print("\n=================================================\n")
+
+  print("ConvertAsync == Convert")
+  print("  List:", await oList.ConvertAsync(Batch, YieldEvery=1000) == oList.Convert(Batch))
+  print("  Dict:", await oDict.ConvertAsync(Totals, YieldEvery=100) == oDict.Convert(Totals))
+  print("  Offloaded:", await oList.ConvertAsync(Batch, OffloadSize=1000) == oList.Convert(Batch))
+
+  print("\n=================================================\n")
+
+  Bad = list(Batch)
+  Bad[150000] = dict(Record(1), Id='x')
+  try:
+    oList.Convert(Bad)
+  except Extruct.ConversionError as e:
+    print("Convert       ", e)
+
+  try:
+    await oList.ConvertAsync(Bad)
+  except Extruct.ConversionError as e:
+    print("ConvertAsync  ", e)
+
+  print("\n=================================================\n")
+
+  # Sampled calls record the nodes below the root
+  oDict.Profile(Every=2)
+  for i in range(4):
+    await oDict.ConvertAsync(Totals, YieldEvery=100)
+  print("Profiled:", sorted((sPath, o.Calls) for sPath, o in oDict.Stats().items()))
+  oDict.Profile(0)
+
+  print("\n=================================================\n")
+
+  print("Event loop stalls while converting %i records" % len(Batch))
+
+  async def Blocking():
+    oList.Convert(Batch)
+
+  await Measure("Convert", Blocking())
+  await Measure("ConvertAsync(YieldEvery=1000)", oList.ConvertAsync(Batch, YieldEvery=1000))
+  await Measure("ConvertAsync(OffloadSize=1000)", oList.ConvertAsync(Batch, OffloadSize=1000))
+
+  print("\n=================================================\n")
+
+asyncio.run(Main())
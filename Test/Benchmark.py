@@ -0,0 +1,260 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+#
+# Repeatable benchmark suite for Extruct.
+#
+#   python Benchmark.py                         Run everything, print a table
+#   python Benchmark.py --json out.json         Also write machine-readable results
+#   python Benchmark.py --compare old.json      Run, and compare against a previous run
+#   python Benchmark.py --quick --filter Convert
+#
+# Every benchmark reports the best (minimum) time per operation over several repeats, which is
+# the most stable figure to compare between commits on the same machine.
+#
+import Extruct
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from decimal import Decimal
+
+###############################################################################
+# Synthetic Specs and payloads
+
+def WideXML(Width):
+  return '<Struct Name="Wide">%s</Struct>' % str.join('', (
+    '<Int Name="I%i" />' % i if i % 3 == 0 else
+    '<String Name="S%i" />' % i if i % 3 == 1 else
+    '<Float Name="F%i" />' % i
+    for i in range(Width)))
+
+def WideData(Width):
+  return {
+    ('I%i' if i % 3 == 0 else 'S%i' if i % 3 == 1 else 'F%i') % i: (str(i) if i % 3 == 0 else ' v%i ' % i if i % 3 == 1 else i)
+    for i in range(Width)}
+
+def DeepXML(Depth):
+  sXML = '<Int Name="Leaf" />'
+  for i in range(Depth):
+    sXML = '<Struct Name="Level%i"><Int Name="Id" />%s</Struct>' % (i, sXML.replace('Name="Level%i"' % (i-1), 'Name="Child"') if i else sXML)
+  return sXML
+
+def DeepData(Depth):
+  DATA = 1
+  for i in range(Depth):
+    DATA = {'Id': i, 'Child' if i else 'Leaf': DATA}
+  return DATA
+
+ScalarXML = {
+  'Bool': ('<Bool Name="V" />', 1),
+  'Int': ('<Int Name="V" />', '12345'),
+  'Float': ('<Float Name="V" />', '1.5'),
+  'Decimal': ('<Decimal Name="V" />', 1.25),
+  'String': ('<String Name="V" MaxLength="100" />', '  some text  '),
+  'Bytes': ('<Bytes Name="V" />', b'some bytes'),
+  'Date': ('<Date Name="V" />', '2010-06-30'),
+  'DateTime': ('<DateTime Name="V" />', '2010-06-30T12:05:00Z'),
+  'Object': ('<Object Name="V" />', object()),
+  'None': ('<None Name="V" />', None),
+  }
+
+RecordXML = '''
+  <Struct Name="Record">
+    <Int Name="Id" />
+    <String Name="Title" />
+    <Float Name="Score" />
+    <List Name="Tags"><String Name="Tag" /></List>
+  </Struct>'''
+
+def Record(i):
+  return {'Id': i, 'Title': 'Title %i' % i, 'Score': i / 3.0, 'Tags': ['a', 'b']}
+
+def LibraryXML(Count):
+  return '<Extruct>%s</Extruct>' % str.join('', (RecordXML.replace('"Record"', '"Record%i"' % i) for i in range(Count)))
+
+def SerialData(Kind, Size):
+  if Kind == 'List':
+    return [Record(i) for i in range(Size)]
+  if Kind == 'Dict':
+    return {'key%i' % i: i * 1.5 for i in range(Size)}
+  if Kind == 'Deep':
+    return DeepData(Size)
+
+###############################################################################
+# The suite: each entry is (Name, Setup) where Setup returns the callable to time
+
+def Suite(Quick):
+  Sizes = (10, 1000) if Quick else (10, 1000, 100000)
+  RVAL = []
+
+  #----------------------------------------------------------------------------
+  for Count in (1, 100) if Quick else (1, 100, 1000):
+    sXML = LibraryXML(Count)
+    RVAL.append(('Parse/Specs=%i' % Count, lambda sXML=sXML: lambda: Extruct.Parse(sXML)))
+
+  def ParseFileSetup(Cache):
+    sDir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, sDir, True)
+    sPath = os.path.join(sDir, 'Library.xml')
+    with open(sPath, 'w') as FILE:
+      FILE.write(LibraryXML(100))
+    Extruct.ParseFile(sPath, Cache=Cache)
+    return lambda: Extruct.ParseFile(sPath, Cache=Cache)
+
+  RVAL.append(('ParseFile/Specs=100', lambda: ParseFileSetup(False)))
+  RVAL.append(('ParseFile/Specs=100/Cache', lambda: ParseFileSetup(True)))
+
+  for Depth in (5, 50):
+    RVAL.append(('Parse/Deep=%i' % Depth, lambda Depth=Depth: (lambda sXML: lambda: Extruct.ParseOne(sXML))(DeepXML(Depth))))
+
+  #----------------------------------------------------------------------------
+  for sType, (sXML, DATA) in sorted(ScalarXML.items()):
+    def Setup(sXML=sXML, DATA=DATA):
+      oSpec = Extruct.ParseOne(sXML)
+      return lambda: oSpec.Convert(DATA)
+    RVAL.append(('Convert/%s' % sType, Setup))
+
+  for Width in (10, 100) if Quick else (10, 100, 1000):
+    def Setup(Width=Width):
+      oSpec = Extruct.ParseOne(WideXML(Width))
+      DATA = WideData(Width)
+      return lambda: oSpec.Convert(DATA)
+    RVAL.append(('Convert/Struct/Wide=%i' % Width, Setup))
+
+  for Depth in (5, 50):
+    def Setup(Depth=Depth):
+      oSpec = Extruct.ParseOne(DeepXML(Depth))
+      DATA = DeepData(Depth)
+      return lambda: oSpec.Convert(DATA)
+    RVAL.append(('Convert/Struct/Deep=%i' % Depth, Setup))
+
+  for Size in Sizes:
+    def Setup(Size=Size):
+      oSpec = Extruct.ParseOne('<List Name="L"><Int Name="V" /></List>')
+      DATA = [str(i) for i in range(Size)]
+      return lambda: oSpec.Convert(DATA)
+    RVAL.append(('Convert/List/Int/Size=%i' % Size, Setup))
+
+    def Setup(Size=Size):
+      oSpec = Extruct.ParseOne('<List Name="L">%s</List>' % RecordXML)
+      DATA = [Record(i) for i in range(Size)]
+      return lambda: oSpec.Convert(DATA)
+    RVAL.append(('Convert/List/Struct/Size=%i' % Size, Setup))
+
+    def Setup(Size=Size):
+      oSpec = Extruct.ParseOne('<Dict Name="D"><String Name="K" /><Float Name="V" /></Dict>')
+      DATA = {'key%i' % i: i for i in range(Size)}
+      return lambda: oSpec.Convert(DATA)
+    RVAL.append(('Convert/Dict/Size=%i' % Size, Setup))
+
+  #----------------------------------------------------------------------------
+  for Version in (1, 2):
+    for Kind, KindSizes in (('List', Sizes), ('Dict', Sizes), ('Deep', (5, 50))):
+      for Size in KindSizes:
+        def Setup(Version=Version, Kind=Kind, Size=Size):
+          DATA = SerialData(Kind, Size)
+          return lambda: Extruct.Unserialize(Extruct.Serialize(DATA, Version=Version))
+        RVAL.append(('RoundTrip/V%i/%s/Size=%i' % (Version, Kind, Size), Setup))
+
+  #----------------------------------------------------------------------------
+  def WrapSetup(Args):
+    XML = str.join('', ('<Int Name="A%i" />' % i for i in range(Args))) + '<Int Name="return" />'
+    Namespace = {}
+    exec("def Function(%s):\n  return 0\n" % str.join(', ', ('A%i' % i for i in range(Args))), Namespace)
+    Function = Extruct.Wrap(XML)(Namespace['Function'])
+    ARGS = tuple(range(Args))
+    return lambda: Function(*ARGS)
+
+  def PlainSetup(Args):
+    Namespace = {}
+    exec("def Function(%s):\n  return 0\n" % str.join(', ', ('A%i' % i for i in range(Args))), Namespace)
+    Function = Namespace['Function']
+    ARGS = tuple(range(Args))
+    return lambda: Function(*ARGS)
+
+  for Args in (0, 1, 5):
+    RVAL.append(('Wrap/Plain/Args=%i' % Args, lambda Args=Args: PlainSetup(Args)))
+    RVAL.append(('Wrap/Args=%i' % Args, lambda Args=Args: WrapSetup(Args)))
+
+  return RVAL
+
+###############################################################################
+def Measure(oFunc, Repeat, MinTime):
+  oTimer = timeit.Timer(oFunc)
+
+  # Find a loop count which takes at least MinTime
+  Number = 1
+  while True:
+    t = oTimer.timeit(Number)
+    if t >= MinTime:
+      break
+    Number *= 10 if t < MinTime / 10 else 2
+
+  Times = [t] + oTimer.repeat(Repeat - 1, Number)
+  return {'Seconds': min(Times) / Number, 'Number': Number, 'Repeat': Repeat}
+
+def GitCommit():
+  try:
+    return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL).decode().strip()
+  except Exception:
+    return None
+
+def Format(Seconds):
+  for Unit, Scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6), ('ns', 1e-9)):
+    if Seconds >= Scale:
+      return "%7.2f %-2s" % (Seconds / Scale, Unit)
+  return "%7.2f ns" % (Seconds / 1e-9)
+
+###############################################################################
+def Main():
+  oParser = argparse.ArgumentParser(description="Extruct benchmark suite")
+  oParser.add_argument('--json', help="write results to this file")
+  oParser.add_argument('--compare', help="compare against results previously written with --json")
+  oParser.add_argument('--filter', default='', help="only run benchmarks whose name contains this")
+  oParser.add_argument('--quick', action='store_true', help="smaller sizes and fewer repeats")
+  oArgs = oParser.parse_args()
+
+  Repeat, MinTime = (3, 0.05) if oArgs.quick else (5, 0.2)
+
+  Old = None
+  if oArgs.compare:
+    with open(oArgs.compare) as FILE:
+      Old = json.load(FILE)['Results']
+
+  Results = {}
+
+  for sName, Setup in Suite(oArgs.quick):
+    if oArgs.filter not in sName:
+      continue
+
+    Results[sName] = Measure(Setup(), Repeat, MinTime)
+
+    Line = "%-40s %s" % (sName, Format(Results[sName]['Seconds']))
+    if Old and sName in Old:
+      Ratio = Results[sName]['Seconds'] / Old[sName]['Seconds']
+      Line += "   %5.2fx %s" % (Ratio, 'slower' if Ratio > 1.1 else 'faster' if Ratio < 0.9 else '')
+    print(Line)
+    sys.stdout.flush()
+
+  if oArgs.json:
+    with open(oArgs.json, 'w') as FILE:
+      json.dump({
+        'Meta': {
+          'Commit': GitCommit(),
+          'Time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+          'Python': platform.python_version(),
+          'Implementation': platform.python_implementation(),
+          'Machine': platform.machine(),
+          'Quick': oArgs.quick,
+          },
+        'Results': Results,
+        }, FILE, indent=2, sort_keys=True)
+
+if __name__ == '__main__':
+  Main()
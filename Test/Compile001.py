@@ -0,0 +1,80 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+from decimal import Decimal
+from timeit import timeit
+
+###############################################################################
+oSpec = Extruct.ParseOne('''
+  <Struct Name="Record">
+    <Object Name="Any" Nullable="1" />
+    <None Name="Nothing" />
+    <Bool Name="Flag" Default="1" />
+    <Int Name="Id" />
+    <Float Name="Score" />
+    <Decimal Name="Price" />
+    <String Name="Title" MaxLength="10" />
+    <String Name="Raw" Trim="0" Nullable="1" />
+    <Bytes Name="Blob" Nullable="1" />
+    <List Name="Tags">
+      <String Name="Tag" />
+    </List>
+    <Dict Name="Counts">
+      <String Name="Key" />
+      <Int Name="Count" />
+    </Dict>
+    <Struct Name="Child" Nullable="1">
+      <Int Name="A" />
+      <List Name="B">
+        <Int Name="Item" />
+      </List>
+    </Struct>
+  </Struct>
+  ''')
+
+Good = {
+  'Id': '42', 'Score': 1, 'Price': 2.5, 'Title': '  Hello  ', 'Raw': ' x ', 'Blob': b'abc',
+  'Tags': ['a', ' b ', 3], 'Counts': {'x': '1', 'y': 2}, 'Child': {'A': 1, 'B': [1, '2', 3.0]},
+  }
+
+Bad = [
+  dict(Good, Id='abc'),
+  dict(Good, Title='This is far too long'),
+  dict(Good, Tags=['a', None]),
+  dict(Good, Counts={'x': 'nope'}),
+  dict(Good, Child={'A': 1, 'B': [1, 2, 'three']}),
+  dict(Good, Child={'B': []}),
+  dict(Good, Tags=5),
+  {k: v for k, v in Good.items() if k != 'Score'},
+  ]
+
+Compiled = oSpec.Compile()
+
+def Outcome(oFunc, DATA):
+  try:
+    return ('OK', oFunc(DATA))
+  except Extruct.ConversionError as e:
+    return ('ERROR', str(e), e.Stack)
+
+Interpreted = lambda DATA: Extruct.NativeToNative_Convertor(oSpec).Convert(DATA)
+
+print("\n=================================================\n")
+
+print("Compiled == Interpreted")
+for DATA in [Good] + Bad:
+  a = Outcome(Interpreted, DATA)
+  b = Outcome(Compiled, DATA)
+  print('  same' if a == b else '  DIFFERENT', a[1] if a[0] == 'ERROR' else '')
+
+print("\n=================================================\n")
+
+N = 20000
+print("Interpreted vs Compiled vs Spec.Convert, %i records" % N)
+tInterpreted = timeit(lambda: Interpreted(Good), number=N)
+tCompiled = timeit(lambda: Compiled(Good), number=N)
+tCached = timeit(lambda: oSpec.Convert(Good), number=N)
+print("  Interp:   %.3fs (%.0f records/s)" % (tInterpreted, N/tInterpreted))
+print("  Compiled: %.3fs (%.0f records/s)" % (tCompiled, N/tCompiled))
+print("  Cached:   %.3fs (%.0f records/s)" % (tCached, N/tCached))
+print("  Speedup:  %.2fx" % (tInterpreted/tCompiled))
+
+print("\n=================================================\n")
@@ -0,0 +1,61 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+from time import perf_counter
+
+###############################################################################
+oSpec = Extruct.ParseOne('''
+  <Struct Name="Message">
+    <Int Name="Id" />
+    <String Name="Status" />
+    <Float Name="Amount" />
+    <List Name="Tags">
+      <String Name="Tag" />
+    </List>
+  </Struct>
+  ''')
+
+def Record(i):
+  return {'Id': str(i), 'Status': ' OK ', 'Amount': i * 1.5, 'Tags': ['a', 'b']}
+
+print("\n=================================================\n")
+
+print("ConvertMany with ReturnErrors=True")
+Batch = [Record(1), dict(Record(2), Id='two'), Record(3)]
+for value in oSpec.ConvertMany(Batch, ReturnErrors=True):
+  print("  ", repr(value))
+
+print("\n=================================================\n")
+
+try:
+  print("ConvertMany aborting on the first error")
+  oSpec.ConvertMany(Batch)
+except Extruct.ConversionError as e:
+  print("  ", e)
+
+print("\n=================================================\n")
+
+print("Throughput (records/s): Convert loop vs ConvertMany")
+for Size in (1, 100, 100000):
+  Batch = [Record(i) for i in range(Size)]
+  Repeat = max(1, 100000 // Size)
+
+  t = perf_counter()
+  for n in range(Repeat):
+    [oSpec.Convert(DATA) for DATA in Batch]
+  tLoop = perf_counter() - t
+
+  t = perf_counter()
+  for n in range(Repeat):
+    oSpec.ConvertMany(Batch)
+  tMany = perf_counter() - t
+
+  t = perf_counter()
+  for n in range(Repeat):
+    oSpec.ConvertMany(Batch, ReturnErrors=True)
+  tErrors = perf_counter() - t
+
+  Total = Size * Repeat
+  print("  batch=%-6i Convert: %9.0f  ConvertMany: %9.0f  ConvertMany(ReturnErrors): %9.0f" % (
+    Size, Total/tLoop, Total/tMany, Total/tErrors))
+
+print("\n=================================================\n")
@@ -0,0 +1,41 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import datetime
+from timeit import timeit
+
+###############################################################################
+oDate = Extruct.ParseOne('<Date Name="When" />')
+oDateTime = Extruct.ParseOne('<DateTime Name="When" />')
+
+print("\n=================================================\n")
+
+for sText in ('2010-06-30', '20100630', datetime.datetime(2010, 6, 30, 12, 5), '2010-06-31', '30/06/2010', 20100630):
+  try:
+    print("Date     %-28r %r" % (sText, oDate.Convert(sText)))
+  except Extruct.ConversionError as e:
+    print("Date     %-28r %s" % (sText, e))
+
+print()
+
+for sText in ('2010-06-30T12:05:00', '2010-06-30 12:05', '2010-06-30T12:05:00.250Z', '2010-06-30T12:05:00-05:00', datetime.date(2010, 6, 30), '2010-06-30T25:00'):
+  try:
+    print("DateTime %-28r %r" % (sText, oDateTime.Convert(sText)))
+  except Extruct.ConversionError as e:
+    print("DateTime %-28r %s" % (sText, e))
+
+print("\n=================================================\n")
+
+N = 200000
+Feed = ['2010-%02i-%02iT%02i:%02i:00Z' % (i % 12 + 1, i % 28 + 1, i % 24, i % 60) for i in range(1000)]
+oFeed = Extruct.ParseOne('<List Name="Feed"><DateTime Name="When" /></List>')
+oFeed.Convert(Feed)
+
+print("DateTime strings per second")
+print("  Built in:  %9.0f" % (N / timeit(lambda: oFeed.Convert(Feed), number=N // len(Feed))))
+
+if Extruct.ISOToDateTime is not None:
+  print("  AppStruct: %9.0f" % (N / timeit(lambda: [Extruct.ISOToDateTime(s) for s in Feed], number=N // len(Feed))))
+else:
+  print("  AppStruct: not installed")
+
+print("\n=================================================\n")
@@ -0,0 +1,73 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+from timeit import timeit
+
+###############################################################################
+oSpec = Extruct.ParseOne('''
+  <Struct Name="Document">
+    <String Name="Title" />
+    <List Name="Sections">
+      <Struct Name="Section">
+        <String Name="Heading" />
+        <List Name="Paragraphs">
+          <Struct Name="Paragraph" Record="Slots">
+            <Int Name="Id" />
+            <String Name="Text" />
+            <Dict Name="Marks"><String Name="Key" /><Int Name="Value" /></Dict>
+          </Struct>
+        </List>
+      </Struct>
+    </List>
+  </Struct>
+  ''')
+
+def Paragraph(s, p):
+  return {'Id': str(s * 1000 + p), 'Text': ' Paragraph %i.%i ' % (s, p), 'Marks': {'bold': '1'}}
+
+Document = {
+  'Title': 'A document',
+  'Sections': [{'Heading': 'Section %i' % s, 'Paragraphs': [Paragraph(s, p) for p in range(100)]} for s in range(200)],
+  }
+
+def Edit(Document, s, p, Text):
+  # Copy on write: the edited paragraph, and each container above it, are new objects
+  Section = Document['Sections'][s]
+  Paragraphs = list(Section['Paragraphs'])
+  Paragraphs[p] = dict(Paragraphs[p], Text=Text)
+  Sections = list(Document['Sections'])
+  Sections[s] = dict(Section, Paragraphs=Paragraphs)
+  return dict(Document, Sections=Sections)
+
+print("\n=================================================\n")
+
+First = oSpec.ConvertIncremental(Document)
+print("First result == Convert:      ", First.Value == oSpec.Convert(Document))
+
+Edited = Edit(Document, 150, 42, 'Changed')
+Second = oSpec.ConvertIncremental(Edited, First)
+print("Edited result == Convert:     ", Second.Value == oSpec.Convert(Edited))
+print("Edited paragraph:             ", Second.Value.Sections[150].Paragraphs[42])
+print("Untouched section reused:     ", Second.Value.Sections[149] is First.Value.Sections[149])
+print("Untouched paragraph reused:   ", Second.Value.Sections[150].Paragraphs[41] is First.Value.Sections[150].Paragraphs[41])
+
+Inserted = dict(Edited, Sections=[{'Heading': 'New', 'Paragraphs': []}] + Edited['Sections'])
+Third = oSpec.ConvertIncremental(Inserted, Second)
+print("After an insert, reused:      ", Third.Value.Sections[1] is Second.Value.Sections[0])
+
+print("\n=================================================\n")
+
+Bad = Edit(Document, 3, 7, None)
+try:
+  oSpec.ConvertIncremental(Bad, First)
+except Extruct.ConversionError as e:
+  print("Error:", e)
+
+print("\n=================================================\n")
+
+print("Milliseconds per call, 20000 paragraphs, after editing one")
+Number = 5
+print("  Convert:             %8.2f" % (timeit(lambda: oSpec.Convert(Edited), number=Number) / Number * 1000))
+print("  ConvertIncremental:  %8.2f (no previous result)" % (timeit(lambda: oSpec.ConvertIncremental(Edited), number=Number) / Number * 1000))
+print("  ConvertIncremental:  %8.2f (previous result)" % (timeit(lambda: oSpec.ConvertIncremental(Edited, First), number=Number) / Number * 1000))
+
+print("\n=================================================\n")
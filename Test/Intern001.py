@@ -0,0 +1,56 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import gc
+import random
+import tracemalloc
+from timeit import timeit
+
+###############################################################################
+def Make(Intern):
+  return Extruct.ParseOne('''
+    <List Name="Events">
+      <Struct Name="Event">
+        <Int Name="Id" />
+        <String Name="Status" Intern="%(I)s" />
+        <String Name="Country" Intern="%(I)s" />
+        <String Name="Currency" Intern="%(I)s" InternSize="2" />
+        <String Name="Comment" />
+      </Struct>
+    </List>''' % {'I': Intern})
+
+oPlain = Make('0')
+oIntern = Make('1')
+
+Statuses = ['200 OK', '404 Not Found', '500 Internal Server Error', '302 Found']
+Countries = ['United States', 'Canada', 'United Kingdom', 'Germany', 'France', 'Japan', 'Brazil', 'India']
+Currencies = ['USD', 'CAD', 'EUR']
+
+# Input values arrive as fresh strings, as they would from a parser (padded, so that Trim copies)
+random.seed(1)
+Events = [
+  {'Id': i, 'Status': ' %s ' % random.choice(Statuses), 'Country': ' %s ' % random.choice(Countries),
+   'Currency': ' %s ' % random.choice(Currencies), 'Comment': 'Event number %i' % i}
+  for i in range(200000)]
+
+print("\n=================================================\n")
+
+R = oIntern.Convert(Events[:1000])
+print("Equal values share one object:", R[0].Country is [e for e in R if e.Country == R[0].Country][-1].Country)
+print("Distinct Country objects:      ", len(set(map(id, (e.Country for e in R)))))
+print("Distinct Currency objects:     ", len(set(map(id, (e.Currency for e in R)))), "(InternSize=2)")
+print("Same result as without Intern: ", R == oPlain.Convert(Events[:1000]))
+print("Reference interpreter agrees:  ", Extruct.NativeToNative_Convertor(oIntern).Convert(Events[:1000]) == R)
+
+print("\n=================================================\n")
+
+print("Converting %i events with 3 repeated string fields" % len(Events))
+for Label, oSpec in (('Plain', oPlain), ('Intern', oIntern)):
+  gc.collect()
+  tracemalloc.start()
+  R = oSpec.Convert(Events)
+  Memory = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  del R
+  print("  %-7s result holds %6.1f MiB, %6.3fs per conversion" % (Label, Memory / 2**20, timeit(lambda: oSpec.Convert(Events), number=3) / 3))
+
+print("\n=================================================\n")
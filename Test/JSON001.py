@@ -0,0 +1,125 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import json
+from timeit import timeit
+import tracemalloc
+
+###############################################################################
+oSpec = Extruct.ParseOne('''
+  <Struct Name="Order">
+    <Int Name="Id" />
+    <String Name="Customer" />
+    <Decimal Name="Total" />
+    <Date Name="Placed" />
+    <DateTime Name="Shipped" Nullable="1" />
+    <Bool Name="Paid" Default="0" />
+    <String Name="Note" Nullable="1" />
+    <Object Name="Extra" Nullable="1" />
+    <List Name="Lines">
+      <Struct Name="Line" Record="Slots">
+        <String Name="Sku" />
+        <Int Name="Quantity" />
+        <Float Name="Price" />
+      </Struct>
+    </List>
+    <Dict Name="Tags"><String Name="Key" /><Int Name="Value" /></Dict>
+    <List Name="Readings" Packed="1"><Float Name="Reading" /></List>
+  </Struct>
+  ''')
+
+def Order(i):
+  return {
+    'Id': i,
+    'Customer': ' Customer %i ' % i,
+    'Total': '%i.25' % i,
+    'Placed': '2024-01-%02i' % (i % 28 + 1),
+    'Shipped': '2024-02-01T10:00:00Z' if i % 2 else None,
+    'Note': None,
+    'Extra': {'anything': [1, 2, {'a': None}]},
+    'Lines': [{'Sku': 'SKU-%i' % j, 'Quantity': '3', 'Price': 9.5, 'Ignored': [1, {'x': '}'}]} for j in range(5)],
+    'Tags': {'a': 1, 'b': '2'},
+    'Readings': [1, 2.5, 3],
+    'Unknown': {'deep': [[[{'x': '"]'}]]]},
+    }
+
+print("\n=================================================\n")
+
+for i in range(50):
+  sText = json.dumps(Order(i))
+  assert oSpec.Convert(sText, 'JSON>>Native') == oSpec.Convert(json.loads(sText)), i
+  assert oSpec.Convert(sText.encode('utf-8'), 'JSON>>Native') == oSpec.Convert(json.loads(sText)), i
+
+print("Same as json.loads + Convert:  OK")
+print(oSpec.Convert(json.dumps(Order(1), indent=2), 'JSON>>Native').Lines[0])
+
+List = Extruct.ParseOne('<List Name="Ints"><Int Name="Int" /></List>')
+print(List.Convert(' [ 1 , "2" , 3.5 ] ', 'JSON>>Native'))
+
+print("\n=================================================\n")
+
+def Error(oSpec, sText):
+  try:
+    oSpec.Convert(sText, 'JSON>>Native')
+  except Extruct.ConversionError as e:
+    print("Error:", e)
+  else:
+    print("No error for", sText)
+
+Good = Order(1)
+Error(oSpec, json.dumps(dict(Good, Lines=[Good['Lines'][0], dict(Good['Lines'][0], Quantity='x')])))
+Error(oSpec, json.dumps(dict(Good, Customer=None)))
+
+# Whatever order the members come in, the error is the first one in Prop order
+def Reordered(**Bad):
+  return json.dumps(dict(list(Bad.items()) + [(k, v) for k, v in Good.items() if k not in Bad]))
+
+Error(oSpec, Reordered(Placed='x', Id='x'))
+Error(oSpec, Reordered(Tags={'a': 'x'}, Total='x'))
+Error(oSpec, json.dumps(dict(Good, Tags={'a': 1, 'b': 'x'})))
+Error(oSpec, json.dumps(Good)[:-1])
+Error(oSpec, json.dumps(Good) + ' []')
+Error(List, '[1, 2 3]')
+Error(List, '[1, 2, ]')
+Error(List, 5)
+Error(List, b'[1, "\xff"]')
+
+print("\n=================================================\n")
+
+sText = json.dumps([Order(i) for i in range(2000)])
+Orders = Extruct.ParseOne('''
+  <List Name="Orders">
+    <Struct Name="Order">
+      <Int Name="Id" />
+      <String Name="Customer" />
+      <Decimal Name="Total" />
+      <Date Name="Placed" />
+      <List Name="Lines">
+        <Struct Name="Line">
+          <String Name="Sku" />
+          <Int Name="Quantity" />
+          <Float Name="Price" />
+        </Struct>
+      </List>
+    </Struct>
+  </List>
+  ''')
+
+assert Orders.Convert(sText, 'JSON>>Native') == Orders.Convert(json.loads(sText))
+
+Number = 5
+print("Milliseconds per call, 2000 orders, %i KB of JSON" % (len(sText) // 1024))
+print("  json.loads + Convert:  %8.2f" % (timeit(lambda: Orders.Convert(json.loads(sText)), number=Number) / Number * 1000))
+print("  JSON>>Native:          %8.2f" % (timeit(lambda: Orders.Convert(sText, 'JSON>>Native'), number=Number) / Number * 1000))
+
+def Peak(oFunc):
+  tracemalloc.start()
+  oFunc()
+  RVAL = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return RVAL // 1024
+
+print("Peak KB allocated per call")
+print("  json.loads + Convert:  %8i" % Peak(lambda: Orders.Convert(json.loads(sText))))
+print("  JSON>>Native:          %8i" % Peak(lambda: Orders.Convert(sText, 'JSON>>Native')))
+
+print("\n=================================================\n")
@@ -0,0 +1,139 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import json
+import io
+from base64 import b64encode
+from decimal import Decimal
+from datetime import date, datetime
+from timeit import timeit
+
+###############################################################################
+oSpec = Extruct.ParseOne('''
+  <Struct Name="Order">
+    <Int Name="Id" />
+    <String Name="Customer" />
+    <Decimal Name="Total" />
+    <Date Name="Placed" />
+    <DateTime Name="Shipped" Nullable="1" />
+    <Bool Name="Paid" Default="0" />
+    <Float Name="Weight" />
+    <Bytes Name="Signature" />
+    <Object Name="Extra" Nullable="1" />
+    <List Name="Lines">
+      <Struct Name="Line">
+        <String Name="Sku" />
+        <Int Name="Quantity" />
+        <Decimal Name="Price" />
+      </Struct>
+    </List>
+    <Dict Name="Tags"><String Name="Key" /><Int Name="Value" /></Dict>
+    <Dict Name="Counts"><Int Name="Key" /><Float Name="Value" /></Dict>
+    <List Name="Readings" Packed="1"><Float Name="Reading" /></List>
+    <List Name="Empty"><Int Name="Int" /></List>
+  </Struct>
+  ''')
+
+def Order(i):
+  return {
+    'Id': str(i),
+    'Customer': ' Ünïcode "customer" %i\n ' % i,
+    'Total': '%i.25' % i,
+    'Placed': '2024-01-%02i' % (i % 28 + 1),
+    'Shipped': '2024-02-01T10:00:00+02:00' if i % 2 else None,
+    'Weight': float('nan') if i == 3 else i / 3,
+    'Signature': b'\x00\xff' * 3,
+    'Extra': {'when': date(2024, 1, 1), 'amount': Decimal('1.10'), 'list': [1, None, 'x']},
+    'Lines': [{'Sku': 'SKU-%i' % j, 'Quantity': j, 'Price': 9.5 + j} for j in range(5)],
+    'Tags': {'a': 1, 'b': '2'},
+    'Counts': {'1': 2, 3: 4.5},
+    'Readings': [1, 2.5, 3],
+    'Empty': [],
+    'Unknown': 'not in the Spec',
+    }
+
+# The reference: generic json.dumps of the converted value
+def Default(o):
+  if isinstance(o, Decimal):
+    return str(o)
+  if isinstance(o, (date, datetime)):
+    return o.isoformat()
+  if isinstance(o, bytes):
+    return b64encode(o).decode()
+  if hasattr(o, 'tolist'):
+    return o.tolist()
+  raise TypeError(o)
+
+def Reference(oSpec, DATA):
+  return json.dumps(oSpec.Convert(DATA), separators=(',', ':'), default=Default)
+
+print("\n=================================================\n")
+
+for i in range(50):
+  assert oSpec.Convert(Order(i), 'Native>>JSON') == Reference(oSpec, Order(i)), i
+
+# Keys which convert to the same key are written once, as the converted dict holds them
+for Tags, Counts in (({'a': 1, ' a': '2', 'b': 3, 'a ': 4}, {1: 1, '1': 2, 1.0: 3}), ({' x': 1, 'x': 2}, {'2': 1, 2: 2})):
+  Record = dict(Order(0), Tags=Tags, Counts=Counts)
+  assert oSpec.Convert(Record, 'Native>>JSON') == Reference(oSpec, Record), (Tags, Counts)
+
+FILE = io.StringIO()
+oSpec.DumpJSON(dict(Order(0), Tags={'a': 1, ' a': 2}), FILE, ChunkTokens=1)
+assert FILE.getvalue() == Reference(oSpec, dict(Order(0), Tags={'a': 1, ' a': 2}))
+
+print("Same as json.dumps(Convert(DATA)):  OK")
+print(oSpec.Convert(Order(1), 'Native>>JSON'))
+
+print("\n=================================================\n")
+
+Orders = Extruct.ParseOne('''
+  <List Name="Orders">
+    <Struct Name="Order">
+      <Int Name="Id" />
+      <String Name="Customer" />
+      <Decimal Name="Total" />
+      <Date Name="Placed" />
+      <List Name="Lines">
+        <Struct Name="Line">
+          <String Name="Sku" />
+          <Int Name="Quantity" />
+          <Float Name="Price" />
+        </Struct>
+      </List>
+    </Struct>
+  </List>
+  ''')
+
+DATA = [Order(i) for i in range(2000)]
+
+oFile = io.StringIO()
+Orders.DumpJSON(DATA, oFile, ChunkTokens=100)
+assert oFile.getvalue() == Reference(Orders, DATA)
+
+oFile = io.BytesIO()
+Orders.DumpJSON(DATA, oFile)
+assert oFile.getvalue().decode() == Reference(Orders, DATA)
+print("DumpJSON to text and binary files:  OK")
+
+# Round trip through JSON>>Native
+assert Orders.Convert(Orders.Convert(DATA, 'Native>>JSON'), 'JSON>>Native') == Orders.Convert(DATA)
+print("Round trip through JSON>>Native:    OK")
+
+def Error(oSpec, DATA):
+  try:
+    oSpec.Convert(DATA, 'Native>>JSON')
+  except Extruct.ConversionError as e:
+    print("Error:", e)
+
+Error(Orders, DATA[:3] + [dict(DATA[3], Lines=[{'Sku': 'x', 'Quantity': 'y', 'Price': 1}])])
+Error(Orders, [dict(DATA[0], Customer=None)])
+Error(oSpec, dict(Order(0), Counts={'x': 1}))
+Error(oSpec, dict(Order(0), Extra={'x': object()}))
+
+print("\n=================================================\n")
+
+Number = 5
+print("Milliseconds per call, 2000 orders")
+print("  Convert + json.dumps:  %8.2f" % (timeit(lambda: Reference(Orders, DATA), number=Number) / Number * 1000))
+print("  Native>>JSON:          %8.2f" % (timeit(lambda: Orders.Convert(DATA, 'Native>>JSON'), number=Number) / Number * 1000))
+
+print("\n=================================================\n")
@@ -0,0 +1,67 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import array
+import tracemalloc
+from timeit import timeit
+
+###############################################################################
+oSeries = Extruct.ParseOne('''
+  <Struct Name="Series">
+    <List Name="Times" Packed="1"><Int Name="Time" /></List>
+    <List Name="Values" Packed="1"><Float Name="Value" /></List>
+    <List Name="Flags" Packed="1"><Bool Name="Flag" /></List>
+  </Struct>
+  ''')
+
+oPlain = Extruct.ParseOne('<List Name="Values"><Int Name="Value" /></List>')
+oPacked = Extruct.ParseOne('<List Name="Values" Packed="1"><Int Name="Value" /></List>')
+
+print("\n=================================================\n")
+
+DATA = {'Times': ['1', 2, 3.7], 'Values': [1, '2.5', 3.0], 'Flags': [0, 1, 'x']}
+print("Convert")
+for sName, value in sorted(oSeries.Convert(DATA).items()):
+  print("  ", sName, repr(value))
+
+print("Same as the reference interpreter")
+print("  ", Extruct.NativeToNative_Convertor(oSeries).Convert(DATA) == oSeries.Convert(DATA))
+
+print("Validate passes an existing array through")
+Values = array.array('q', [1, 2])
+print("  ", oPacked.Validate(Values) is Values, oPacked.Convert(Values) is Values)
+
+print("\n=================================================\n")
+
+for Bad in (dict(DATA, Times=[1, 2, 'three']), dict(DATA, Times=[1, 2 ** 70]), dict(DATA, Values=5)):
+  try:
+    oSeries.Convert(Bad)
+  except Extruct.ConversionError as e:
+    print("Compiled:    ", e)
+  try:
+    Extruct.NativeToNative_Convertor(oSeries).Convert(Bad)
+  except Extruct.ConversionError as e:
+    print("Interpreter: ", e)
+
+print("\n=================================================\n")
+
+for sXML in ('<List Name="L" Packed="1"><String Name="S" /></List>', '<List Name="L" Packed="yes"><Int Name="I" /></List>'):
+  try:
+    Extruct.ParseOne(sXML)
+  except Extruct.SpecError as e:
+    print("SpecError:", e)
+
+print("\n=================================================\n")
+
+Size = 1000000
+Raw = [str(1000 + i) for i in range(Size)]
+
+print("Converting %i numeric strings" % Size)
+for Label, oSpec in (('List', oPlain), ('Packed', oPacked)):
+  tracemalloc.start()
+  RVAL = oSpec.Convert(Raw)
+  Memory = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  del RVAL
+  print("  %-7s %6.2fs per 10 conversions, result holds %6.1f MiB" % (Label, timeit(lambda: oSpec.Convert(Raw), number=10), Memory / 2**20))
+
+print("\n=================================================\n")
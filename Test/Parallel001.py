@@ -0,0 +1,76 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+from time import perf_counter
+
+###############################################################################
+oList = Extruct.ParseOne('''
+  <List Name="Messages">
+    <Struct Name="Message">
+      <Int Name="Id" />
+      <String Name="Status" />
+      <Float Name="Amount" />
+      <List Name="Tags">
+        <String Name="Tag" />
+      </List>
+    </Struct>
+  </List>
+  ''')
+
+oDict = Extruct.ParseOne('''
+  <Dict Name="Totals">
+    <String Name="Key" />
+    <Decimal Name="Value" />
+  </Dict>
+  ''')
+
+def Record(i):
+  return {'Id': str(i), 'Status': ' OK ', 'Amount': i * 1.5, 'Tags': ['a', 'b']}
+
+if __name__ == '__main__':
+
+  print("\n=================================================\n")
+
+  Batch = [Record(i) for i in range(10000)]
+  print("ConvertParallel(List) == Convert(List)")
+  print("  ", oList.ConvertParallel(Batch, Workers=4, ChunkSize=1000) == oList.Convert(Batch))
+
+  Totals = {'k%i' % i: i / 4 for i in range(10000)}
+  print("ConvertParallel(Dict) == Convert(Dict)")
+  print("  ", oDict.ConvertParallel(Totals, Workers=4, ChunkSize=1000) == oDict.Convert(Totals))
+
+  # Records come back from the workers as instances of the same generated class
+  oSlots = Extruct.ParseOne('''
+    <List Name="Messages"><Struct Name="Message" Record="Slots"><Int Name="Id" /></Struct></List>
+    ''')
+  print("ConvertParallel(Record='Slots') == Convert")
+  Records = oSlots.ConvertParallel(Batch[:100], Workers=4, ChunkSize=10)
+  print("  ", Records == oSlots.Convert(Batch[:100]), type(Records[0]) is oSlots.ROOT.Value.RecordClass)
+
+  print("\n=================================================\n")
+
+  Bad = list(Batch)
+  Bad[7500] = dict(Record(7500), Id='seven')
+  Bad[9000] = dict(Record(9000), Amount='none')
+
+  for Label, Call in (('Convert', lambda: oList.Convert(Bad)), ('ConvertParallel', lambda: oList.ConvertParallel(Bad, Workers=4, ChunkSize=1000))):
+    try:
+      Call()
+    except Extruct.ConversionError as e:
+      print("%-16s %s" % (Label, e))
+      print("%-16s %r %r" % ('', e.Stack, e.Value))
+
+  print("\n=================================================\n")
+
+  print("Time for 400000 records (includes starting the pool)")
+  Batch = [Record(i) for i in range(400000)]
+
+  t = perf_counter()
+  oList.Convert(Batch)
+  print("  Convert:                    %.2fs" % (perf_counter() - t))
+
+  for Workers in (2, 4):
+    t = perf_counter()
+    oList.ConvertParallel(Batch, Workers=Workers)
+    print("  ConvertParallel(Workers=%i): %.2fs" % (Workers, perf_counter() - t))
+
+  print("\n=================================================\n")
@@ -0,0 +1,55 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import os
+import shutil
+import tempfile
+from time import perf_counter
+
+###############################################################################
+def MakeXML(Count):
+  Specs = []
+  for i in range(Count):
+    Specs.append('''
+  <Struct Name="Record%i">
+    <Int Name="Id" />
+    <String Name="Title" MaxLength="100" />
+    <Decimal Name="Price" Nullable="1" />
+    <List Name="Tags"><String Name="Tag" /></List>
+    <Dict Name="Attributes"><String Name="Key" /><String Name="Value" /></Dict>
+    <Struct Name="Address">
+      <String Name="Street" /><String Name="City" /><String Name="Zip" />
+    </Struct>
+  </Struct>''' % i)
+  return '<Extruct>%s\n</Extruct>' % str.join('', Specs)
+
+sDir = tempfile.mkdtemp()
+sPath = os.path.join(sDir, 'Library.xml')
+with open(sPath, 'w') as FILE:
+  FILE.write(MakeXML(500))
+
+def Time(Label, **kw):
+  t = perf_counter()
+  Specs = Extruct.ParseFile(sPath, **kw)
+  print("  %-40s %7.1f ms  (%i specs)" % (Label, (perf_counter() - t) * 1000, len(Specs)))
+  return Specs
+
+print("\n=================================================\n")
+
+print("ParseFile of 500 specs")
+Time("no cache")
+Time("cold (parses, writes cache)", Cache=True)
+Specs = Time("warm (loads cache)", Cache=True)
+
+print("  cached spec still converts:", Specs[3].Convert({'Id': '1', 'Title': 'x', 'Tags': [], 'Attributes': {}, 'Address': {'Street': 's', 'City': 'c', 'Zip': 'z'}}).Id)
+
+os.utime(sPath)
+Time("touched, same content (hash matches)", Cache=True)
+
+with open(sPath, 'w') as FILE:
+  FILE.write(MakeXML(499))
+Time("changed (full parse)", Cache=True)
+Time("warm again", Cache=True)
+
+shutil.rmtree(sDir)
+
+print("\n=================================================\n")
@@ -0,0 +1,59 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+from timeit import timeit
+
+###############################################################################
+oSpec = Extruct.ParseOne('''
+  <Struct Name="Order">
+    <Int Name="Id" />
+    <String Name="Customer" />
+    <List Name="Lines">
+      <Struct Name="Line">
+        <String Name="Sku" />
+        <Int Name="Quantity" />
+        <Decimal Name="Price" />
+      </Struct>
+    </List>
+    <Dict Name="Attributes">
+      <String Name="Key" />
+      <String Name="Value" />
+    </Dict>
+  </Struct>
+  ''')
+
+Good = {
+  'Id': '1', 'Customer': ' Someone ', 'Attributes': {'a': 'b', 'c': 'd'},
+  'Lines': [{'Sku': 'X%i' % i, 'Quantity': i, 'Price': '9.99'} for i in range(20)],
+  }
+Bad = dict(Good, Lines=[{'Sku': 'X', 'Quantity': 'many', 'Price': 1}])
+
+print("\n=================================================\n")
+
+print("Stats after 100 good and 5 bad conversions")
+oSpec.Profile()
+for i in range(100):
+  oSpec.Convert(Good)
+for i in range(5):
+  try:
+    oSpec.Convert(Bad)
+  except Extruct.ConversionError:
+    pass
+
+for sPath, Stat in sorted(oSpec.Stats().items()):
+  print("  %-32s Calls=%-5i Errors=%-2i Size=%-5i Time=%.2fms" % (sPath, Stat.Calls, Stat.Errors, Stat.Size, Stat.Time * 1000))
+
+print("\n=================================================\n")
+
+print("ResetStats()")
+oSpec.ResetStats()
+print("  ", oSpec.Stats()['/Order'])
+
+print("\n=================================================\n")
+
+N = 5000
+print("Cost of profiling, %i conversions" % N)
+for Label, Every in (('off', 0), ('every 100th', 100), ('every 10th', 10), ('always', 1)):
+  oSpec.Profile(Every)
+  print("  %-12s %.3fs" % (Label, timeit(lambda: oSpec.Convert(Good), number=N)))
+
+print("\n=================================================\n")
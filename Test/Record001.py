@@ -0,0 +1,76 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import pickle
+import tracemalloc
+
+###############################################################################
+def MakeSpec(Record):
+  return Extruct.ParseOne('''
+    <Struct Name="Quote" Record="%s">
+      <Int Name="Id" />
+      <String Name="Symbol" />
+      <Float Name="Bid" />
+      <Float Name="Ask" />
+      <Int Name="Size" />
+      <String Name="Venue" Nullable="1" />
+    </Struct>
+    ''' % Record)
+
+Specs = {Record: MakeSpec(Record) for Record in ('aadict', 'Slots', 'Tuple')}
+
+Raw = {'Id': '7', 'Symbol': 'ABC', 'Bid': '1.5', 'Ask': 1.75, 'Size': 100}
+
+print("\n=================================================\n")
+
+for Record, oSpec in Specs.items():
+  Value = oSpec.Convert(Raw)
+  print("Record=%s" % Record)
+  print("  ", repr(Value))
+  print("   Symbol: %s  ['Bid']: %s  dict(): %s" % (Value.Symbol, Value['Bid'], dict(Value) == Specs['aadict'].Convert(Raw)))
+  print("   Interpreted == Compiled:", Extruct.NativeToNative_Convertor(oSpec).Convert(Raw) == Value)
+  print("   Validate(Value) is Value:", oSpec.Validate(Value) is Value)
+
+print("\n=================================================\n")
+
+try:
+  print("Record='Tuple' with a bad property name")
+  Extruct.ParseOne('<Struct Name="X" Record="Tuple"><Int Name="_private" /></Struct>')
+except Extruct.SpecError as e:
+  print("  ", e)
+
+for Record, sName in (('Slots', 'self'), ('Slots', '_fields'), ('Slots', 'keys'), ('Tuple', 'keys')):
+  try:
+    print("Record='%s' with a property named %s" % (Record, sName))
+    Extruct.ParseOne('<Struct Name="X" Record="%s"><Int Name="%s" /></Struct>' % (Record, sName))
+  except Extruct.SpecError as e:
+    print("  ", e)
+
+for Record in ('Slots', 'Tuple'):
+  Value = Specs[Record].Convert(Raw)
+  Loaded = pickle.loads(pickle.dumps(Value))
+  assert Loaded == Value and type(Loaded) is type(Value), Record
+  assert Specs[Record].Validate(Loaded) is Loaded, Record
+  print("Record=%s pickled: %i bytes, %r" % (Record, len(pickle.dumps(Value)), Loaded))
+
+# The same name and property names give the same class, in every Spec
+print("Shared class:", type(MakeSpec('Slots').Convert(Raw)) is type(Specs['Slots'].Convert(Raw)))
+
+try:
+  print("Conversion errors are unchanged")
+  Specs['Slots'].Convert(dict(Raw, Size='many'))
+except Extruct.ConversionError as e:
+  print("  ", e)
+
+print("\n=================================================\n")
+
+N = 100000
+print("Memory for %i records" % N)
+for Record, oSpec in Specs.items():
+  tracemalloc.start()
+  Records = oSpec.ConvertMany([Raw] * N)
+  Size = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  del Records
+  print("  %-7s %8.0f KiB  %5.0f bytes/record" % (Record, Size / 1024, Size / N))
+
+print("\n=================================================\n")
@@ -0,0 +1,121 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import json
+import os
+import pickle
+import tempfile
+
+###############################################################################
+XML = '''<?xml version="1.0" encoding="utf-8"?>
+<Extruct>
+  <Struct Name="Order">
+    <Int Name="Id" />
+    <Ref Name="Billing" Spec="Address" />
+    <Ref Name="Shipping" Spec="Address" Nullable="1" />
+    <Ref Name="Total" Spec="Money" />
+    <List Name="Lines">
+      <Struct Name="Line">
+        <String Name="Sku" />
+        <Ref Name="Price" Spec="Money" />
+      </Struct>
+    </List>
+  </Struct>
+
+  <Struct Name="Address" Record="Slots">
+    <String Name="Street" />
+    <String Name="City" />
+    <Ref Name="Country" Spec="Country" />
+  </Struct>
+
+  <Decimal Name="Money" />
+  <String Name="Country" MaxLength="2" />
+</Extruct>
+'''
+
+Specs = dict((oSpec.Name, oSpec) for oSpec in Extruct.Parse(XML))
+oSpec = Specs['Order']
+
+Address = {'Street': ' 1 Main St ', 'City': 'Springfield', 'Country': 'US'}
+Order = {'Id': '7', 'Billing': Address, 'Shipping': None, 'Total': '10.50', 'Lines': [{'Sku': 'A', 'Price': 1.5}]}
+
+print("\n=================================================\n")
+
+oSpec.VarDump()
+
+RVAL = oSpec.Convert(Order)
+print(RVAL)
+print("Shared node:       ", oSpec.ROOT.Prop[1].Target is oSpec.ROOT.Prop[2].Target is Specs['Address'].ROOT)
+print("Interpreter agrees:", Extruct.NativeToNative_Convertor(oSpec).Convert(Order) == RVAL)
+print("Validate agrees:   ", oSpec.Validate(Order) == RVAL)
+print("JSON round trip:   ", oSpec.Convert(oSpec.Convert(Order, 'Native>>JSON'), 'JSON>>Native') == RVAL)
+print("Spec.Serialize:    ", oSpec.Unserialize(oSpec.Serialize(Order)) == RVAL)
+print("Incremental:       ", oSpec.ConvertIncremental(Order).Value == RVAL)
+
+# Records from another copy of a Spec are of another (generated) class, so compare their JSON
+def Same(Other):
+  return oSpec.Convert(Other, 'Native>>JSON') == oSpec.Convert(RVAL, 'Native>>JSON')
+
+print("Pickled:           ", Same(pickle.loads(pickle.dumps(oSpec)).Convert(Order)))
+
+print("\n=================================================\n")
+
+def Error(oFunc, *args):
+  try:
+    oFunc(*args)
+  except (Extruct.ConversionError, Extruct.SpecError) as e:
+    print("%s: %s" % (e.__class__.__name__, e))
+
+Error(oSpec.Convert, dict(Order, Billing=dict(Address, Country='USA')))
+Error(oSpec.Convert, dict(Order, Lines=[{'Sku': 'A', 'Price': 'x'}]))
+Error(oSpec.Convert, json.dumps(dict(Order, Total='x')), 'JSON>>Native')
+Error(Extruct.NativeToNative_Convertor(oSpec).Convert, dict(Order, Billing=dict(Address, Country='USA')))
+
+# A Ref to a List or Dict keeps the element index or key in its stack entry
+Vectors = dict((o.Name, o) for o in Extruct.Parse('''<Extruct>
+  <Struct Name="Order"><Ref Name="Items" Spec="ItemList" /><Ref Name="Tags" Spec="TagMap" /></Struct>
+  <List Name="ItemList"><Int Name="Item" /></List>
+  <Dict Name="TagMap"><String Name="Key" /><Int Name="Value" /></Dict>
+</Extruct>'''))
+oVectors = Vectors['Order']
+
+for Bad in ({'Items': [1, 'x'], 'Tags': {}}, {'Items': [], 'Tags': {'a': 'x'}}):
+  Error(oVectors.Convert, Bad)
+  Error(Extruct.NativeToNative_Convertor(oVectors).Convert, Bad)
+  Error(oVectors.Convert, json.dumps(Bad), 'JSON>>Native')
+  Error(oVectors.Convert, Bad, 'Native>>JSON')
+  Error(oVectors.ConvertIncremental, Bad)
+
+# Changing a target Spec invalidates the convertors of the Specs which Ref it
+Changing = dict((o.Name, o) for o in Extruct.Parse('''<Extruct>
+  <Struct Name="Order"><Ref Name="Address" Spec="Address" /></Struct>
+  <Struct Name="Address"><String Name="Zip" MaxLength="5" /></Struct>
+</Extruct>'''))
+oChanging = Changing['Order']
+
+Error(oChanging.Convert, {'Address': {'Zip': '1234567'}})
+Changing['Address'].Name = 'Renamed'
+Error(oChanging.Convert, {'Address': {'Zip': '1234567'}})
+Changing['Address'].ROOT.Prop[0].MaxLength = 10
+Changing['Address'].Invalidate()
+print("Invalidated:       ", oChanging.Convert({'Address': {'Zip': '1234567'}}))
+
+Error(Extruct.ParseOne('<Struct Name="A"><Ref Name="B" Spec="B" /></Struct>').Convert, {})
+Error(Extruct.Parse('<Extruct><Struct Name="A"><List Name="B"><Ref Name="Item" Spec="A" /></List></Struct></Extruct>')[0].Convert, {})
+
+print("\n=================================================\n")
+
+# A library builds the Spec a Ref names only when it is first needed
+sDir = tempfile.mkdtemp()
+with open(os.path.join(sDir, 'Library.xml'), 'w') as FILE:
+  FILE.write(XML)
+
+oLibrary = Extruct.SpecLibrary(sDir)
+print("Library convert:   ", Same(oLibrary['Order'].Convert(Order)))
+print("Built Specs:       ", sorted(oLibrary.Specs))
+
+# The cache keeps the Refs resolved, and the target nodes shared
+for i in range(2):
+  Cached = dict((o.Name, o) for o in Extruct.ParseFile(os.path.join(sDir, 'Library.xml'), Cache=True))
+  print("Cached convert:    ", Same(Cached['Order'].Convert(Order)), Cached['Order'].ROOT.Prop[1].Target is Cached['Address'].ROOT)
+
+print("\n=================================================\n")
@@ -0,0 +1,59 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import os
+import shutil
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+###############################################################################
+def MakeXML(iFile, Count):
+  Specs = []
+  for i in range(Count):
+    Specs.append('''
+  <Struct Name="File%iRecord%i">
+    <Int Name="Id" />
+    <String Name="Title" MaxLength="100" />
+    <List Name="Tags"><String Name="Tag" /></List>
+    <Struct Name="Address">
+      <String Name="Street" /><String Name="City" /><String Name="Zip" />
+    </Struct>
+  </Struct>''' % (iFile, i))
+  return '<Extruct>%s\n</Extruct>' % str.join('', Specs)
+
+sDir = tempfile.mkdtemp()
+for iFile in range(10):
+  with open(os.path.join(sDir, 'Library%i.xml' % iFile), 'w') as FILE:
+    FILE.write(MakeXML(iFile, 300))
+
+Wanted = ['File0Record0', 'File3Record150', 'File9Record299', 'File5Record7', 'File7Record42']
+
+def Measure(Label, Func):
+  tracemalloc.start()
+  t = perf_counter()
+  Func()
+  t = perf_counter() - t
+  Peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  print("  %-36s %8.1f ms  peak %8.0f KiB" % (Label, t * 1000, Peak / 1024))
+
+def ParseEverything():
+  Specs = {}
+  for sName in sorted(os.listdir(sDir)):
+    for oSpec in Extruct.ParseFile(os.path.join(sDir, sName)):
+      Specs[oSpec.Name] = oSpec
+  return [Specs[sName] for sName in Wanted]
+
+def UseLibrary():
+  Library = Extruct.SpecLibrary(sDir)
+  return [Library[sName] for sName in Wanted]
+
+print("\n=================================================\n")
+
+print("Using 5 of 3000 specs in 10 files")
+Measure("ParseFile every file", ParseEverything)
+Measure("SpecLibrary, 5 lookups", UseLibrary)
+
+print("\n=================================================\n")
+
+shutil.rmtree(sDir)
@@ -0,0 +1,94 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import datetime
+from decimal import Decimal
+from timeit import timeit
+
+###############################################################################
+oSpec = Extruct.ParseOne('''
+  <Struct Name="Order">
+    <Int Name="Id" />
+    <String Name="Customer" />
+    <String Name="Note" Nullable="1" />
+    <Bool Name="Paid" />
+    <Date Name="Placed" />
+    <DateTime Name="Shipped" Nullable="1" />
+    <Object Name="Extra" Nullable="1" />
+    <List Name="Lines">
+      <Struct Name="Line" Record="Slots">
+        <String Name="Sku" />
+        <Int Name="Quantity" />
+        <Decimal Name="Price" />
+        <Float Name="Weight" Nullable="1" />
+      </Struct>
+    </List>
+    <List Name="Readings" Packed="1"><Float Name="Reading" /></List>
+    <Dict Name="Attributes">
+      <String Name="Key" />
+      <Bytes Name="Value" />
+    </Dict>
+  </Struct>
+  ''')
+
+def Order(i):
+  return {
+    'Id': i, 'Customer': 'Customer %i' % i, 'Note': None if i % 2 else 'Leave at door', 'Paid': True,
+    'Placed': '2010-06-30', 'Shipped': None if i % 3 else '2010-07-01T09:30:00-05:00',
+    'Extra': None if i % 2 else {'Gift': True, 'Codes': [1, 2]},
+    'Lines': [{'Sku': 'SKU-%i' % n, 'Quantity': n, 'Price': Decimal('9.99'), 'Weight': None if n % 2 else 1.5} for n in range(5)],
+    'Readings': [n / 10 for n in range(10)],
+    'Attributes': {'color': b'red', 'size': b'L'},
+    }
+
+print("\n=================================================\n")
+
+for i in (0, 1):
+  DATA = oSpec.Convert(Order(i))
+  STREAM = oSpec.Serialize(DATA)
+  print("Order(%i) round trip:" % i, oSpec.Unserialize(STREAM) == DATA)
+  print("  Spec.Serialize: %i bytes, Serialize(Version=2) of the input: %i bytes" % (len(STREAM), len(Extruct.Serialize(Order(i), Version=2))))
+
+print("\n=================================================\n")
+
+oOther = Extruct.ParseOne('<Struct Name="Order"><Int Name="Id" /></Struct>')
+STREAM = oSpec.Serialize(Order(0))
+for Label, Call in (
+    ("A different Spec", lambda: oOther.Unserialize(STREAM)),
+    ("A truncated stream", lambda: oSpec.Unserialize(STREAM[:-20])),
+    ("A version 2 stream", lambda: oSpec.Unserialize(Extruct.Serialize(Order(0), Version=2))),
+    ):
+  try:
+    Call()
+  except ValueError as e:
+    print("%-20s ValueError: %s" % (Label, e))
+
+try:
+  oSpec.Serialize(dict(Order(0), Id='x'))
+except Extruct.ConversionError as e:
+  print("%-20s ConversionError: %s" % ("Invalid data", e))
+
+print("\n=================================================\n")
+
+oList = Extruct.ParseOne('<List Name="Orders">%s</List>' % '''
+  <Struct Name="Order">
+    <Int Name="Id" />
+    <String Name="Status" />
+    <Float Name="Amount" />
+    <String Name="Note" Nullable="1" />
+  </Struct>''')
+
+Orders = oList.Convert([{'Id': i, 'Status': 'OK', 'Amount': i * 1.5, 'Note': None} for i in range(10000)])
+STREAM = oList.Serialize(Orders)
+
+# aadict is not a plain dict, so Serialize needs plain dicts
+Plain = [dict(o) for o in Orders]
+V2 = Extruct.Serialize(Plain, Version=2)
+
+print("10000 flat records")
+print("  Size:         Spec.Serialize %7i bytes   Serialize(Version=2) %7i bytes" % (len(STREAM), len(V2)))
+print("  Encode (ms):  Spec.Serialize %7.2f         Serialize(Version=2) %7.2f" % (
+  timeit(lambda: oList.Serialize(Orders), number=5) * 200, timeit(lambda: Extruct.Serialize(Plain, Version=2), number=5) * 200))
+print("  Decode (ms):  Spec.Unserialize %5.2f         Unserialize          %7.2f" % (
+  timeit(lambda: oList.Unserialize(STREAM), number=5) * 200, timeit(lambda: Extruct.Unserialize(V2), number=5) * 200))
+
+print("\n=================================================\n")
@@ -0,0 +1,60 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import io
+import tracemalloc
+from decimal import Decimal
+
+###############################################################################
+DATA = {
+  'Int': 10, 'Float': 2.5, 'Decimal': Decimal('1.10'), 'None': None, 'Bool': True,
+  'String': 'pipes | and ünïcödé', 'Bytes': b'\x00\xff|', 'Tuple': (1, 'a'),
+  'List': [1, [2, [3, {}]], {'k': []}], 1: 'int key',
+  }
+
+STREAM = Extruct.Serialize(DATA)
+
+def Chunks(sText, Size):
+  bText = sText.encode()
+  for i in range(0, len(bText), Size):
+    yield bText[i:i+Size]
+
+print("\n=================================================\n")
+
+print("Unserialize(STREAM) == DATA")
+print("  ", Extruct.Unserialize(STREAM) == DATA)
+
+print("Load(text file) == DATA")
+print("  ", Extruct.Unserialize.Load(io.StringIO(STREAM), ChunkSize=7) == DATA)
+
+print("Load(binary file) == DATA")
+print("  ", Extruct.Unserialize.Load(io.BytesIO(STREAM.encode()), ChunkSize=5) == DATA)
+
+print("IterLoad(1 byte chunks) == DATA")
+print("  ", Extruct.Unserialize.IterLoad(Chunks(STREAM, 1)) == DATA)
+
+print("\n=================================================\n")
+
+for Bad in (STREAM[:-3], STREAM + '|I|1', '[[9|N|]]'):
+  try:
+    print("IterLoad(%r...)" % Bad[-10:])
+    Extruct.Unserialize.IterLoad(Chunks(Bad, 4))
+  except ValueError as e:
+    print("  ", e)
+
+print("\n=================================================\n")
+
+print("Peak memory decoding 200000 small tokens")
+BIG = Extruct.Serialize([[i, 'x'] for i in range(50000)])
+
+tracemalloc.start()
+Extruct.Unserialize(BIG)
+print("  Unserialize(STREAM): %8.0f KiB" % (tracemalloc.get_traced_memory()[1] / 1024))
+tracemalloc.stop()
+
+FILE = io.BytesIO(BIG.encode())
+tracemalloc.start()
+Extruct.Unserialize.Load(FILE)
+print("  Unserialize.Load:    %8.0f KiB (includes the decoded value)" % (tracemalloc.get_traced_memory()[1] / 1024))
+tracemalloc.stop()
+
+print("\n=================================================\n")
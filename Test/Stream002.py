@@ -0,0 +1,52 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import io
+import tracemalloc
+from decimal import Decimal
+
+###############################################################################
+DATA = {
+  'Int': 10, 'Float': 2.5, 'Decimal': Decimal('1.10'), 'None': None, 'Bool': False,
+  'String': 'pipes | and ünïcödé', 'Bytes': b'\x00\xff|', 'Tuple': (1, 'a'),
+  'List': [1, [2, [3, {}]], {'k': []}] * 100, 1: 'int key',
+  }
+
+class CountingFile(io.StringIO):
+  Writes = 0
+  def write(self, s):
+    self.Writes += 1
+    return io.StringIO.write(self, s)
+
+print("\n=================================================\n")
+
+print("Dump(text file) == Serialize(DATA)")
+FILE = CountingFile()
+Extruct.Serialize.Dump(DATA, FILE, ChunkTokens=64)
+print("  ", FILE.getvalue() == Extruct.Serialize(DATA), "(%i writes)" % FILE.Writes)
+
+print("Dump(binary file) -> Unserialize.Load == DATA")
+FILE = io.BytesIO()
+Extruct.Serialize.Dump(DATA, FILE, ChunkTokens=1)
+FILE.seek(0)
+print("  ", Extruct.Unserialize.Load(FILE) == DATA)
+
+print("\n=================================================\n")
+
+print("Peak memory encoding a list of 100000 strings")
+BIG = ['value %i' % i for i in range(100000)]
+
+tracemalloc.start()
+Extruct.Serialize(BIG)
+print("  Serialize(DATA):  %8.0f KiB" % (tracemalloc.get_traced_memory()[1] / 1024))
+tracemalloc.stop()
+
+class NullFile(object):
+  def write(self, s):
+    pass
+
+tracemalloc.start()
+Extruct.Serialize.Dump(BIG, NullFile())
+print("  Serialize.Dump:   %8.0f KiB" % (tracemalloc.get_traced_memory()[1] / 1024))
+tracemalloc.stop()
+
+print("\n=================================================\n")
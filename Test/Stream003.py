@@ -0,0 +1,63 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import io
+from decimal import Decimal
+from timeit import timeit
+
+###############################################################################
+DATA = {
+  'Int': 10, 'Negative': -1234567, 'Huge': 2**100, 'Float': 2.5, 'Decimal': Decimal('-1.10'),
+  'None': None, 'Bool': True, 'False': False, 'String': 'pipes | and ünïcödé',
+  'Bytes': b'\x00\xff|]]', 'Tuple': (1, 'a'), 'List': [1, [2, [3, {}]], {'k': []}], 1: 'int key',
+  }
+
+print("\n=================================================\n")
+
+V1 = Extruct.Serialize(DATA)
+V2 = Extruct.Serialize(DATA, Version=2)
+
+print("Version 2 round trip == DATA")
+print("  ", Extruct.Unserialize(V2) == DATA)
+
+print("Version 1 stream passed as bytes == DATA")
+print("  ", Extruct.Unserialize(V1.encode()) == DATA)
+
+print("Load(version 2 file, 3 byte chunks) == DATA")
+print("  ", Extruct.Unserialize.Load(io.BytesIO(V2), ChunkSize=3) == DATA)
+
+print("Dump(Version=2) == Serialize(Version=2)")
+FILE = io.BytesIO()
+Extruct.Serialize.Dump(DATA, FILE, Version=2, ChunkBytes=8)
+print("  ", FILE.getvalue() == V2)
+
+print("ZeroCopy Bytes")
+Value = Extruct.Unserialize(V2, ZeroCopy=True)['Bytes']
+print("  ", type(Value).__name__, Value.obj is V2, Value == DATA['Bytes'])
+
+for Bad in (V2[:-4], V2[:-3] + b'|]', b'[[2|Q|]]'):
+  try:
+    print("Unserialize(%r)" % Bad[-8:])
+    Extruct.Unserialize(Bad)
+  except (ValueError, TypeError) as e:
+    print("  ", e)
+
+print("\n=================================================\n")
+
+print("Size and speed, version 1 vs version 2")
+for Name, BIG in (
+  ('ints', list(range(-50000, 50000))),
+  ('floats', [i / 7.0 for i in range(100000)]),
+  ('strings', ['value %i' % i for i in range(100000)]),
+  ('bytes', [bytes(1000)] * 1000),
+  ):
+  S1 = Extruct.Serialize(BIG)
+  S2 = Extruct.Serialize(BIG, Version=2)
+  print("  %-8s size: %8i vs %8i   encode: %.3fs vs %.3fs   decode: %.3fs vs %.3fs" % (
+    Name, len(S1), len(S2),
+    timeit(lambda: Extruct.Serialize(BIG), number=3),
+    timeit(lambda: Extruct.Serialize(BIG, Version=2), number=3),
+    timeit(lambda: Extruct.Unserialize(S1), number=3),
+    timeit(lambda: Extruct.Unserialize(S2, ZeroCopy=True), number=3),
+    ))
+
+print("\n=================================================\n")
@@ -0,0 +1,45 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import io
+import sys
+from timeit import timeit
+
+###############################################################################
+def Deep(Depth):
+  DATA = []
+  for i in range(Depth):
+    DATA = [i, {'Child': DATA}] if i % 2 else (DATA,)
+  return DATA
+
+Wide = [{'Id': i, 'Title': 'Title %i' % i, 'Score': i / 3.0, 'Tags': ['a', 'b']} for i in range(10000)]
+
+print("\n=================================================\n")
+
+# Comparing deeply nested values with == would itself recurse, so streams are compared instead
+Depth = sys.getrecursionlimit() * 50
+DATA = Deep(Depth)
+print("Round trip of %i levels of nesting (recursion limit %i)" % (Depth, sys.getrecursionlimit()))
+
+for Version in (1, 2):
+  STREAM = Extruct.Serialize(DATA, Version=Version)
+  print("  Version %i:       " % Version, Extruct.Serialize(Extruct.Unserialize(STREAM), Version=Version) == STREAM)
+
+  FILE = io.BytesIO()
+  Extruct.Serialize.Dump(DATA, FILE, Version=Version)
+  FILE.seek(0)
+  print("  Version %i files: " % Version, Extruct.Serialize(Extruct.Unserialize.Load(FILE), Version=Version) == STREAM)
+
+print("\n=================================================\n")
+
+print("Milliseconds per call")
+for Label, DATA in (('Wide (10000 records)', Wide), ('Deep (500 levels)', Deep(500))):
+  for Version in (1, 2):
+    STREAM = Extruct.Serialize(DATA, Version=Version)
+    Number = 5
+    print("  %-22s v%i  Serialize %7.2f  Unserialize %7.2f" % (
+      Label, Version,
+      timeit(lambda: Extruct.Serialize(DATA, Version=Version), number=Number) / Number * 1000,
+      timeit(lambda: Extruct.Unserialize(STREAM), number=Number) / Number * 1000,
+      ))
+
+print("\n=================================================\n")
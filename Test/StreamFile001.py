@@ -0,0 +1,72 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from time import perf_counter
+
+###############################################################################
+sDir = tempfile.mkdtemp()
+
+def Record(i):
+  return {'Id': i, 'Title': 'Title %i ü|' % i, 'Price': Decimal('1.10'), 'Tags': ['a', (i, None)], 'Blob': b'\x00|', 'Nested': {1: [{}]}}
+
+Records = [Record(i) for i in range(100000)]
+Keyed = {('k%i' % i if i % 2 else i): Record(i) for i in range(100000)}
+
+def Write(sName, DATA, Version):
+  sPath = os.path.join(sDir, sName)
+  with open(sPath, 'wb') as FILE:
+    Extruct.Serialize.Dump(DATA, FILE, Version=Version)
+  return sPath
+
+try:
+  print("\n=================================================\n")
+
+  for Version in (1, 2):
+    sList = Write('List%i' % Version, Records, Version)
+    sDict = Write('Dict%i' % Version, Keyed, Version)
+
+    print("Version %i (%.1f MiB)" % (Version, os.path.getsize(sList) / 2**20))
+
+    t = perf_counter()
+    Extruct.Unserialize.Load(open(sList, 'rb'))[54321]
+    print("  Unserialize.Load, then [54321]:   %8.1f ms" % ((perf_counter() - t) * 1000))
+
+    t = perf_counter()
+    with Extruct.StreamFile(sList) as oFile:
+      oFile[54321]
+    print("  StreamFile, building the index:   %8.1f ms" % ((perf_counter() - t) * 1000))
+
+    t = perf_counter()
+    with Extruct.StreamFile(sList) as oFile:
+      tOpen = perf_counter() - t
+      t = perf_counter()
+      Value = oFile[54321]
+      tRead = perf_counter() - t
+    print("  StreamFile, saved index:          %8.1f ms to open, %.3f ms to read one element" % (tOpen * 1000, tRead * 1000))
+
+    with Extruct.StreamFile(sList, Index=False) as oFile:
+      print("  List: len %i, [54321] ok %s, [-1] ok %s, [10:13] ok %s" % (
+        len(oFile), Value == Records[54321], oFile[-1] == Records[-1], oFile[10:13] == Records[10:13]))
+
+    with Extruct.StreamFile(sDict) as oFile:
+      print("  Dict: len %i, ['k7'] ok %s, [8] ok %s, 'k9' in %s, keys ok %s" % (
+        len(oFile), oFile['k7'] == Keyed['k7'], oFile[8] == Keyed[8], 'k9' in oFile, oFile.keys() == list(Keyed)))
+
+  print("\n=================================================\n")
+
+  for Label, DATA in (('Scalar', 5), ('Truncated', None)):
+    sPath = os.path.join(sDir, Label)
+    with open(sPath, 'wb') as FILE:
+      FILE.write(Extruct.Serialize(DATA if DATA is not None else [1, 2, 3], Version=2)[:None if DATA is not None else -6])
+    try:
+      Extruct.StreamFile(sPath, Index=False)
+    except ValueError as e:
+      print("%-10s ValueError: %s" % (Label, e))
+
+  print("\n=================================================\n")
+
+finally:
+  shutil.rmtree(sDir)
@@ -0,0 +1,72 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+import tracemalloc
+from decimal import Decimal
+from timeit import timeit
+
+###############################################################################
+oSpec = Extruct.ParseOne('''
+  <Struct Name="Record">
+    <Int Name="Id" />
+    <Decimal Name="Price" />
+    <String Name="Title" />
+    <String Name="Note" Nullable="1" />
+    <List Name="Tags">
+      <String Name="Tag" />
+    </List>
+    <Dict Name="Counts">
+      <String Name="Key" />
+      <Int Name="Count" />
+    </Dict>
+    <Struct Name="Child">
+      <Int Name="A" />
+    </Struct>
+  </Struct>
+  ''')
+
+Raw = {
+  'Id': '1', 'Price': 2.5, 'Title': ' x ', 'Tags': ['a', ' b'], 'Counts': {'a': '1'}, 'Child': {'A': 1},
+  }
+
+# Already exactly what Convert returns
+Clean = oSpec.Convert(Raw)
+
+def Outcome(oFunc, DATA):
+  try:
+    return ('OK', oFunc(DATA))
+  except Extruct.ConversionError as e:
+    return ('ERROR', str(e))
+
+print("\n=================================================\n")
+
+print("Validate(Raw) == Convert(Raw)")
+print("  ", oSpec.Validate(Raw) == oSpec.Convert(Raw))
+
+print("Validate(Clean) is Clean")
+print("  ", oSpec.Validate(Clean) is Clean)
+
+print("Only the changed path is copied")
+Edited = Extruct.aadict(Clean, Tags=Clean.Tags + [' c'])
+Result = oSpec.Validate(Edited)
+print("  ", Result is not Edited, Result.Tags is not Edited.Tags, Result.Counts is Clean.Counts, Result.Child is Clean.Child)
+
+print("Errors are the same as Convert")
+for Bad in (dict(Raw, Id='x'), dict(Raw, Tags=['a', 'b', None, []]), dict(Clean, Counts={'a': 1, 'b': 'x'}), Extruct.aadict(Clean, Child={})):
+  a = Outcome(oSpec.Convert, Bad)
+  b = Outcome(oSpec.Validate, Bad)
+  print('   same' if a == b else '   DIFFERENT', a[1])
+
+print("\n=================================================\n")
+
+print("Re-validating 1000 clean records")
+Records = [oSpec.Convert(Raw) for i in range(1000)]
+for Label, oFunc in (('Convert', oSpec.Convert), ('Validate', oSpec.Validate)):
+  t = timeit(lambda: [oFunc(r) for r in Records], number=50)
+  tracemalloc.start()
+  Results = [oFunc(r) for r in Records]
+  Size = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  del Results
+  print("  %-9s %.3fs per 50 passes, %7.0f KiB newly allocated per pass" % (Label, t, Size / 1024))
+
+print("\n=================================================\n")
@@ -0,0 +1,68 @@
+# vim:encoding=utf-8:ts=2:sw=2:expandtab
+import Extruct
+from timeit import timeit
+
+###############################################################################
+@Extruct.Wrap('''
+  <Int Name="Num" />
+  <Int Name="Denom" />
+  <Int Name="Scale" />
+  <Float Name="return" />
+  ''')
+def Divide(Num, Denom=1, Scale=1):
+  return Num * Scale / Denom
+
+def PlainDivide(Num, Denom=1, Scale=1):
+  return Num * Scale / Denom
+
+print("\n=================================================\n")
+
+print("Divide('10', 4)")
+print("  ", Divide('10', 4))
+
+print("Divide('10', Denom='4', Scale=3)")
+print("  ", Divide('10', Denom='4', Scale=3))
+
+print("Divide(Num=10)")
+print("  ", Divide(Num=10))
+
+try:
+  print("Divide(10, Denom='x')")
+  Divide(10, Denom='x')
+except Extruct.ConversionError as e:
+  print("  ", e)
+
+try:
+  print("Divide(1, 2, 3, 4)")
+  Divide(1, 2, 3, 4)
+except TypeError as e:
+  print("  ", e)
+
+print("\n=================================================\n")
+
+# Profiling, renaming or invalidating the Specs later is seen by the wrapped function
+Denom = Divide.Specs[1]
+Denom.Profile()
+Divide(10, 4)
+print("Profiled calls:", [o.Calls for o in Denom.Stats().values()])
+Denom.Profile(0)
+
+Denom.Name = 'Divisor'
+try:
+  print("Divide(10, 'x') after renaming")
+  Divide(10, 'x')
+except Extruct.ConversionError as e:
+  print("  ", e)
+
+print("\n=================================================\n")
+
+N = 200000
+print("Call overhead, %i calls" % N)
+tPlain = timeit(lambda: PlainDivide(10, 4, 2), number=N)
+tPositional = timeit(lambda: Divide(10, 4, 2), number=N)
+tKeyword = timeit(lambda: Divide(10, Denom=4, Scale=2), number=N)
+print("  undecorated:          %.3fs" % tPlain)
+print("  Wrap, positional:     %.3fs  (%.0f ns per argument)" % (tPositional, (tPositional - tPlain) / N / 4 * 1e9))
+print("  Wrap, keywords:       %.3fs  (%.0f ns per argument)" % (tKeyword, (tKeyword - tPlain) / N / 4 * 1e9))
+
+print("\n=================================================\n")